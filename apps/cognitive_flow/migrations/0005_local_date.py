@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:22
+
+import config.fields
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_local_date(apps, schema_editor):
+    """按 TIME_ZONE 将存量记录的 created_at 换算为本地日期，单条 UPDATE 完成"""
+    CognitiveAssessmentRecord = apps.get_model('cognitive_flow', 'CognitiveAssessmentRecord')
+    CognitiveAssessmentRecord.objects.filter(local_date__isnull=True).update(
+        local_date=TruncDate('created_at', tzinfo=timezone.get_current_timezone())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cognitive_flow', '0004_remove_cognitiveassessmentrecord_cognitive_f_user_id_71085f_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cognitiveassessmentrecord',
+            name='local_date',
+            field=config.fields.LocalDateField(null=True, source='created_at', verbose_name='本地日期'),
+        ),
+        migrations.RunPython(backfill_local_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cognitiveassessmentrecord',
+            index=models.Index(fields=['user_id', 'local_date'], name='cognitive_f_user_id_68cacd_idx'),
+        ),
+    ]
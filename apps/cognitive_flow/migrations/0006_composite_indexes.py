@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cognitive_flow', '0005_local_date'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='cognitiveassessmentrecord',
+            name='cognitive_f_user_id_9c6a9f_idx',
+        ),
+        migrations.AlterField(
+            model_name='cognitiveassessmentrecord',
+            name='user_id',
+            field=models.UUIDField(verbose_name='用户ID'),
+        ),
+        migrations.AddIndex(
+            model_name='cognitiveassessmentrecord',
+            index=models.Index(fields=['user_id', '-created_at'], name='cognitive_f_user_id_c192c5_idx'),
+        ),
+    ]
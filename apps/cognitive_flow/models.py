@@ -1,11 +1,12 @@
 from django.db import models
+from config.fields import LocalDateField
 
 class CognitiveAssessmentRecord(models.Model):
     """
     认知测评答卷记录（无流程控制，仅存储答卷与评分结果）
     """
     id = models.AutoField(primary_key=True)
-    user_id = models.UUIDField(verbose_name='用户ID', db_index=True)
+    user_id = models.UUIDField(verbose_name='用户ID')
     # 预留所有常见量表的得分字段，均允许为空
     score_scd = models.FloatField(verbose_name='SCD得分', null=True, blank=True)
     score_mmse = models.FloatField(verbose_name='MMSE得分', null=True, blank=True)
@@ -18,10 +19,13 @@ class CognitiveAssessmentRecord(models.Model):
     completed_at = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    local_date = LocalDateField(null=True, verbose_name='本地日期')
 
     class Meta:
         verbose_name = "认知测评答卷"
         verbose_name_plural = "认知测评答卷"
         indexes = [
-            models.Index(fields=['user_id']),
+            # 历史列表：user_id 过滤 + -created_at 排序
+            models.Index(fields=['user_id', '-created_at']),
+            models.Index(fields=['user_id', 'local_date']),
         ]
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+情绪记录 XLSX 导出
+用户姓名/分组一次性批量查询，记录通过 iterator 分块读取后流式写出，
+内存占用与导出行数无关
+"""
+from datetime import datetime, time
+from django.utils import timezone
+from apps.exports.xlsx import write_xlsx
+from apps.users.models import User
+
+EXPORT_HEADERS = [
+    '编号', '姓名', '调查日期', '时段', '日期-时段',
+    '计划时间', '开始时间', '记录时间', '响应延迟(分钟)', '是否按时(1是0否)',
+    '答题用时(分钟)', '抑郁水平（1-4）', '焦虑水平（0-10）', '精力得分（0-3）',
+    '睡眠得分（0-4）', '主要情绪', '情绪强度（1轻微2中等3明显）',
+    '情绪标签', '补充说明'
+]
+COLUMN_WIDTHS = [8, 15, 15, 8, 15, 15, 15, 15, 10, 12, 10, 10, 10, 10, 10, 15, 12, 20, 25]
+EXPORT_FIELDS = (
+    'user_id', 'record_date', 'period', 'started_at', 'created_at',
+    'depression', 'anxiety', 'energy', 'sleep',
+    'mainMood', 'moodIntensity', 'moodSupplementTags', 'moodSupplementText',
+)
+PERIOD_LABELS = {'morning': '早', 'evening': '晚'}
+PLANNED_HOURS = {'morning': 8, 'evening': 20}
+DATETIME_FORMAT = '%Y年%m月%d日 %H:%M'
+
+
+def build_user_labels(queryset):
+    """一次查询取出记录涉及的全部用户，返回 {user_id: "姓名（分组）"}"""
+    users = User.objects.filter(
+        id__in=queryset.order_by().values('user_id')
+    ).values_list('id', 'real_name', 'username', 'group')
+    labels = {}
+    for user_id, real_name, username, group in users:
+        label = real_name or username
+        labels[user_id] = f"{label}（{group}）" if group else label
+    return labels
+
+
+def export_row(index, record, user_label, planned_at):
+    """将一条记录（values 字典）转换为导出行，计算规则与历史导出保持一致"""
+    record_date = record['record_date']
+    period_code = record['period']
+    started_at = record['started_at']
+    created_at = record['created_at']
+
+    survey_date = record_date.strftime('%Y年%m月%d号') if record_date else ''
+    period = PERIOD_LABELS.get(period_code, period_code) if period_code else ''
+    date_period = f"{survey_date} {period}" if survey_date and period else ''
+    planned_time_str = timezone.localtime(planned_at).strftime(DATETIME_FORMAT) if planned_at else ''
+    start_time = timezone.localtime(started_at).strftime(DATETIME_FORMAT) if started_at else ''
+    record_time = timezone.localtime(created_at).strftime(DATETIME_FORMAT) if created_at else ''
+
+    # 响应延迟（记录时间 - 计划时间），负值表示提早作答
+    delay_minutes = 0
+    if created_at and planned_at:
+        delay_minutes = int((created_at - planned_at).total_seconds() / 60)
+    # 在计划时间前后60分钟内作答算按时
+    on_time = 1 if -60 <= delay_minutes <= 60 else 0
+
+    answer_duration = 0
+    if started_at and created_at:
+        answer_duration = int((created_at - started_at).total_seconds() / 60)
+
+    depression = record['depression']
+    mood_intensity = record['moodIntensity']
+    tags = record['moodSupplementTags']
+    return [
+        index,
+        user_label,
+        survey_date,
+        period,
+        date_period,
+        planned_time_str,
+        start_time,
+        record_time,
+        delay_minutes,
+        on_time,
+        answer_duration,
+        # 抑郁水平（1-4分制，根据原始分数转换）
+        min(4, max(1, int(depression / 10) + 1)) if depression is not None else '',
+        record['anxiety'] if record['anxiety'] is not None else '',
+        record['energy'] if record['energy'] is not None else '',
+        record['sleep'] if record['sleep'] is not None else '',
+        record['mainMood'] or '',
+        str(mood_intensity) if mood_intensity in (1, 2, 3) else '',
+        ','.join(tags) if tags and isinstance(tags, list) else '',
+        record['moodSupplementText'] or '',
+    ]
+
+
+def write_emotion_records_xlsx(queryset, fileobj, chunk_size=2000, on_progress=None):
+    """
+    将 queryset 中的情绪记录写入 fileobj（文件路径或二进制文件对象），返回写入的行数
+    """
+    user_labels = build_user_labels(queryset)
+    # 计划时间只取决于 (日期, 时段)，导出范围内的组合数很少，缓存避免逐行构造时区对象
+    planned_cache = {}
+
+    def rows():
+        records = queryset.values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+        for index, record in enumerate(records, 1):
+            key = (record['record_date'], record['period'])
+            if key not in planned_cache:
+                hour = PLANNED_HOURS.get(key[1])
+                planned_cache[key] = (
+                    timezone.make_aware(datetime.combine(key[0], time(hour, 0)))
+                    if key[0] and hour is not None else None
+                )
+            yield export_row(
+                index, record,
+                user_labels.get(record['user_id'], '未知用户'),
+                planned_cache[key],
+            )
+
+    return write_xlsx(
+        fileobj, '情绪记录', EXPORT_HEADERS, COLUMN_WIDTHS, rows(),
+        on_progress=on_progress, progress_every=chunk_size,
+    )
@@ -0,0 +1 @@
+# 情绪追踪模块管理命令
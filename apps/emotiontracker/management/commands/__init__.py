@@ -0,0 +1 @@
+# 保证 management/commands 目录为包
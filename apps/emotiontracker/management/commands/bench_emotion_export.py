@@ -0,0 +1,93 @@
+"""
+情绪记录 XLSX 导出基准：生成合成记录后整表导出，统计耗时、吞吐与内存
+数据在事务内生成，结束后整体回滚，不会残留在数据库中
+使用方式: python manage.py bench_emotion_export [--rows 1000000] [--users 2000] [--trace-memory]
+"""
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from apps.emotiontracker.exports import write_emotion_records_xlsx
+from apps.emotiontracker.models import EmotionRecord
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = "生成合成情绪记录并测量 XLSX 导出的耗时与内存"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="生成的记录数（默认 1000000）")
+        parser.add_argument("--users", type=int, default=2000, help="记录分布的用户数（默认 2000）")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="导出时 iterator 的分块大小")
+        parser.add_argument("--trace-memory", action="store_true",
+                            help="使用 tracemalloc 统计导出期间的 Python 内存峰值（会明显拖慢导出）")
+        parser.add_argument("--seed", type=int, default=42, help="随机种子")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        with transaction.atomic():
+            rows = self._seed(rng, options["rows"], max(1, options["users"]))
+            queryset = EmotionRecord.objects.order_by('user_id', 'record_date', 'period')
+
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if options["trace_memory"]:
+                tracemalloc.start()
+            with tempfile.TemporaryFile() as output:
+                started = time.perf_counter()
+                exported = write_emotion_records_xlsx(queryset, output, chunk_size=options["chunk_size"])
+                elapsed = time.perf_counter() - started
+                size = output.seek(0, 2)
+            if options["trace_memory"]:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"导出 {exported} 行（生成 {rows} 行），耗时 {elapsed:.1f} s，"
+                          f"{exported / elapsed:,.0f} 行/秒，文件 {size / 1024 / 1024:.1f} MB")
+        # ru_maxrss 在 Linux 上以 KB 为单位
+        self.stdout.write(f"进程 RSS 峰值: 导出前 {rss_before / 1024:.0f} MB，导出后 {rss_after / 1024:.0f} MB")
+        if options["trace_memory"]:
+            self.stdout.write(f"导出期间 Python 内存峰值: {peak / 1024 / 1024:.1f} MB")
+
+    def _seed(self, rng, rows, users):
+        self.stdout.write(self.style.NOTICE(f"生成 {users} 位用户、共 {rows} 条情绪记录..."))
+        user_ids = [uuid.uuid4() for _ in range(users)]
+        User.objects.bulk_create([
+            User(id=user_id, username=f"bench_{user_id.hex}", real_name=f"用户{index}",
+                 group=rng.choice(["", "A组", "B组"]), role="user")
+            for index, user_id in enumerate(user_ids)
+        ], batch_size=1000)
+
+        today = timezone.now().date()
+        now = timezone.now()
+        periods = (EmotionRecord.PERIOD_MORNING, EmotionRecord.PERIOD_EVENING)
+        batch = []
+        for index in range(rows):
+            # 每位用户按 (日期, 时段) 依次向前排列，满足唯一约束
+            slot = index // users
+            batch.append(EmotionRecord(
+                user_id=user_ids[index % users],
+                record_date=today - timedelta(days=slot // 2),
+                period=periods[slot % 2],
+                depression=rng.randint(0, 40),
+                anxiety=rng.randint(0, 10),
+                energy=rng.randint(0, 3),
+                sleep=rng.randint(0, 4),
+                mainMood=rng.choice([None, "平静", "焦虑", "愉快"]),
+                moodIntensity=rng.choice([None, 1, 2, 3]),
+                moodSupplementTags=rng.choice([None, ["工作"], ["睡眠", "家庭"]]),
+                started_at=now - timedelta(minutes=rng.randint(1, 600)),
+            ))
+            if len(batch) >= 5000:
+                EmotionRecord.objects.bulk_create(batch, batch_size=5000)
+                batch = []
+        EmotionRecord.objects.bulk_create(batch, batch_size=5000)
+        return rows
@@ -0,0 +1,129 @@
+"""
+情绪趋势接口基准：原始记录扫描 vs 每日汇总读取
+数据在事务内生成，结束后整体回滚，不会残留在数据库中
+使用方式: python manage.py bench_emotion_trend [--users 200] [--days 365] [--repeat 20]
+"""
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.emotiontracker.models import EmotionRecord
+from apps.emotiontracker.services import rebuild_rollups
+from apps.emotiontracker.views import get_emotion_trend
+
+
+def raw_scan_trend(user_id, days):
+    """改造前的实现：读取窗口内全部原始记录，在 Python 中按日求平均"""
+    end_date = timezone.now().date()
+    start_date = end_date - timedelta(days=days - 1)
+    records = EmotionRecord.objects.filter(
+        user_id=user_id,
+        record_date__range=[start_date, end_date]
+    ).order_by('record_date', 'period')
+
+    daily_data = {}
+    for record in records:
+        metrics = daily_data.setdefault(record.record_date, {
+            'depression': [], 'anxiety': [], 'energy': [], 'sleep': []
+        })
+        for metric in metrics:
+            metrics[metric].append(getattr(record, metric))
+
+    result = {"dates": [], "depression": [], "anxiety": [], "energy": [], "sleep": []}
+    current_date = start_date
+    while current_date <= end_date:
+        result["dates"].append(current_date.strftime('%Y-%m-%d'))
+        for metric in ('depression', 'anxiety', 'energy', 'sleep'):
+            values = daily_data.get(current_date, {}).get(metric)
+            result[metric].append(round(sum(values) / len(values)) if values else 0)
+        current_date += timedelta(days=1)
+    return result
+
+
+class Command(BaseCommand):
+    help = "对比情绪趋势接口的原始扫描与每日汇总两种实现"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200, help="生成的用户数（默认 200）")
+        parser.add_argument("--days", type=int, default=365, help="每位用户的记录天数及查询窗口（默认 365）")
+        parser.add_argument("--repeat", type=int, default=20, help="每种实现的查询次数（默认 20）")
+        parser.add_argument("--seed", type=int, default=42, help="随机种子")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        days = min(max(1, options["days"]), 365)
+
+        with transaction.atomic():
+            user_ids = self._seed(rng, options["users"], days)
+            sample = [rng.choice(user_ids) for _ in range(options["repeat"])]
+
+            raw = self._measure(lambda uid: raw_scan_trend(uid, days), sample)
+            rollup = self._measure(
+                lambda uid: get_emotion_trend(SimpleNamespace(auth=SimpleNamespace(id=uid)), days=days),
+                sample,
+            )
+            mismatches = sum(
+                raw_scan_trend(uid, days) != get_emotion_trend(SimpleNamespace(auth=SimpleNamespace(id=uid)), days=days)
+                for uid in sample
+            )
+            transaction.set_rollback(True)
+
+        self._report("原始记录扫描", raw)
+        self._report("每日汇总读取", rollup)
+        if raw["mean_ms"] and rollup["mean_ms"]:
+            self.stdout.write(f"加速比: {raw['mean_ms'] / rollup['mean_ms']:.1f}x")
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"两种实现结果不一致的样本数: {mismatches}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("两种实现结果一致"))
+
+    def _seed(self, rng, users, days):
+        today = timezone.now().date()
+        user_ids = [uuid.uuid4() for _ in range(users)]
+        self.stdout.write(self.style.NOTICE(f"生成 {users} 位用户 × {days} 天 × 2 时段的情绪记录..."))
+        batch = []
+        for user_id in user_ids:
+            for offset in range(days):
+                for period in (EmotionRecord.PERIOD_MORNING, EmotionRecord.PERIOD_EVENING):
+                    batch.append(EmotionRecord(
+                        user_id=user_id,
+                        record_date=today - timedelta(days=offset),
+                        period=period,
+                        depression=rng.randint(0, 40),
+                        anxiety=rng.randint(0, 10),
+                        energy=rng.randint(0, 3),
+                        sleep=rng.randint(0, 4),
+                    ))
+            if len(batch) >= 5000:
+                EmotionRecord.objects.bulk_create(batch, batch_size=5000)
+                batch = []
+        EmotionRecord.objects.bulk_create(batch, batch_size=5000)
+        rebuild_rollups(EmotionRecord.objects.filter(user_id__in=user_ids))
+        return user_ids
+
+    def _measure(self, func, sample):
+        timings = []
+        queries = 0
+        for user_id in sample:
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                func(user_id)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries += len(ctx.captured_queries)
+        return {
+            "mean_ms": statistics.mean(timings),
+            "p95_ms": sorted(timings)[max(0, int(len(timings) * 0.95) - 1)],
+            "queries": queries / len(sample),
+        }
+
+    def _report(self, label, result):
+        self.stdout.write(
+            f"{label}: 平均 {result['mean_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+            f"每次查询数 {result['queries']:.1f}"
+        )
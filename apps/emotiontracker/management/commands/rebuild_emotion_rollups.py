@@ -0,0 +1,53 @@
+"""
+重建每日情绪汇总（EmotionDailyRollup）
+用于上线后首次回填，或怀疑汇总与原始记录不一致时全量/局部重算
+使用方式: python manage.py rebuild_emotion_rollups [--user UUID] [--since YYYY-MM-DD]
+"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.emotiontracker.models import EmotionDailyRollup, EmotionRecord
+from apps.emotiontracker.services import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "按用户分批重建每日情绪汇总表"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=str, help="仅重建指定用户（UUID）")
+        parser.add_argument("--since", type=str, help="仅重建该日期（含）之后的数据，格式 YYYY-MM-DD")
+        parser.add_argument(
+            "--chunk-size", type=int, default=200,
+            help="每批处理的用户数（默认 200）"
+        )
+
+    def handle(self, *args, **options):
+        records = EmotionRecord.objects.all()
+        rollups = EmotionDailyRollup.objects.all()
+        if options["user"]:
+            records = records.filter(user_id=options["user"])
+            rollups = rollups.filter(user_id=options["user"])
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError(f"无效的日期: {options['since']}")
+            records = records.filter(record_date__gte=since)
+            rollups = rollups.filter(record_date__gte=since)
+
+        chunk_size = max(1, options["chunk_size"])
+        user_ids = list(records.order_by("user_id").values_list("user_id", flat=True).distinct())
+        self.stdout.write(self.style.NOTICE(f"开始重建每日汇总，共 {len(user_ids)} 位用户..."))
+
+        written = 0
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            with transaction.atomic():
+                # 先清理本批用户范围内的旧汇总，再整体写入，保证已删除日期不残留
+                rollups.filter(user_id__in=chunk).delete()
+                written += rebuild_rollups(records.filter(user_id__in=chunk))
+            self.stdout.write(f"  已处理 {min(start + chunk_size, len(user_ids))}/{len(user_ids)} 位用户")
+
+        # 范围内已没有原始记录的用户，其汇总行也一并清理
+        orphaned, _ = rollups.exclude(user_id__in=records.values("user_id")).delete()
+        self.stdout.write(self.style.SUCCESS(f"重建完成：写入 {written} 行汇总，清理孤立汇总 {orphaned} 行"))
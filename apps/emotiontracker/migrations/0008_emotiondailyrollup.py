@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:59
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+METRICS = ('depression', 'anxiety', 'energy', 'sleep')
+
+
+def backfill_rollups(apps, schema_editor):
+    """按 (user_id, record_date) 聚合已有记录，回填每日汇总"""
+    EmotionRecord = apps.get_model('emotiontracker', 'EmotionRecord')
+    EmotionDailyRollup = apps.get_model('emotiontracker', 'EmotionDailyRollup')
+    aggregates = {'record_count': Count('id')}
+    for metric in METRICS:
+        aggregates[f'{metric}_sum'] = Sum(metric)
+        aggregates[f'{metric}_min'] = Min(metric)
+        aggregates[f'{metric}_max'] = Max(metric)
+    rows = (
+        EmotionRecord.objects.order_by()
+        .values('user_id', 'record_date')
+        .annotate(**aggregates)
+        .iterator(chunk_size=2000)
+    )
+    batch = []
+    for row in rows:
+        batch.append(EmotionDailyRollup(**row))
+        if len(batch) >= 2000:
+            EmotionDailyRollup.objects.bulk_create(batch)
+            batch = []
+    EmotionDailyRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emotiontracker', '0007_emotionrecord_started_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmotionDailyRollup',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('user_id', models.UUIDField(verbose_name='用户')),
+                ('record_date', models.DateField(verbose_name='记录日期')),
+                ('record_count', models.PositiveSmallIntegerField(default=0, verbose_name='记录数')),
+                ('depression_sum', models.IntegerField(default=0, verbose_name='抑郁分数合计')),
+                ('depression_min', models.IntegerField(blank=True, null=True, verbose_name='抑郁分数最小值')),
+                ('depression_max', models.IntegerField(blank=True, null=True, verbose_name='抑郁分数最大值')),
+                ('anxiety_sum', models.IntegerField(default=0, verbose_name='焦虑分数合计')),
+                ('anxiety_min', models.IntegerField(blank=True, null=True, verbose_name='焦虑分数最小值')),
+                ('anxiety_max', models.IntegerField(blank=True, null=True, verbose_name='焦虑分数最大值')),
+                ('energy_sum', models.IntegerField(default=0, verbose_name='精力分数合计')),
+                ('energy_min', models.IntegerField(blank=True, null=True, verbose_name='精力分数最小值')),
+                ('energy_max', models.IntegerField(blank=True, null=True, verbose_name='精力分数最大值')),
+                ('sleep_sum', models.IntegerField(default=0, verbose_name='睡眠分数合计')),
+                ('sleep_min', models.IntegerField(blank=True, null=True, verbose_name='睡眠分数最小值')),
+                ('sleep_max', models.IntegerField(blank=True, null=True, verbose_name='睡眠分数最大值')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '每日情绪汇总',
+                'verbose_name_plural': '每日情绪汇总',
+                'constraints': [models.UniqueConstraint(fields=('user_id', 'record_date'), name='unique_rollup_user_date')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emotiontracker', '0008_emotiondailyrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emotionrecord',
+            name='user_id',
+            field=models.UUIDField(verbose_name='用户'),
+        ),
+        migrations.AddIndex(
+            model_name='emotionrecord',
+            index=models.Index(fields=['user_id', '-created_at', '-id'], name='emotiontrac_user_id_f17990_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emotionrecord',
+            index=models.Index(fields=['record_date', 'period'], name='emotiontrac_record__b4c29a_idx'),
+        ),
+    ]
@@ -9,7 +9,8 @@ class EmotionRecord(models.Model):
         (PERIOD_EVENING, '晚间'),
     )
     id = models.AutoField(primary_key=True)
-    user_id = models.UUIDField(verbose_name='用户', db_index=True)
+    # 单列索引由 unique_user_date_period 与 (user_id, -created_at, -id) 的前缀覆盖
+    user_id = models.UUIDField(verbose_name='用户')
     record_date = models.DateField(verbose_name='记录日期', default=timezone.now) 
     period = models.CharField(max_length=16, verbose_name='测评时间段', choices=PERIOD_CHOICES,null=True)
     depression = models.IntegerField(verbose_name='抑郁分数')
@@ -34,6 +35,50 @@ class EmotionRecord(models.Model):
                 name='unique_user_date_period'
             )
         ]
+        indexes = [
+            # /emotiontracker/list 游标分页：user_id 过滤 + (-created_at, -id) 排序
+            models.Index(fields=['user_id', '-created_at', '-id']),
+            # 提醒任务：按 (日期, 时段) 取当日已填写的用户
+            models.Index(fields=['record_date', 'period']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.record_date} ({self.period})"
+
+class EmotionDailyRollup(models.Model):
+    """
+    每日情绪汇总（用户 + 日期 一行）
+    与 EmotionRecord 在同一事务内维护，趋势接口只读本表，不再扫描原始记录
+    """
+    METRICS = ('depression', 'anxiety', 'energy', 'sleep')
+
+    id = models.AutoField(primary_key=True)
+    user_id = models.UUIDField(verbose_name='用户')
+    record_date = models.DateField(verbose_name='记录日期')
+    record_count = models.PositiveSmallIntegerField(default=0, verbose_name='记录数')
+    depression_sum = models.IntegerField(default=0, verbose_name='抑郁分数合计')
+    depression_min = models.IntegerField(null=True, blank=True, verbose_name='抑郁分数最小值')
+    depression_max = models.IntegerField(null=True, blank=True, verbose_name='抑郁分数最大值')
+    anxiety_sum = models.IntegerField(default=0, verbose_name='焦虑分数合计')
+    anxiety_min = models.IntegerField(null=True, blank=True, verbose_name='焦虑分数最小值')
+    anxiety_max = models.IntegerField(null=True, blank=True, verbose_name='焦虑分数最大值')
+    energy_sum = models.IntegerField(default=0, verbose_name='精力分数合计')
+    energy_min = models.IntegerField(null=True, blank=True, verbose_name='精力分数最小值')
+    energy_max = models.IntegerField(null=True, blank=True, verbose_name='精力分数最大值')
+    sleep_sum = models.IntegerField(default=0, verbose_name='睡眠分数合计')
+    sleep_min = models.IntegerField(null=True, blank=True, verbose_name='睡眠分数最小值')
+    sleep_max = models.IntegerField(null=True, blank=True, verbose_name='睡眠分数最大值')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '每日情绪汇总'
+        verbose_name_plural = '每日情绪汇总'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user_id', 'record_date'],
+                name='unique_rollup_user_date'
+            )
+        ]
 
     def __str__(self):
-        return f"{self.user_id} - {self.record_date} ({self.period})"
\ No newline at end of file
+        return f"{self.user_id} - {self.record_date} ({self.record_count})"
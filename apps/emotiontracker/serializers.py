@@ -1,6 +1,10 @@
+from datetime import datetime
+from django.conf import settings
 from ninja import Schema, Field
 from typing import List, Optional
 
+from config.pagination import CursorQuerySchema
+
 class EmotionRecordCreateSchema(Schema):
     depression: int = Field(ge=0, le=100)
     anxiety: int = Field(ge=0, le=100)
@@ -12,19 +16,44 @@ class EmotionRecordCreateSchema(Schema):
     moodSupplementTags: Optional[list] = None
     moodSupplementText: Optional[str] = None
 
+class EmotionListQuerySchema(CursorQuerySchema):
+    """/emotiontracker/list 分页参数：默认每页取分页前的 500 条上限"""
+    page_size: int = Field(default=settings.EMOTION_LIST_PAGE_SIZE, ge=1, le=settings.EMOTION_LIST_PAGE_SIZE)
+
+class EmotionRecordBatchItemSchema(EmotionRecordCreateSchema):
+    client_ts: datetime  # 客户端完成作答的时间，用于推算所属日期与时段
+    started_at: Optional[datetime] = None
+
+class EmotionRecordBatchSchema(Schema):
+    records: List[EmotionRecordBatchItemSchema] = Field(
+        min_length=1, max_length=settings.EMOTION_BATCH_MAX_ITEMS
+    )
+
+class EmotionRecordBatchResultSchema(Schema):
+    index: int  # 对应请求 records 中的下标
+    status: str  # saved / superseded / rejected
+    id: Optional[int] = None
+    record_date: Optional[str] = None
+    period: Optional[str] = None
+    error: Optional[str] = None
+
+class EmotionRecordBatchResponseSchema(Schema):
+    saved: int
+    results: List[EmotionRecordBatchResultSchema]
+
 class EmotionRecordResponseSchema(Schema):
     id: int
     depression: int
     anxiety: int
     energy: int
     sleep: int
-    mainMood: str = None
-    moodIntensity: int = None
-    mainMoodOther: str = None
-    moodSupplementTags: list = None
-    moodSupplementText: str = None
-    period: str = None
-    started_at: str = None
+    mainMood: Optional[str] = None
+    moodIntensity: Optional[int] = None
+    mainMoodOther: Optional[str] = None
+    moodSupplementTags: Optional[list] = None
+    moodSupplementText: Optional[str] = None
+    period: Optional[str] = None
+    started_at: str = ""
 
 class EmotionTrendSchema(Schema):
     dates: List[str]
@@ -0,0 +1,89 @@
+"""
+情绪记录相关的数据维护逻辑：每日汇总（EmotionDailyRollup）的重算与批量回填、
+离线补交记录的批量 upsert
+"""
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from .models import EmotionDailyRollup, EmotionRecord
+
+ROLLUP_UPDATE_FIELDS = ['record_count'] + [
+    f'{metric}_{agg}'
+    for metric in EmotionDailyRollup.METRICS
+    for agg in ('sum', 'min', 'max')
+]
+
+# 批量 upsert 冲突时覆盖的字段（与 create_emotion_record 的 defaults 一致，另含 started_at）
+RECORD_UPDATE_FIELDS = [
+    'depression', 'anxiety', 'energy', 'sleep',
+    'mainMood', 'moodIntensity', 'mainMoodOther',
+    'moodSupplementTags', 'moodSupplementText', 'started_at',
+]
+
+
+def _rollup_aggregates():
+    aggregates = {'record_count': Count('id')}
+    for metric in EmotionDailyRollup.METRICS:
+        aggregates[f'{metric}_sum'] = Sum(metric)
+        aggregates[f'{metric}_min'] = Min(metric)
+        aggregates[f'{metric}_max'] = Max(metric)
+    return aggregates
+
+
+def rebuild_rollups(records, batch_size=1000):
+    """
+    将给定记录集按 (user_id, record_date) 分组聚合，并以 upsert 方式写入汇总表
+    注意：records 必须覆盖所涉及日期的全部记录，否则汇总值只反映部分数据
+    返回写入的汇总行数
+    """
+    rows = (
+        records.order_by()
+        .values('user_id', 'record_date')
+        .annotate(**_rollup_aggregates())
+    )
+    rollups = [EmotionDailyRollup(**row) for row in rows]
+    if not rollups:
+        return 0
+    EmotionDailyRollup.objects.bulk_create(
+        rollups,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['user_id', 'record_date'],
+        update_fields=ROLLUP_UPDATE_FIELDS + ['updated_at'],
+    )
+    return len(rollups)
+
+
+def refresh_daily_rollup(user_id, record_date):
+    """
+    重算单个 (用户, 日期) 的汇总行
+    每天至多 morning/evening 两条原始记录，重算代价固定；
+    调用方应与 EmotionRecord 的写入处于同一事务，保证两表一致
+    """
+    day_records = EmotionRecord.objects.filter(user_id=user_id, record_date=record_date)
+    if rebuild_rollups(day_records) == 0:
+        # 当日记录已被删除，汇总行同步清理
+        EmotionDailyRollup.objects.filter(user_id=user_id, record_date=record_date).delete()
+
+
+def upsert_emotion_records(user_id, records):
+    """
+    以一条 INSERT ... ON CONFLICT (unique_user_date_period) 写入同一用户的多条记录，
+    并在同一事务内重算所涉及日期的汇总行
+    records 中 (record_date, period) 必须互不重复：同一语句内重复的冲突键
+    在 PostgreSQL 上会直接报错，调用方需先去重
+    写入后各记录的 pk 已回填（含冲突后被更新的已有行）
+    """
+    if not records:
+        return records
+    with transaction.atomic():
+        EmotionRecord.objects.bulk_create(
+            records,
+            update_conflicts=True,
+            unique_fields=['user_id', 'record_date', 'period'],
+            update_fields=RECORD_UPDATE_FIELDS,
+        )
+        rebuild_rollups(EmotionRecord.objects.filter(
+            user_id=user_id,
+            record_date__in={record.record_date for record in records},
+        ))
+    return records
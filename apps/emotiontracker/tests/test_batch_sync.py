@@ -0,0 +1,94 @@
+import json
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.emotiontracker.models import EmotionDailyRollup, EmotionRecord
+from config.jwt_auth_adapter import create_tokens_for_user
+
+User = get_user_model()
+
+
+def _local(day, hour):
+    return timezone.make_aware(datetime.combine(day, time(hour, 0)))
+
+
+def _item(client_ts, score=50, **extra):
+    item = {
+        "depression": score, "anxiety": score, "energy": score, "sleep": score,
+        "client_ts": client_ts.isoformat(),
+    }
+    item.update(extra)
+    return item
+
+
+class EmotionBatchSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="openid_batch", role="user")
+        token = create_tokens_for_user(self.user)["access"]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        self.yesterday = timezone.localdate() - timedelta(days=1)
+
+    def _post(self, records):
+        return self.client.post(
+            "/api/emotiontracker/batch", json.dumps({"records": records}),
+            content_type="application/json", secure=True, **self.auth
+        )
+
+    def test_resolves_periods_dedupes_and_rejects(self):
+        EmotionRecord.objects.create(
+            user_id=self.user.id, record_date=self.yesterday,
+            period=EmotionRecord.PERIOD_EVENING,
+            depression=1, anxiety=1, energy=1, sleep=1,
+        )
+        now = timezone.now()
+        resp = self._post([
+            _item(_local(self.yesterday, 9), score=10),
+            _item(_local(self.yesterday, 11), score=30),
+            _item(_local(self.yesterday, 20), score=70),
+            _item(now + timedelta(hours=1)),
+            _item(now - timedelta(days=30)),
+        ])
+        self.assertEqual(resp.status_code, 200)
+        body = resp.json()
+        statuses = [result["status"] for result in body["results"]]
+        self.assertEqual(statuses, ["superseded", "saved", "saved", "rejected", "rejected"])
+        self.assertEqual(body["saved"], 2)
+        self.assertEqual(body["results"][1]["period"], EmotionRecord.PERIOD_MORNING)
+        self.assertEqual(body["results"][2]["period"], EmotionRecord.PERIOD_EVENING)
+
+        records = EmotionRecord.objects.filter(user_id=self.user.id, record_date=self.yesterday)
+        self.assertEqual(records.count(), 2)
+        evening = records.get(period=EmotionRecord.PERIOD_EVENING)
+        self.assertEqual(evening.depression, 70)
+        self.assertEqual(body["results"][2]["id"], evening.id)
+
+        rollup = EmotionDailyRollup.objects.get(user_id=self.user.id, record_date=self.yesterday)
+        self.assertEqual(rollup.record_count, 2)
+        self.assertEqual(rollup.depression_sum, 100)
+
+    def test_today_updates_completion_flags(self):
+        now = timezone.localtime()
+        resp = self._post([_item(now - timedelta(minutes=1))])
+        self.assertEqual(resp.status_code, 200)
+        period = "morning" if now.time() < time(14, 0) else "evening"
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_completion_reset_date, now.date())
+        self.assertTrue(getattr(self.user, f"{period}_completed_today"))
+        self.assertIsNotNone(self.user.last_mood_tested_at)
+
+    def test_query_count_independent_of_batch_size(self):
+        def count_queries(days):
+            records = [
+                _item(_local(self.yesterday - timedelta(days=offset), hour))
+                for offset in days for hour in (9, 20)
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self._post(records).status_code, 200)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(count_queries(range(0, 1)), count_queries(range(1, 6)))
@@ -0,0 +1,54 @@
+import io
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from apps.emotiontracker.exports import EXPORT_HEADERS, write_emotion_records_xlsx
+from apps.emotiontracker.models import EmotionRecord
+
+User = get_user_model()
+
+
+class EmotionExportTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create(username="openid_a", real_name="张三", group="A组", role="user")
+        self.bob = User.objects.create(username="openid_b", role="user")
+        today = timezone.localdate()
+        for offset in range(5):
+            for user_id in (self.alice.id, self.bob.id, uuid.uuid4()):
+                EmotionRecord.objects.create(
+                    user_id=user_id, record_date=today - timedelta(days=offset),
+                    period=EmotionRecord.PERIOD_MORNING,
+                    depression=25, anxiety=3, energy=2, sleep=1,
+                    moodIntensity=2, moodSupplementTags=["工作", "睡眠"],
+                )
+
+    def _export(self):
+        output = io.BytesIO()
+        queryset = EmotionRecord.objects.order_by("user_id", "record_date", "period")
+        total = write_emotion_records_xlsx(queryset, output, chunk_size=4)
+        output.seek(0)
+        return total, list(load_workbook(output).active.iter_rows(values_only=True))
+
+    def test_rows_and_user_labels(self):
+        total, rows = self._export()
+        self.assertEqual(total, 15)
+        self.assertEqual(list(rows[0]), EXPORT_HEADERS)
+        self.assertEqual(len(rows), 16)
+        labels = {row[1] for row in rows[1:]}
+        self.assertEqual(labels, {"张三（A组）", "openid_b", "未知用户"})
+        first = rows[1]
+        self.assertEqual(first[0], 1)
+        self.assertEqual(first[3], "早")
+        self.assertEqual(first[11], 3)
+        self.assertEqual(first[16], "2")
+        self.assertEqual(first[17], "工作,睡眠")
+
+    def test_query_count_does_not_grow_with_rows(self):
+        # 用户批量查询 1 次 + 记录读取 1 次，与行数无关
+        with self.assertNumQueries(2):
+            self._export()
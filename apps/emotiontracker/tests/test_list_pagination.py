@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.emotiontracker.models import EmotionRecord
+from config.jwt_auth_adapter import create_tokens_for_user
+
+User = get_user_model()
+
+
+class EmotionListPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="openid_list", role="user")
+        token = create_tokens_for_user(self.user)["access"]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        today = timezone.now().date()
+        created_at = timezone.now()
+        for offset in range(7):
+            record = EmotionRecord.objects.create(
+                user_id=self.user.id, record_date=today - timedelta(days=offset),
+                period=EmotionRecord.PERIOD_MORNING,
+                depression=offset, anxiety=0, energy=0, sleep=0,
+            )
+            # 制造相同的 created_at，验证 id 作为并列排序键
+            EmotionRecord.objects.filter(id=record.id).update(
+                created_at=created_at - timedelta(hours=offset // 2)
+            )
+
+    def _get(self, **params):
+        return self.client.get(
+            "/api/emotiontracker/list", params, secure=True, **self.auth
+        )
+
+    def test_pages_cover_all_records_without_overlap(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {"page_size": 3}
+            if cursor:
+                params["cursor"] = cursor
+            resp = self._get(**params)
+            self.assertEqual(resp.status_code, 200)
+            page = resp.json()
+            self.assertLessEqual(len(page), 3)
+            seen.extend(item["id"] for item in page)
+            cursor = resp.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        expected = list(
+            EmotionRecord.objects.filter(user_id=self.user.id)
+            .order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_started_at_and_nullable_fields_serialize(self):
+        item = self._get(page_size=1).json()[0]
+        self.assertEqual(item["started_at"], "")
+        self.assertIsNone(item["mainMood"])
+
+    def test_default_page_keeps_legacy_cap(self):
+        # 未传 page_size 的旧客户端一次拿到全部（不超过 500 条）记录，无下一页
+        resp = self._get()
+        self.assertEqual(len(resp.json()), 7)
+        self.assertNotIn("X-Next-Cursor", resp.headers)
+        self.assertEqual(self._get(page_size=500).status_code, 200)
+        self.assertEqual(self._get(page_size=501).status_code, 422)
+
+    def test_invalid_cursor_rejected(self):
+        self.assertEqual(self._get(cursor="not-a-cursor").status_code, 400)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.emotiontracker.models import EmotionDailyRollup, EmotionRecord
+from config.jwt_auth_adapter import create_tokens_for_user
+
+User = get_user_model()
+
+
+class EmotionTrendRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="openid_trend", role="user")
+        token = create_tokens_for_user(self.user)["access"]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        self.today = timezone.now().date()
+
+    def _submit(self, period, **scores):
+        payload = {
+            "depression": 10, "anxiety": 2, "energy": 1, "sleep": 1,
+            "mainMood": "平静/放松", "moodIntensity": 1, "mainMoodOther": "",
+            "moodSupplementTags": [], "moodSupplementText": "", **scores,
+        }
+        with patch(
+            "apps.emotiontracker.views.get_current_period_info",
+            return_value=(self.today, period),
+        ):
+            resp = self.client.post(
+                "/api/emotiontracker/", data=payload,
+                content_type="application/json", secure=True, **self.auth,
+            )
+        self.assertEqual(resp.status_code, 200)
+
+    def test_submit_maintains_rollup_including_overwrite(self):
+        self._submit(EmotionRecord.PERIOD_MORNING, depression=10)
+        self._submit(EmotionRecord.PERIOD_EVENING, depression=21)
+        # 同一时段重复提交会覆盖原记录，汇总也应随之修正
+        self._submit(EmotionRecord.PERIOD_EVENING, depression=31)
+
+        rollup = EmotionDailyRollup.objects.get(user_id=self.user.id, record_date=self.today)
+        self.assertEqual(rollup.record_count, 2)
+        self.assertEqual(rollup.depression_sum, 41)
+        self.assertEqual(rollup.depression_min, 10)
+        self.assertEqual(rollup.depression_max, 31)
+
+    def test_trend_reads_rollups_with_constant_queries(self):
+        self._submit(EmotionRecord.PERIOD_MORNING, depression=10, sleep=1)
+        self._submit(EmotionRecord.PERIOD_EVENING, depression=21, sleep=2)
+
+        # JWT 用户查询 + 汇总表查询，与窗口天数无关
+        with self.assertNumQueries(2):
+            resp = self.client.get(
+                "/api/emotiontracker/trend?days=365", secure=True, **self.auth
+            )
+        body = resp.json()
+        self.assertEqual(len(body["dates"]), 365)
+        self.assertEqual(body["dates"][-1], self.today.isoformat())
+        self.assertEqual(body["depression"][-1], round(31 / 2))
+        self.assertEqual(body["sleep"][-1], round(3 / 2))
+        self.assertEqual(body["depression"][0], 0)
+
+    def test_rebuild_command_restores_rollups(self):
+        yesterday = self.today - timedelta(days=1)
+        EmotionRecord.objects.create(
+            user_id=self.user.id, record_date=yesterday, period=EmotionRecord.PERIOD_MORNING,
+            depression=8, anxiety=1, energy=0, sleep=2,
+        )
+        EmotionDailyRollup.objects.create(
+            user_id=self.user.id, record_date=self.today - timedelta(days=5), record_count=1,
+        )
+
+        call_command("rebuild_emotion_rollups", stdout=StringIO())
+
+        rollups = EmotionDailyRollup.objects.filter(user_id=self.user.id)
+        self.assertEqual(list(rollups.values_list("record_date", flat=True)), [yesterday])
+        self.assertEqual(rollups.get().depression_sum, 8)
@@ -1,21 +1,30 @@
 from ninja import Router, Query
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.http import HttpResponse
 from django.utils import timezone
 from datetime import time, timedelta
-from .models import EmotionRecord
+from .models import EmotionRecord, EmotionDailyRollup
+from .services import refresh_daily_rollup, upsert_emotion_records
 from .serializers import (
-    EmotionRecordCreateSchema, EmotionRecordResponseSchema, EmotionTrendSchema
+    EmotionRecordCreateSchema, EmotionRecordResponseSchema, EmotionTrendSchema,
+    EmotionRecordBatchSchema, EmotionRecordBatchResponseSchema, EmotionListQuerySchema,
 )
 from config.jwt_auth_adapter import jwt_auth
+from config.pagination import NEXT_CURSOR_HEADER, keyset_page
 
 emotion_router = Router(tags=["emotiontracker"])
 
 # 辅助函数：判断当前时段
-def get_current_period_info():
+def get_current_period_info(moment=None):
     """
     返回 (current_date, period_string)
     逻辑：14:00 之前算 morning，之后算 evening
+    moment 缺省为服务器当前时间；离线补交时传入客户端作答时间
     """
-    now = timezone.localtime()
+    now = timezone.localtime(moment)
     today = now.date()
     # 14点为分界线
     if now.time() < time(14, 0):
@@ -48,12 +57,15 @@ def create_emotion_record(request, data: EmotionRecordCreateSchema):
     # 查找条件：user_id + record_date + period
     # 如果找到 -> 更新 defaults_data 中的字段
     # 如果没找到 -> 创建新记录
-    record, created = EmotionRecord.objects.update_or_create(
-        user_id=current_user.id,
-        record_date=record_date,
-        period=period,
-        defaults=defaults_data
-    )
+    # 每日汇总与原始记录在同一事务内维护，趋势接口据此读取
+    with transaction.atomic():
+        record, created = EmotionRecord.objects.update_or_create(
+            user_id=current_user.id,
+            record_date=record_date,
+            period=period,
+            defaults=defaults_data
+        )
+        refresh_daily_rollup(current_user.id, record_date)
 
     # 更新用户上次测试时间和完成情况
     import logging
@@ -95,28 +107,117 @@ def create_emotion_record(request, data: EmotionRecordCreateSchema):
     }
     return result
 
+@emotion_router.post("/batch", response=EmotionRecordBatchResponseSchema, auth=jwt_auth)
+def batch_create_emotion_records(request, data: EmotionRecordBatchSchema):
+    """
+    离线补交：一次提交客户端排队的多条情绪记录
+    每条按自身 client_ts 推算日期和时段（规则同 get_current_period_info），
+    同一时段出现多条时以 client_ts 最新者为准，其余标记为 superseded；
+    全部记录以一条 INSERT ... ON CONFLICT 写入，用户完成状态合并为一次更新
+    """
+    from apps.users.models import User
+    current_user = request.auth
+    now = timezone.now()
+    earliest = now - timedelta(days=settings.EMOTION_BATCH_MAX_AGE_DAYS)
+    latest = now + timedelta(seconds=settings.EMOTION_BATCH_CLOCK_SKEW_SECONDS)
+
+    results = []
+    accepted = {}  # (record_date, period) -> (client_ts, index)
+    for index, item in enumerate(data.records):
+        client_ts = item.client_ts
+        if timezone.is_naive(client_ts):
+            client_ts = timezone.make_aware(client_ts)
+        result = {"index": index}
+        results.append(result)
+        if client_ts > latest:
+            result.update(status="rejected", error="作答时间晚于服务器时间")
+            continue
+        if client_ts < earliest:
+            result.update(
+                status="rejected",
+                error=f"超过 {settings.EMOTION_BATCH_MAX_AGE_DAYS} 天的记录不再接受补交",
+            )
+            continue
+        record_date, period = get_current_period_info(client_ts)
+        result.update(record_date=record_date.isoformat(), period=period)
+        key = (record_date, period)
+        previous = accepted.get(key)
+        if previous and previous[0] > client_ts:
+            result["status"] = "superseded"
+            continue
+        if previous:
+            results[previous[1]]["status"] = "superseded"
+        result["status"] = "saved"
+        accepted[key] = (client_ts, index)
+
+    records = []
+    for (record_date, period), (client_ts, index) in accepted.items():
+        item = data.records[index]
+        records.append(EmotionRecord(
+            user_id=current_user.id,
+            record_date=record_date,
+            period=period,
+            depression=item.depression,
+            anxiety=item.anxiety,
+            energy=item.energy,
+            sleep=item.sleep,
+            mainMood=item.mainMood,
+            moodIntensity=item.moodIntensity,
+            mainMoodOther=item.mainMoodOther,
+            moodSupplementTags=item.moodSupplementTags,
+            moodSupplementText=item.moodSupplementText,
+            started_at=item.started_at,
+        ))
+    upsert_emotion_records(current_user.id, records)
+    for record, (client_ts, index) in zip(records, accepted.values()):
+        results[index]["id"] = record.id
+
+    if accepted:
+        import logging
+        _logger = logging.getLogger("emotiontracker.views")
+        try:
+            # 合并为一次更新：上次测试时间只前移不回退，今日时段的完成状态一并置位
+            newest = Value(max(client_ts for client_ts, _ in accepted.values()))
+            update_data = {
+                'last_mood_tested_at': Greatest(Coalesce(F('last_mood_tested_at'), newest), newest),
+            }
+            today = timezone.localtime(now).date()
+            for record_date, period in accepted:
+                if record_date != today:
+                    continue
+                update_data['last_completion_reset_date'] = today
+                if period == EmotionRecord.PERIOD_MORNING:
+                    update_data['morning_completed_today'] = True
+                elif period == EmotionRecord.PERIOD_EVENING:
+                    update_data['evening_completed_today'] = True
+            User.objects.filter(id=current_user.id).update(**update_data)
+        except Exception as exc:
+            _logger.error("更新用户情绪完成状态失败: user_id=%s, err=%s", current_user.id, exc, exc_info=True)
+
+    return {"saved": len(records), "results": results}
+
 # 如需新增批量/列表API，务必保证 started_at 字段序列化为字符串（空字符串而非 None）
 @emotion_router.get("/list", response=list[EmotionRecordResponseSchema], auth=jwt_auth)
-def list_emotion_records(request):
+def list_emotion_records(request, response: HttpResponse, filters: EmotionListQuerySchema = Query(...)):
+    """
+    获取当前用户的情绪记录（按创建时间倒序，游标分页）
+    不传 page_size 时与分页前一致返回最近 500 条；
+    还有下一页时通过响应头 X-Next-Cursor 返回游标，回传 cursor 参数即可继续翻页
+    """
     current_user = request.auth
-    queryset = EmotionRecord.objects.filter(user_id=current_user.id).order_by("-created_at")[:500]
-    result = []
-    for record in queryset:
-        result.append({
-            "id": record.id,
-            "depression": record.depression,
-            "anxiety": record.anxiety,
-            "energy": record.energy,
-            "sleep": record.sleep,
-            "mainMood": record.mainMood,
-            "moodIntensity": record.moodIntensity,
-            "mainMoodOther": record.mainMoodOther,
-            "moodSupplementTags": record.moodSupplementTags,
-            "moodSupplementText": record.moodSupplementText,
-            "period": record.period,
-            "started_at": record.started_at.isoformat() if record.started_at else "",
-        })
-    return result
+    queryset = EmotionRecord.objects.filter(user_id=current_user.id).values(
+        "id", "depression", "anxiety", "energy", "sleep",
+        "mainMood", "moodIntensity", "mainMoodOther",
+        "moodSupplementTags", "moodSupplementText",
+        "period", "started_at", "created_at",
+    )
+    rows, next_cursor = keyset_page(queryset, filters.cursor, filters.page_size)
+    if next_cursor:
+        response[NEXT_CURSOR_HEADER] = next_cursor
+    for row in rows:
+        del row["created_at"]
+        row["started_at"] = row["started_at"].isoformat() if row["started_at"] else ""
+    return rows
 
 @emotion_router.get("/trend", response=EmotionTrendSchema, auth=jwt_auth)
 def get_emotion_trend(request, days: int = Query(30, ge=1, le=365)):
@@ -133,28 +234,16 @@ def get_emotion_trend(request, days: int = Query(30, ge=1, le=365)):
     end_date = timezone.now().date()
     start_date = end_date - timedelta(days=days - 1)
     
-    # 查询指定范围内的所有记录
-    records = EmotionRecord.objects.filter(
-        user_id=current_user.id,
-        record_date__range=[start_date, end_date]
-    ).order_by('record_date', 'period')
-    
-    # 按日期分组，计算每日平均值
-    daily_data = {}
-    for record in records:
-        date_str = record.record_date.strftime('%Y-%m-%d')
-        if date_str not in daily_data:
-            daily_data[date_str] = {
-                'depression': [],
-                'anxiety': [],
-                'energy': [],
-                'sleep': []
-            }
-        
-        daily_data[date_str]['depression'].append(record.depression)
-        daily_data[date_str]['anxiety'].append(record.anxiety)
-        daily_data[date_str]['energy'].append(record.energy)
-        daily_data[date_str]['sleep'].append(record.sleep)
+    # 读取每日汇总（每天至多一行），不再扫描原始记录
+    sum_fields = [f'{metric}_sum' for metric in EmotionDailyRollup.METRICS]
+    daily_data = {
+        row[0]: [round(total / row[1]) for total in row[2:]]
+        for row in EmotionDailyRollup.objects.filter(
+            user_id=current_user.id,
+            record_date__range=[start_date, end_date],
+            record_count__gt=0,
+        ).values_list('record_date', 'record_count', *sum_fields)
+    }
     
     # 构建趋势数据
     dates = []
@@ -163,25 +252,16 @@ def get_emotion_trend(request, days: int = Query(30, ge=1, le=365)):
     energy = []
     sleep = []
     
-    # 按日期顺序处理
+    # 按日期顺序处理，没有数据的日期用0填充（平均值四舍五入到整数）
+    empty = [0, 0, 0, 0]
     current_date = start_date
     while current_date <= end_date:
-        date_str = current_date.strftime('%Y-%m-%d')
-        dates.append(date_str)
-        
-        if date_str in daily_data:
-            # 计算平均值（四舍五入到整数）
-            depression.append(round(sum(daily_data[date_str]['depression']) / len(daily_data[date_str]['depression'])))
-            anxiety.append(round(sum(daily_data[date_str]['anxiety']) / len(daily_data[date_str]['anxiety'])))
-            energy.append(round(sum(daily_data[date_str]['energy']) / len(daily_data[date_str]['energy'])))
-            sleep.append(round(sum(daily_data[date_str]['sleep']) / len(daily_data[date_str]['sleep'])))
-        else:
-            # 没有数据的日期用0填充
-            depression.append(0)
-            anxiety.append(0)
-            energy.append(0)
-            sleep.append(0)
-        
+        dates.append(current_date.strftime('%Y-%m-%d'))
+        day_depression, day_anxiety, day_energy, day_sleep = daily_data.get(current_date, empty)
+        depression.append(day_depression)
+        anxiety.append(day_anxiety)
+        energy.append(day_energy)
+        sleep.append(day_sleep)
         current_date += timedelta(days=1)
     
     return {
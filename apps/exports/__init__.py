@@ -0,0 +1 @@
+# 后台导出任务模块
@@ -0,0 +1,105 @@
+"""导出任务的 admin 配置"""
+from pathlib import Path
+from django.conf import settings
+from django.contrib import admin, messages
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import ExportJob
+from .registry import EXPORTERS
+from .services import enqueue_export
+
+
+def queue_export(modeladmin, request, kind, queryset):
+    """供各 admin action 调用：登记导出任务并提示到导出任务列表查看进度"""
+    try:
+        job = enqueue_export(kind, queryset, request)
+    except ValueError as exc:
+        modeladmin.message_user(request, str(exc), level=messages.ERROR)
+        return None
+    modeladmin.message_user(
+        request,
+        format_html(
+            '导出任务 #{} 已提交，完成后可在 <a href="{}">导出任务</a> 中下载',
+            job.id, reverse('admin:exports_exportjob_changelist'),
+        ),
+        level=messages.SUCCESS,
+    )
+    return job
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    """导出任务列表：查看进度并下载文件"""
+
+    list_display = [
+        'id', 'kind_display', 'status', 'progress_display', 'created_by',
+        'created_at', 'finished_at', 'expires_at', 'download_link',
+    ]
+    list_filter = ['status', 'kind']
+    readonly_fields = [
+        'kind', 'status', 'total_rows', 'processed_rows', 'file', 'error',
+        'created_by', 'created_at', 'started_at', 'updated_at', 'finished_at', 'expires_at',
+    ]
+
+    def get_queryset(self, request):
+        """非超级管理员只能看到自己提交的任务"""
+        queryset = super().get_queryset(request).select_related('created_by')
+        if request.user.is_superuser:
+            return queryset
+        return queryset.filter(created_by=request.user)
+
+    def has_add_permission(self, request):
+        """导出任务只能通过各列表页的导出操作创建"""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        urls = [
+            path(
+                '<int:job_id>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='exports_exportjob_download',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def download_view(self, request, job_id):
+        """鉴权下载：/media/ 对外公开，这里额外校验查看权限与任务归属"""
+        if not self.has_view_permission(request):
+            raise Http404
+        job = get_object_or_404(self.get_queryset(request), id=job_id)
+        if job.status != ExportJob.STATUS_SUCCESS or not job.file:
+            raise Http404
+        file_path = Path(settings.MEDIA_ROOT) / job.file.name
+        if not file_path.exists():
+            raise Http404
+        return FileResponse(open(file_path, 'rb'), as_attachment=True, filename=file_path.name)
+
+    def kind_display(self, obj):
+        exporter = EXPORTERS.get(obj.kind)
+        return exporter['label'] if exporter else obj.kind
+
+    kind_display.short_description = '导出类型'
+
+    def progress_display(self, obj):
+        """进度：已导出行数 / 总行数"""
+        if obj.total_rows:
+            percent = min(100, obj.processed_rows * 100 // obj.total_rows)
+            return f"{obj.processed_rows}/{obj.total_rows}（{percent}%）"
+        return f"{obj.processed_rows}"
+
+    progress_display.short_description = '进度'
+
+    def download_link(self, obj):
+        if obj.status == ExportJob.STATUS_SUCCESS and obj.file:
+            return format_html(
+                '<a href="{}">下载</a>',
+                reverse('admin:exports_exportjob_download', args=[obj.id]),
+            )
+        return '-'
+
+    download_link.short_description = '文件'
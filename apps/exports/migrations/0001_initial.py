@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=32, verbose_name='导出类型')),
+                ('status', models.CharField(choices=[('pending', '等待执行'), ('running', '正在导出'), ('success', '导出完成'), ('failed', '导出失败'), ('expired', '文件已过期')], default='pending', max_length=16, verbose_name='状态')),
+                ('query', models.BinaryField(verbose_name='查询条件')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='总行数')),
+                ('processed_rows', models.PositiveIntegerField(default=0, verbose_name='已导出行数')),
+                ('file', models.FileField(blank=True, upload_to='exports/', verbose_name='导出文件')),
+                ('error', models.TextField(blank=True, default='', verbose_name='错误信息')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='提交时间')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='文件过期时间')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='提交人')),
+            ],
+            options={
+                'verbose_name': '导出任务',
+                'verbose_name_plural': '导出任务',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='exports_exp_status_852a1c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:29
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fail_unfinished_jobs(apps, schema_editor):
+    """旧任务只保存了 pickle 查询，无法转换为导出范围；未完成的一律标记为失败，由提交人重新导出"""
+    ExportJob = apps.get_model('exports', 'ExportJob')
+    ExportJob.objects.filter(status__in=('pending', 'running')).update(
+        status='failed', error='升级后导出任务格式变更，请重新导出', finished_at=django.utils.timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exports', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_unfinished_jobs, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='exportjob',
+            name='query',
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='spec',
+            field=models.JSONField(default=dict, editable=False, verbose_name='导出范围'),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='最后更新'),
+        ),
+        migrations.AddIndex(
+            model_name='exportjob',
+            index=models.Index(fields=['status', 'updated_at'], name='exports_exp_status_70a1a3_idx'),
+        ),
+    ]
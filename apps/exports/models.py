@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class ExportJob(models.Model):
+    """
+    后台导出任务：admin action 只负责登记任务，由 exports 队列的 Celery worker 生成文件
+    文件写入 MEDIA_ROOT/exports/<随机目录>/，过期后由定时任务清理
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_FAILED = 'failed'
+    STATUS_EXPIRED = 'expired'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, '等待执行'),
+        (STATUS_RUNNING, '正在导出'),
+        (STATUS_SUCCESS, '导出完成'),
+        (STATUS_FAILED, '导出失败'),
+        (STATUS_EXPIRED, '文件已过期'),
+    )
+
+    id = models.AutoField(primary_key=True)
+    kind = models.CharField('导出类型', max_length=32)
+    status = models.CharField('状态', max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # 提交时的导出范围：{"params": {列表页筛选参数}, "ordering": [排序字段...], "pks": [手动勾选的主键...]}，
+    # worker 据此重建查询集；“全选所有”时不登记 pks
+    # 只存数据不存查询对象，跨版本部署时排队中的任务仍可执行
+    spec = models.JSONField('导出范围', default=dict, editable=False)
+    total_rows = models.PositiveIntegerField('总行数', default=0)
+    processed_rows = models.PositiveIntegerField('已导出行数', default=0)
+    file = models.FileField('导出文件', upload_to='exports/', blank=True)
+    error = models.TextField('错误信息', blank=True, default='')
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='export_jobs',
+        verbose_name='提交人',
+    )
+    created_at = models.DateTimeField('提交时间', auto_now_add=True)
+    started_at = models.DateTimeField('开始时间', null=True, blank=True)
+    finished_at = models.DateTimeField('完成时间', null=True, blank=True)
+    # 每次进度上报时刷新，running 任务长时间未刷新视为 worker 已丢失
+    updated_at = models.DateTimeField('最后更新', default=timezone.now)
+    expires_at = models.DateTimeField('文件过期时间', null=True, blank=True)
+
+    class Meta:
+        verbose_name = '导出任务'
+        verbose_name_plural = '导出任务'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} ({self.status})"
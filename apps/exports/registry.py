@@ -0,0 +1,17 @@
+"""
+导出类型注册表：kind -> 名称与写出函数
+写出函数签名为 writer(queryset, fileobj, chunk_size=..., on_progress=...)，返回写入行数
+model 为 "app_label.ModelName"，worker 据此找到对应的 ModelAdmin，按登记的筛选参数重建查询集
+新增导出类型时在此登记，并在对应 admin action 中调用 queue_export(...)
+"""
+from apps.emotiontracker.exports import write_emotion_records_xlsx
+from apps.users.exports import write_users_xlsx
+
+EXPORTERS = {
+    'emotion_records': {
+        'label': '情绪记录', 'model': 'emotiontracker.EmotionRecord', 'writer': write_emotion_records_xlsx,
+    },
+    'users': {'label': '用户信息', 'model': 'users.User', 'writer': write_users_xlsx},
+}
+
+KIND_CHOICES = [(kind, exporter['label']) for kind, exporter in EXPORTERS.items()]
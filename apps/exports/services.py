@@ -0,0 +1,182 @@
+"""
+导出任务的登记、执行与过期清理
+"""
+import logging
+import shutil
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from .models import ExportJob
+from .registry import EXPORTERS
+
+logger = logging.getLogger("exports.services")
+
+STALE_ERROR = '导出进程中断（worker 丢失或重启），请重新导出'
+
+
+def export_spec(request, queryset):
+    """
+    导出范围：列表页的筛选参数（过滤、搜索）与排序字段，均为可 JSON 序列化的数据，不在 admin 请求中读取记录；
+    未勾选“全选所有”时另登记手动勾选的主键，数量不超过 EXPORT_MAX_SELECTED_PKS
+    """
+    spec = {
+        'params': {name: request.GET.getlist(name) for name in request.GET},
+        'ordering': [field for field in queryset.query.order_by if isinstance(field, str)],
+    }
+    if request.POST.get('select_across') != '1':
+        pks = request.POST.getlist(ACTION_CHECKBOX_NAME)
+        if len(pks) > settings.EXPORT_MAX_SELECTED_PKS:
+            raise ValueError(f"手动勾选的记录超过 {settings.EXPORT_MAX_SELECTED_PKS} 条，请使用“全选所有”按筛选条件导出")
+        spec['pks'] = pks
+    return spec
+
+
+def build_queryset(job):
+    """
+    按导出范围重建查询集：以提交人身份重放列表页的筛选参数，
+    与 admin 列表页使用同一套过滤、搜索与权限限制，手动勾选时再按主键收窄
+    """
+    model = apps.get_model(EXPORTERS[job.kind]['model'])
+    if job.created_by is None:
+        raise ValueError("提交人已不存在，无法还原导出范围")
+    request = HttpRequest()
+    request.method = 'GET'
+    request.GET = QueryDict(mutable=True)
+    for name, values in job.spec.get('params', {}).items():
+        request.GET.setlist(name, values)
+    request.user = job.created_by
+    model_admin = admin.site.get_model_admin(model)
+    queryset = model_admin.get_changelist_instance(request).get_queryset(request)
+    if 'pks' in job.spec:
+        queryset = queryset.filter(pk__in=job.spec['pks'])
+    return queryset.order_by(*job.spec.get('ordering', []))
+
+
+def enqueue_export(kind, queryset, request):
+    """
+    登记导出任务并在事务提交后投递到 exports 队列，返回 ExportJob
+    admin 请求只登记筛选条件（手动勾选时为少量主键），查询与明细读取均由 worker 完成
+    """
+    from .tasks import run_export_job
+
+    if kind not in EXPORTERS:
+        raise ValueError(f"未注册的导出类型: {kind}")
+    if queryset.model is not apps.get_model(EXPORTERS[kind]['model']):
+        raise ValueError(f"导出类型 {kind} 与查询集模型 {queryset.model.__name__} 不匹配")
+    user = request.user
+    job = ExportJob.objects.create(
+        kind=kind,
+        spec=export_spec(request, queryset),
+        created_by=user if user and user.is_authenticated else None,
+    )
+    transaction.on_commit(lambda: run_export_job.delay(job.id))
+    return job
+
+
+def run_export(job_id):
+    """
+    执行导出：重建查询集，分块写入 MEDIA_ROOT 下的临时文件，完成后改名并登记过期时间
+    同一任务被重复投递时，只有把状态从 pending 改为 running 的那次会真正执行
+    """
+    now = timezone.now()
+    claimed = ExportJob.objects.filter(id=job_id, status=ExportJob.STATUS_PENDING).update(
+        status=ExportJob.STATUS_RUNNING, started_at=now, updated_at=now,
+    )
+    if not claimed:
+        logger.info("导出任务已被处理或不存在，跳过: job_id=%s", job_id)
+        return
+    job = ExportJob.objects.get(id=job_id)
+    exporter = EXPORTERS[job.kind]
+
+    # 随机目录名：/media/ 由 nginx 直接对外提供，文件名不可被猜测，下载仍走 admin 鉴权视图
+    relative_dir = Path('exports') / uuid.uuid4().hex
+    filename = f"{exporter['label']}_{timezone.localtime().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    target_dir = Path(settings.MEDIA_ROOT) / relative_dir
+    target = target_dir / filename
+    partial = target.with_name(filename + '.part')
+    # 先登记目标路径，worker 中途丢失时清理任务据此删除残留的临时文件
+    ExportJob.objects.filter(id=job_id).update(file=str(relative_dir / filename))
+
+    def report_progress(rows):
+        ExportJob.objects.filter(id=job_id).update(processed_rows=rows, updated_at=timezone.now())
+
+    try:
+        queryset = build_queryset(job)
+        total = queryset.count()
+        ExportJob.objects.filter(id=job_id).update(total_rows=total)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        with open(partial, 'wb') as output:
+            rows = exporter['writer'](
+                queryset, output,
+                chunk_size=settings.EXPORT_CHUNK_SIZE,
+                on_progress=report_progress,
+            )
+        partial.rename(target)
+    except Exception as exc:
+        logger.exception("导出任务失败: job_id=%s", job_id)
+        shutil.rmtree(target_dir, ignore_errors=True)
+        ExportJob.objects.filter(id=job_id).update(
+            status=ExportJob.STATUS_FAILED, error=str(exc), file='',
+            finished_at=timezone.now(), updated_at=timezone.now(),
+        )
+        return
+
+    finished_at = timezone.now()
+    ExportJob.objects.filter(id=job_id).update(
+        status=ExportJob.STATUS_SUCCESS,
+        processed_rows=rows,
+        total_rows=max(total, rows),
+        finished_at=finished_at,
+        updated_at=finished_at,
+        expires_at=finished_at + timedelta(hours=settings.EXPORT_FILE_TTL_HOURS),
+    )
+    logger.info("导出任务完成: job_id=%s, kind=%s, rows=%s", job_id, job.kind, rows)
+
+
+def _remove_job_dir(file_name):
+    """删除任务文件所在目录；只删除 run_export 生成的 exports/<随机目录>，防止异常路径误删 MEDIA_ROOT 其他内容"""
+    job_dir = Path(file_name).parent
+    if file_name and job_dir.parent == Path('exports'):
+        shutil.rmtree(Path(settings.MEDIA_ROOT) / job_dir, ignore_errors=True)
+
+
+def fail_stale_exports(now=None):
+    """
+    running 超过 EXPORT_STALE_MINUTES 未上报进度的任务视为 worker 已丢失：
+    删除残留文件并标记为失败，提交人可重新导出；返回处理的任务数
+    """
+    now = now or timezone.now()
+    stale = ExportJob.objects.filter(
+        status=ExportJob.STATUS_RUNNING,
+        updated_at__lte=now - timedelta(minutes=settings.EXPORT_STALE_MINUTES),
+    )
+    failed = 0
+    for job_id, file_name in stale.values_list('id', 'file'):
+        _remove_job_dir(file_name)
+        failed += ExportJob.objects.filter(id=job_id, status=ExportJob.STATUS_RUNNING).update(
+            status=ExportJob.STATUS_FAILED, error=STALE_ERROR, file='', finished_at=now, updated_at=now,
+        )
+    if failed:
+        logger.warning("已将 %s 个中断的导出任务标记为失败", failed)
+    return failed
+
+
+def purge_expired_exports(now=None):
+    """删除已过期的导出文件并将任务标记为 expired，同时回收中断的导出任务，返回清理的过期任务数"""
+    now = now or timezone.now()
+    fail_stale_exports(now)
+    expired = ExportJob.objects.filter(status=ExportJob.STATUS_SUCCESS, expires_at__lte=now)
+    purged = 0
+    for job_id, file_name in expired.values_list('id', 'file'):
+        _remove_job_dir(file_name)
+        purged += ExportJob.objects.filter(id=job_id, status=ExportJob.STATUS_SUCCESS).update(
+            status=ExportJob.STATUS_EXPIRED, file='', updated_at=now,
+        )
+    return purged
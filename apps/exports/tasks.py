@@ -0,0 +1,22 @@
+"""
+导出相关 Celery 任务，统一路由到 exports 队列，避免长时间导出阻塞 notice 队列的提醒任务
+"""
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from .services import purge_expired_exports, run_export
+
+logger = get_task_logger(__name__)
+
+
+@shared_task
+def run_export_job(job_id):
+    """执行单个导出任务"""
+    run_export(job_id)
+
+
+@shared_task
+def purge_expired_export_files():
+    """定时清理过期导出文件"""
+    purged = purge_expired_exports()
+    logger.info("已清理过期导出文件: %s 个任务", purged)
+    return purged
@@ -0,0 +1,129 @@
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from apps.emotiontracker.models import EmotionRecord
+from apps.exports.models import ExportJob
+from apps.exports.services import STALE_ERROR, purge_expired_exports
+
+User = get_user_model()
+
+
+class ExportJobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, EXPORT_CHUNK_SIZE=2)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.admin = User.objects.create_superuser(username="admin_export", password="x" * 12)
+        self.client.force_login(self.admin)
+        member = User.objects.create(username="openid_export", real_name="李四", role="user")
+        today = timezone.localdate()
+        for offset in range(5):
+            EmotionRecord.objects.create(
+                user_id=member.id, record_date=today - timedelta(days=offset),
+                period=EmotionRecord.PERIOD_EVENING,
+                depression=10, anxiety=2, energy=1, sleep=3,
+            )
+
+    def _run_action(self, url, action, ids):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                url, {"action": action, "_selected_action": ids}, secure=True
+            )
+        self.assertEqual(response.status_code, 302)
+        return ExportJob.objects.get()
+
+    def test_emotion_export_job_writes_file_and_downloads(self):
+        ids = list(EmotionRecord.objects.values_list("id", flat=True)[:3])
+        job = self._run_action(
+            reverse("admin:emotiontracker_emotionrecord_changelist"), "export_emotion_records", ids
+        )
+        self.assertEqual(job.status, ExportJob.STATUS_SUCCESS)
+        self.assertEqual((job.processed_rows, job.total_rows), (3, 3))
+        self.assertTrue(job.file.name.startswith("exports/"))
+        self.assertIsNotNone(job.expires_at)
+
+        response = self.client.get(
+            reverse("admin:exports_exportjob_download", args=[job.id]), secure=True
+        )
+        self.assertEqual(response.status_code, 200)
+        rows = list(load_workbook(io.BytesIO(b"".join(response.streaming_content))).active.values)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][1], "李四")
+
+    def test_user_export_and_purge(self):
+        job = self._run_action(
+            reverse("admin:users_user_changelist"), "export_selected",
+            [str(pk) for pk in User.objects.values_list("id", flat=True)],
+        )
+        self.assertEqual(job.status, ExportJob.STATUS_SUCCESS)
+        self.assertEqual(job.processed_rows, 2)
+        file_path = Path(self.media_root) / job.file.name
+        self.assertTrue(file_path.exists())
+
+        self.assertEqual(purge_expired_exports(now=job.expires_at + timedelta(seconds=1)), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.STATUS_EXPIRED)
+        self.assertFalse(file_path.parent.exists())
+        response = self.client.get(
+            reverse("admin:exports_exportjob_download", args=[job.id]), secure=True
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_hand_picked_selection_stores_capped_pks(self):
+        ids = list(EmotionRecord.objects.order_by("id").values_list("id", flat=True)[:2])
+        url = reverse("admin:emotiontracker_emotionrecord_changelist")
+        with self.captureOnCommitCallbacks(execute=False):
+            self.client.post(url, {"action": "export_emotion_records", "_selected_action": ids}, secure=True)
+        job = ExportJob.objects.get()
+        self.assertEqual(job.spec["pks"], [str(pk) for pk in ids])
+        self.assertEqual(job.spec["ordering"], ["user_id", "record_date", "period"])
+
+        with override_settings(EXPORT_MAX_SELECTED_PKS=1):
+            self.client.post(url, {"action": "export_emotion_records", "_selected_action": ids}, secure=True)
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+    def test_select_across_stores_filters_and_worker_replays_them(self):
+        morning = EmotionRecord.objects.order_by("id").first()
+        EmotionRecord.objects.filter(id=morning.id).update(period=EmotionRecord.PERIOD_MORNING)
+        url = reverse("admin:emotiontracker_emotionrecord_changelist") + "?period=evening"
+        # “全选所有”时 admin 请求只登记筛选参数，不读取主键
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {
+                "action": "export_emotion_records", "select_across": "1", "_selected_action": [morning.id + 1],
+            }, secure=True)
+        job = ExportJob.objects.get()
+        self.assertEqual(job.spec, {
+            "params": {"period": ["evening"]}, "ordering": ["user_id", "record_date", "period"],
+        })
+        self.assertEqual((job.status, job.total_rows), (ExportJob.STATUS_SUCCESS, 4))
+
+    def test_purge_fails_stale_running_jobs(self):
+        now = timezone.now()
+        part = Path(self.media_root) / "exports" / "abc123" / "情绪记录.xlsx.part"
+        part.parent.mkdir(parents=True)
+        part.write_bytes(b"partial")
+        stale = ExportJob.objects.create(
+            kind="emotion_records", status=ExportJob.STATUS_RUNNING, file="exports/abc123/情绪记录.xlsx",
+            updated_at=now - timedelta(minutes=31),
+        )
+        active = ExportJob.objects.create(
+            kind="emotion_records", status=ExportJob.STATUS_RUNNING, updated_at=now - timedelta(minutes=5),
+        )
+        purge_expired_exports(now=now)
+        stale.refresh_from_db()
+        active.refresh_from_db()
+        self.assertEqual((stale.status, stale.error, stale.file.name), (ExportJob.STATUS_FAILED, STALE_ERROR, ""))
+        self.assertFalse(part.parent.exists())
+        self.assertEqual(active.status, ExportJob.STATUS_RUNNING)
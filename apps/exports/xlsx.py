@@ -0,0 +1,47 @@
+"""
+通用 XLSX 流式写出：openpyxl 只写模式逐行落盘，内存占用与行数无关
+只写模式下无法回头修改单元格，仅表头带样式，数据行不逐格设置边框/对齐
+"""
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+
+def _header_cells(worksheet, headers):
+    border_side = Side(style='thin')
+    font = Font(bold=True, color="FFFFFF")
+    fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    alignment = Alignment(horizontal="center", vertical="center")
+    border = Border(left=border_side, right=border_side, top=border_side, bottom=border_side)
+    cells = []
+    for header in headers:
+        cell = WriteOnlyCell(worksheet, value=header)
+        cell.font = font
+        cell.fill = fill
+        cell.alignment = alignment
+        cell.border = border
+        cells.append(cell)
+    return cells
+
+
+def write_xlsx(fileobj, title, headers, column_widths, rows, on_progress=None, progress_every=2000):
+    """
+    将 rows（可迭代的行列表）写入 fileobj（文件路径或二进制文件对象），返回写入的行数
+    on_progress(rows_written) 每写满 progress_every 行回调一次，供后台任务上报进度
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title)
+    for column, width in enumerate(column_widths, 1):
+        worksheet.column_dimensions[get_column_letter(column)].width = width
+    worksheet.freeze_panes = 'A2'
+    worksheet.append(_header_cells(worksheet, headers))
+
+    written = 0
+    for written, row in enumerate(rows, 1):
+        worksheet.append(row)
+        if on_progress and written % progress_every == 0:
+            on_progress(written)
+
+    workbook.save(fileobj)
+    return written
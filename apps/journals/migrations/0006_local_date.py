@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:22
+
+import config.fields
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_local_date(apps, schema_editor):
+    """按 TIME_ZONE 将存量记录的 record_date 换算为本地日期，单条 UPDATE 完成"""
+    MoodJournal = apps.get_model('journals', 'MoodJournal')
+    MoodJournal.objects.filter(local_date__isnull=True).update(
+        local_date=TruncDate('record_date', tzinfo=timezone.get_current_timezone())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journals', '0005_moodjournal_started_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moodjournal',
+            name='local_date',
+            field=config.fields.LocalDateField(null=True, source='record_date', verbose_name='本地日期'),
+        ),
+        migrations.RunPython(backfill_local_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='moodjournal',
+            index=models.Index(fields=['user', 'local_date'], name='journals_mo_user_id_35f136_idx'),
+        ),
+    ]
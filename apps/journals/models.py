@@ -1,5 +1,6 @@
 from django.db import models
 from apps.users.models import User
+from config.fields import LocalDateField
 
 
 class MoodJournal(models.Model):
@@ -28,6 +29,8 @@ class MoodJournal(models.Model):
     record_date = models.DateTimeField(verbose_name="记录日期", auto_now_add=True)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
     started_at = models.DateTimeField(null=True, blank=True, verbose_name="开始作答时间")
+    # record_date 的本地日期，日统计按此列做范围过滤
+    local_date = LocalDateField(null=True, source="record_date", verbose_name="本地日期")
 
     class Meta:
         verbose_name = "情绪日记"
@@ -36,6 +39,7 @@ class MoodJournal(models.Model):
         indexes = [
             models.Index(fields=["user", "-record_date"]),
             models.Index(fields=["-created_at"]),
+            models.Index(fields=["user", "local_date"]),
         ]
 
     def __str__(self):
@@ -1,5 +1,5 @@
 from ninja import Schema
-from typing import Optional
+from typing import List, Optional
 
 class MoodJournalCreateSchema(Schema):
     mainMood: str = ""
@@ -37,4 +37,5 @@ class MoodStatisticsSchema(Schema):
     date: str
     avg_score: float
     mood_count: int
-    dominant_mood: str
\ No newline at end of file
+    dominant_mood: str
+    top_tags: List[str] = []
\ No newline at end of file
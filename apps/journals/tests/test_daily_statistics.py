@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.journals.models import MoodJournal
+from config.jwt_auth_adapter import create_tokens_for_user
+
+User = get_user_model()
+
+
+class JournalDailyStatisticsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="openid_journal", role="user")
+        token = create_tokens_for_user(self.user)["access"]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        self.now = timezone.localtime()
+
+    def _journal(self, days_ago, mood, intensity, tags=None):
+        journal = MoodJournal.objects.create(
+            user=self.user, mainMood=mood, moodIntensity=intensity, moodSupplementTags=tags,
+        )
+        # 通过 save() 回写，local_date 随 record_date 一并更新
+        journal.record_date = self.now - timedelta(days=days_ago)
+        journal.save()
+
+    def _get(self, days):
+        return self.client.get(
+            "/api/journals/statistics/daily", {"days": days}, secure=True, **self.auth
+        )
+
+    def test_daily_aggregates(self):
+        self._journal(0, "焦虑", 3, {"工作": True, "睡眠": True})
+        self._journal(0, "焦虑", 1, ["工作"])
+        self._journal(0, "平静", None, {"家庭": False})
+        self._journal(2, None, 2)
+        self._journal(40, "愉快", 3)
+
+        body = self._get(30).json()
+        self.assertEqual([item["date"] for item in body], [
+            (self.now - timedelta(days=2)).date().isoformat(), self.now.date().isoformat(),
+        ])
+        older, today = body
+        self.assertEqual(older["dominant_mood"], "未知")
+        self.assertEqual(older["top_tags"], [])
+        self.assertEqual(today["mood_count"], 3)
+        self.assertEqual(today["avg_score"], 2)
+        self.assertEqual(today["dominant_mood"], "焦虑")
+        self.assertEqual(today["top_tags"], ["工作", "睡眠"])
+
+    def test_query_budget_independent_of_days(self):
+        for days_ago in range(0, 365, 3):
+            self._journal(days_ago, "平静", 2)
+        # JWT 用户查询 + 日记查询，与有数据的天数无关
+        with self.assertNumQueries(2):
+            body = self._get(365).json()
+        self.assertEqual(len(body), 122)
@@ -1,9 +1,8 @@
 from ninja import Router, Query
 from ninja.errors import HttpError
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg, Count
-from django.db.models.functions import TruncDate
 from django.utils import timezone
+from collections import Counter
 from datetime import datetime, timedelta
 from .models import MoodJournal
 from .serializers import (
@@ -14,6 +13,9 @@ from config.jwt_auth_adapter import jwt_auth
 
 journals_router = Router(tags=["journals"])
 
+# 日统计中每天返回的高频补充标签数
+TOP_TAGS_PER_DAY = 3
+
 @journals_router.get("/", response=list[MoodJournalResponseSchema], auth=jwt_auth)
 def list_journals(request, filters: MoodJournalListQuerySchema = Query(...)):
     """
@@ -160,41 +162,53 @@ def delete_journal(request, journal_id: int):
     journal.delete()
     return {"success": True}
 
+def _iter_tags(tags):
+    """补充标签兼容两种存储形态：标签列表，或 {标签: 是否选中} 字典"""
+    if isinstance(tags, list):
+        return (tag for tag in tags if tag)
+    if isinstance(tags, dict):
+        return (tag for tag, selected in tags.items() if selected)
+    return ()
+
 @journals_router.get("/statistics/daily", response=list[MoodStatisticsSchema], auth=jwt_auth)
 def get_daily_statistics(request, days: int = Query(30, ge=1, le=365)):
     """
     获取当前用户的日情绪统计
+    一次查询取出窗口内的日记，在 Python 中单遍归并出每日均值、条数、主导情绪与高频标签
     """
     current_user = request.auth
-    tz = timezone.get_current_timezone()
     end_date = timezone.localtime().date()
     start_date = end_date - timedelta(days=days - 1)
 
-    statistics = (
-        MoodJournal.objects.filter(user_id=current_user.id)
-        .annotate(local_date=TruncDate('record_date', tzinfo=tz))
-        .filter(local_date__gte=start_date, local_date__lte=end_date)
-        .values('local_date')
-        .annotate(avg_score=Avg('moodIntensity'), mood_count=Count('id'))
-        .order_by('local_date')
-    )
+    # 按存储的本地日期列做范围过滤，走 (user, local_date) 索引
+    rows = MoodJournal.objects.filter(
+        user_id=current_user.id,
+        local_date__range=[start_date, end_date],
+    ).order_by().values_list('local_date', 'moodIntensity', 'mainMood', 'moodSupplementTags')
+
+    daily = {}
+    for local_date, intensity, main_mood, tags in rows:
+        day = daily.setdefault(local_date, {
+            'count': 0, 'intensity_sum': 0, 'intensity_count': 0,
+            'moods': Counter(), 'tags': Counter(),
+        })
+        day['count'] += 1
+        if intensity is not None:
+            day['intensity_sum'] += intensity
+            day['intensity_count'] += 1
+        day['moods'][main_mood] += 1
+        day['tags'].update(_iter_tags(tags))
 
     result = []
-    for stat in statistics:
-        dominant_mood = (
-            MoodJournal.objects.filter(user_id=current_user.id)
-            .annotate(local_date=TruncDate('record_date', tzinfo=tz))
-            .filter(local_date=stat['local_date'])
-            .values('mainMood')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-            .first()
-        )
+    for local_date in sorted(daily):
+        day = daily[local_date]
+        dominant_mood = day['moods'].most_common(1)[0][0]
         result.append(MoodStatisticsSchema(
-            date=stat['local_date'].isoformat(),
-            avg_score=round(stat['avg_score'], 2) if stat['avg_score'] is not None else 0,
-            mood_count=stat['mood_count'],
-            dominant_mood=dominant_mood['mainMood'] if dominant_mood and dominant_mood['mainMood'] else '未知'
+            date=local_date.isoformat(),
+            avg_score=round(day['intensity_sum'] / day['intensity_count'], 2) if day['intensity_count'] else 0,
+            mood_count=day['count'],
+            dominant_mood=dominant_mood or '未知',
+            top_tags=[tag for tag, _ in day['tags'].most_common(TOP_TAGS_PER_DAY)],
         ))
     return result
 
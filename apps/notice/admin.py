@@ -2,7 +2,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from apps.users.admin_mixins import ForeignKeyUserAdminMixin, UserRealNameFilter
-from .models import UserQuota, NotificationLog
+from .models import UserQuota, NotificationLog, NotificationOutbox, ReminderRun
+from .outbox import requeue_dead
 
 
 @admin.register(UserQuota)
@@ -158,3 +159,58 @@ class NotificationLogAdmin(ForeignKeyUserAdminMixin, admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         """只允许查看，不允许修改"""
         return False
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(ForeignKeyUserAdminMixin, admin.ModelAdmin):
+    """订阅消息发件箱（只读），死信可重新投递"""
+
+    list_display = [
+        'id', 'user_real_name', 'template_id', 'status', 'attempts',
+        'next_attempt_at', 'updated_at'
+    ]
+
+    list_filter = [
+        'status', 'template_id', 'created_at', UserRealNameFilter
+    ]
+
+    search_fields = [
+        'template_id', 'last_error'
+    ]
+
+    actions = ['requeue']
+
+    def requeue(self, request, queryset):
+        """死信重新投递（需重新扣减额度）"""
+        requeued = requeue_dead(queryset)
+        self.message_user(request, f'已重新投递 {requeued} 条死信')
+
+    requeue.short_description = '死信重新投递'
+
+    def get_queryset(self, request):
+        """优化查询，预取用户信息"""
+        return super().get_queryset(request).select_related('user')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReminderRun)
+class ReminderRunAdmin(admin.ModelAdmin):
+    """提醒批次台账（只读）"""
+
+    list_display = [
+        'run_date', 'period', 'template_id', 'status', 'shards',
+        'enqueued', 'skipped', 'owner', 'lease_expires_at', 'finished_at'
+    ]
+
+    list_filter = ['status', 'period', 'run_date']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -22,5 +22,12 @@ app.conf.timezone = settings.TIME_ZONE
 
 # 配置任务路由
 app.conf.task_routes = {
-    'apps.notice.tasks.send_mood_reminder': {'queue': 'notice'}
+    # 提醒派发、分片发送与汇总任务
+    'apps.notice.tasks.*': {'queue': 'notice'},
+    # 导出任务耗时长，使用独立队列与 worker，避免阻塞提醒发送
+    'apps.exports.tasks.*': {'queue': 'exports'},
+    # 夜间批处理（心理测量统计、周期报告分片）使用独立的多进程 batch worker，
+    # 既不占用单进程的导出 worker，周期报告的各分片也能真正并行
+    'apps.scales.tasks.*': {'queue': 'batch'},
+    'apps.reports.tasks.*': {'queue': 'batch'},
 }
@@ -0,0 +1,114 @@
+"""
+订阅消息并发发送：HTTP 请求在线程池中并发执行（共享连接池会话），每秒请求数受两级限制：
+进程内共用的令牌桶跨批次保持令牌数，平滑本进程的发送；缓存（Redis）中按秒计数的共享窗口让所有 notice worker 合计不超过 WECHAT_SEND_QPS
+批量发送统一经发件箱（outbox.enqueue_template_msgs 入队、deliver 投递），本模块只负责网络请求，不访问数据库
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .services import post_subscribe_message
+
+logger = logging.getLogger("notice.dispatcher")
+
+_SEND_WINDOW_KEY = "wechat:send_qps:{}"
+_limiters = None
+_limiter_lock = threading.Lock()
+
+
+class TokenBucket:
+    """线程安全的令牌桶：每秒补充 rate 个令牌，最多积攒 burst 个"""
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，不足时阻塞到可用"""
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate
+            self.sleep(wait_seconds)
+
+
+class SharedRateLimiter:
+    """
+    跨进程的每秒请求上限：以墙钟秒为窗口在缓存中计数（Redis 上 INCR 为原子操作），
+    本秒额度用完时等待到下一秒；缓存不可用时只保留进程内令牌桶的限制
+    """
+
+    def __init__(self, rate, clock=time.time, sleep=time.sleep):
+        self.rate = float(rate)
+        self.limit = max(1, int(rate))
+        self.clock = clock
+        self.sleep = sleep
+
+    def acquire(self):
+        """取得本秒的一次发送额度，不足时阻塞到下一秒"""
+        while True:
+            now = self.clock()
+            window = int(now)
+            key = _SEND_WINDOW_KEY.format(window)
+            try:
+                cache.add(key, 0, timeout=2)
+                count = cache.incr(key)
+            except ValueError:
+                # 计数键在 add 与 incr 之间过期，重新取当前窗口
+                continue
+            except Exception as exc:
+                logger.warning("发送频率共享计数不可用，仅按进程内令牌桶限速: %s", exc)
+                return
+            if count <= self.limit:
+                return
+            self.sleep(window + 1 - now)
+
+
+def send_limiters():
+    """
+    进程内共用的 (令牌桶, 共享限速器)，与 wechat_session 一样按进程创建一次，
+    令牌数跨批次保留，连续排空发件箱时不会每批重新获得一次突发额度；WECHAT_SEND_QPS 变更时重建
+    """
+    global _limiters
+    rate = float(settings.WECHAT_SEND_QPS)
+    if _limiters is None or _limiters[0].rate != rate:
+        with _limiter_lock:
+            if _limiters is None or _limiters[0].rate != rate:
+                _limiters = (TokenBucket(rate), SharedRateLimiter(rate))
+    return _limiters
+
+
+def post_concurrently(messages, concurrency=None):
+    """
+    并发发送 messages（可迭代的 (key, openid, template_id, page_path, data_dict)），
+    按完成顺序逐条产出 (key, 微信响应, 异常)；生成器在调用线程中消费，可安全访问数据库
+    """
+    concurrency = max(1, concurrency or settings.WECHAT_SEND_CONCURRENCY)
+    bucket, shared_limiter = send_limiters()
+
+    def _send(openid, template_id, page_path, data_dict):
+        bucket.acquire()
+        shared_limiter.acquire()
+        return post_subscribe_message(openid, template_id, page_path, data_dict)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="wechat-send") as executor:
+        futures = {executor.submit(_send, *message[1:]): message[0] for message in messages}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
@@ -0,0 +1,180 @@
+"""
+本地模拟微信服务端（access_token、订阅消息发送与小程序登录 jscode2session 接口），用于发送与登录链路的测试与压测
+只依赖标准库；将 WECHAT_API_BASE_URL 指向 server.base_url 即可
+用法:
+    with FakeWechatServer(latency=0.05) as server:
+        with override_settings(WECHAT_API_BASE_URL=server.base_url):
+            ...
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# 微信接口错误码：token 失效、登录 code 无效、超出调用频率、用户拒收订阅消息
+ERRCODE_INVALID_TOKEN = 40001
+ERRCODE_INVALID_CODE = 40029
+ERRCODE_RATE_LIMITED = 45009
+ERRCODE_USER_REFUSED = 43101
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # 默认监听队列只有 5，并发建连时溢出会触发 1 秒的 SYN 重传，污染延迟统计
+    request_queue_size = 128
+
+
+class FakeWechatServer:
+    """
+    latency / jitter: 发送与登录接口的模拟耗时为 latency + [0, jitter) 均匀分布（秒）
+    token_latency: token 接口的模拟耗时（秒），用于制造并发刷新的竞争窗口
+    refuse_openids: 这些 openid 的发送返回 43101（用户拒收）
+    error_rate / error_code: 发送请求按概率随机返回该错误码
+    rate_limit: 发送接口每秒最多受理的请求数，超出返回 45009；None 表示不限
+    统计: token_requests / send_requests / login_requests / rate_limited / max_in_flight
+    """
+
+    def __init__(self, latency=0.0, refuse_openids=(), token_latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_code=ERRCODE_USER_REFUSED, rate_limit=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_latency = token_latency
+        self.refuse_openids = set(refuse_openids)
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.rate_limit = rate_limit
+        self.token_requests = 0
+        self.send_requests = 0
+        self.login_requests = 0
+        self.rate_limited = 0
+        self.max_in_flight = 0
+        self.sent_to = []
+        self._in_flight = 0
+        self._valid_tokens = set()
+        self._window = (0, 0)  # (秒级时间窗口, 窗口内受理数)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = _Server(("127.0.0.1", 0), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def invalidate_tokens(self):
+        """使已签发的 token 全部失效，下一次发送返回 40001"""
+        with self._lock:
+            self._valid_tokens.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _issue_token(self):
+        if self.token_latency:
+            time.sleep(self.token_latency)
+        with self._lock:
+            self.token_requests += 1
+            token = f"fake-token-{self.token_requests}"
+            self._valid_tokens.add(token)
+        return {"access_token": token, "expires_in": 7200}
+
+    def _delay(self):
+        with self._lock:
+            seconds = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if seconds:
+            time.sleep(seconds)
+
+    def _over_rate_limit(self):
+        """调用方需持有 self._lock"""
+        if self.rate_limit is None:
+            return False
+        second = int(time.monotonic())
+        window, accepted = self._window
+        accepted = accepted + 1 if window == second else 1
+        self._window = (second, accepted)
+        return accepted > self.rate_limit
+
+    def _login(self, code):
+        self._delay()
+        with self._lock:
+            self.login_requests += 1
+        if not code or code.startswith("invalid"):
+            return {"errcode": ERRCODE_INVALID_CODE, "errmsg": "invalid code"}
+        return {"openid": f"openid-{code}", "session_key": f"session-{code}"}
+
+    def _send(self, token, payload):
+        with self._lock:
+            self.send_requests += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            self._delay()
+            with self._lock:
+                if token not in self._valid_tokens:
+                    return {"errcode": ERRCODE_INVALID_TOKEN, "errmsg": "invalid credential"}
+                if self._over_rate_limit():
+                    self.rate_limited += 1
+                    return {"errcode": ERRCODE_RATE_LIMITED, "errmsg": "reach max api daily quota limit"}
+                openid = payload.get("touser")
+                if openid in self.refuse_openids:
+                    return {"errcode": ERRCODE_USER_REFUSED, "errmsg": "user refuse to accept the msg"}
+                if self.error_rate and self._random.random() < self.error_rate:
+                    return {"errcode": self.error_code, "errmsg": "injected error"}
+                self.sent_to.append(openid)
+                return {"errcode": 0, "errmsg": "ok", "msgid": len(self.sent_to)}
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/cgi-bin/token":
+                    self._reply(server._issue_token())
+                elif url.path == "/sns/jscode2session":
+                    self._reply(server._login(parse_qs(url.query).get("js_code", [""])[0]))
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if url.path == "/cgi-bin/message/subscribe/send":
+                    token = parse_qs(url.query).get("access_token", [""])[0]
+                    self._reply(server._send(token, payload))
+                else:
+                    self.send_error(404)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
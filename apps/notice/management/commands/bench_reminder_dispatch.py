@@ -0,0 +1,80 @@
+"""
+订阅消息批量发送基准：对本地模拟微信服务端（带固定延迟）分别逐条串行发送与经发件箱批量入队、并发投递，统计吞吐
+用户与额度在事务内生成，结束后整体回滚，不会残留在数据库中
+使用方式: python manage.py bench_reminder_dispatch [--users 500] [--latency 0.05] [--concurrency 16] [--qps 1000]
+"""
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.notice.fake_wechat import FakeWechatServer
+from apps.notice.models import NotificationLog, UserQuota
+from apps.notice.outbox import drain_outbox, enqueue_template_msgs
+from apps.notice.services import send_template_msg
+from apps.users.models import User
+
+TEMPLATE_ID = "bench-template"
+DATA = {'thing1': {'value': "早间情绪测评提醒"}, 'time2': {'value': "2026-01-01 08:00"}}
+LOCAL_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class Command(BaseCommand):
+    help = "对本地模拟微信服务端测量逐条串行发送与经发件箱并发投递订阅消息的吞吐"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=500, help="发送的用户数（默认 500）")
+        parser.add_argument("--latency", type=float, default=0.05, help="模拟接口延迟（秒，默认 0.05）")
+        parser.add_argument("--concurrency", type=int, default=16, help="并发请求数（默认 16）")
+        parser.add_argument("--qps", type=float, default=1000, help="每秒请求上限（默认 1000）")
+
+    def handle(self, *args, **options):
+        users = max(1, options["users"])
+        with FakeWechatServer(latency=options["latency"]) as server, \
+                override_settings(WECHAT_API_BASE_URL=server.base_url, CACHES=LOCAL_CACHE):
+            with transaction.atomic():
+                recipients = self._seed(users)
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as serial_queries:
+                    serial = sum(send_template_msg(user, TEMPLATE_ID, "pages/index", DATA) for user in recipients)
+                serial_elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+
+            with transaction.atomic(), override_settings(
+                WECHAT_SEND_CONCURRENCY=options["concurrency"], WECHAT_SEND_QPS=options["qps"],
+                NOTICE_OUTBOX_BATCH_SIZE=users,
+            ):
+                recipients = self._seed(users)
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as concurrent_queries:
+                    enqueue_template_msgs(recipients, TEMPLATE_ID, "pages/index", DATA)
+                    totals = drain_outbox(max_seconds=3600)
+                concurrent_elapsed = time.perf_counter() - started
+                success = NotificationLog.objects.filter(template_id=TEMPLATE_ID, status='success').count()
+                transaction.set_rollback(True)
+
+        self.stdout.write(f"串行: {serial}/{users} 成功，耗时 {serial_elapsed:.2f} s，"
+                          f"{users / serial_elapsed:,.0f} 条/秒，SQL {len(serial_queries)} 条")
+        self.stdout.write(f"发件箱并发({options['concurrency']}): {success}/{users} 成功"
+                          f"（待重试 {totals['retry']}，死信 {totals['dead']}），"
+                          f"耗时 {concurrent_elapsed:.2f} s，{users / concurrent_elapsed:,.0f} 条/秒，"
+                          f"SQL {len(concurrent_queries)} 条")
+        self.stdout.write(self.style.SUCCESS(
+            f"加速 {serial_elapsed / concurrent_elapsed:.1f}x，服务端最大在途请求 {server.max_in_flight}"
+        ))
+
+    def _seed(self, users):
+        self.stdout.write(self.style.NOTICE(f"生成 {users} 位用户及订阅额度..."))
+        recipients = [
+            User(id=uuid.uuid4(), username=f"bench_{index}_{uuid.uuid4().hex[:8]}",
+                 wechat_openid=f"openid-{index}", role="user")
+            for index in range(users)
+        ]
+        User.objects.bulk_create(recipients, batch_size=1000)
+        UserQuota.objects.bulk_create(
+            [UserQuota(user=user, template_id=TEMPLATE_ID, count=1) for user in recipients], batch_size=1000
+        )
+        return recipients
@@ -0,0 +1,115 @@
+"""
+情绪提醒端到端压测：生成 N 位有额度的用户，对本地模拟微信服务端执行 send_mood_reminder
+（派发 → 分片入队 → 发件箱排空 → 汇总，Celery 以 eager 模式在本进程内执行），统计单次发送延迟 p50/p99 与总耗时
+用户与额度在事务内生成，结束后整体回滚，不会残留在数据库中
+使用方式: python manage.py loadtest_reminders [--users 1000] [--latency 0.05] [--jitter 0.05]
+          [--error-rate 0.01] [--rate-limit 500] [--spread-minutes 0]
+"""
+import statistics
+import time
+import uuid
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.test import override_settings
+
+from apps.notice import dispatcher
+from apps.notice.celery import app
+from apps.notice.fake_wechat import FakeWechatServer
+from apps.notice.models import NotificationLog, NotificationOutbox, UserQuota
+from apps.notice.tasks import send_mood_reminder
+from apps.users.models import User
+
+TEMPLATE_ID = "loadtest-template"
+LOCAL_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class Command(BaseCommand):
+    help = "对本地模拟微信服务端端到端压测情绪提醒任务，输出发送延迟分位数与总耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000, help="待提醒用户数（默认 1000）")
+        parser.add_argument("--period", choices=["morning", "evening"], default="morning")
+        parser.add_argument("--latency", type=float, default=0.05, help="模拟接口基础延迟（秒，默认 0.05）")
+        parser.add_argument("--jitter", type=float, default=0.05, help="在基础延迟上叠加的均匀抖动（秒，默认 0.05）")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回错误码的比例（默认 0）")
+        parser.add_argument("--error-code", type=int, default=43101, help="随机错误码（默认 43101 用户拒收）")
+        parser.add_argument("--rate-limit", type=int, default=None, help="模拟服务端每秒受理上限，超出返回 45009")
+        parser.add_argument("--concurrency", type=int, default=None, help="覆盖 WECHAT_SEND_CONCURRENCY")
+        parser.add_argument("--qps", type=float, default=None, help="覆盖 WECHAT_SEND_QPS")
+        parser.add_argument("--shard-size", type=int, default=None, help="覆盖 REMINDER_SHARD_SIZE")
+        parser.add_argument("--spread-minutes", type=int, default=0,
+                            help="覆盖 REMINDER_SPREAD_MINUTES（默认 0；eager 模式忽略 countdown，打散只影响分片数）")
+        parser.add_argument("--seed", type=int, default=42, help="随机种子")
+
+    def handle(self, *args, **options):
+        overrides = {
+            key: options[option]
+            for key, option in (
+                ("WECHAT_SEND_CONCURRENCY", "concurrency"), ("WECHAT_SEND_QPS", "qps"),
+                ("REMINDER_SHARD_SIZE", "shard_size"), ("REMINDER_SPREAD_MINUTES", "spread_minutes"),
+            )
+            if options[option] is not None
+        }
+        server = FakeWechatServer(
+            latency=options["latency"], jitter=options["jitter"], error_rate=options["error_rate"],
+            error_code=options["error_code"], rate_limit=options["rate_limit"], seed=options["seed"],
+        )
+        latencies = []
+        post_subscribe_message = dispatcher.post_subscribe_message
+
+        def timed_post(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return post_subscribe_message(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+        eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        try:
+            with server, override_settings(
+                WECHAT_API_BASE_URL=server.base_url, WECHAT_SUBSCRIPTION_TEMPLATES=TEMPLATE_ID,
+                CACHES=LOCAL_CACHE, **overrides,
+            ), mock.patch.object(dispatcher, "post_subscribe_message", timed_post), transaction.atomic():
+                self._seed(options["users"])
+                started = time.perf_counter()
+                shards = send_mood_reminder.apply(args=(options["period"],)).get()
+                elapsed = time.perf_counter() - started
+                statuses = dict(
+                    NotificationLog.objects.filter(template_id=TEMPLATE_ID)
+                    .order_by().values_list('status').annotate(count=Count('id'))
+                )
+                retrying = NotificationOutbox.objects.filter(
+                    template_id=TEMPLATE_ID, status=NotificationOutbox.STATUS_PENDING,
+                ).count()
+                transaction.set_rollback(True)
+        finally:
+            app.conf.task_always_eager = eager
+
+        sent = len(latencies)
+        self.stdout.write(f"用户 {options['users']}，分片 {shards}，发送请求 {sent}，"
+                          f"成功 {statuses.get('success', 0)}，失败 {statuses.get('failed', 0)}，待重试 {retrying}")
+        self.stdout.write(f"服务端: token 请求 {server.token_requests}，限流 {server.rate_limited}，"
+                          f"最大在途 {server.max_in_flight}")
+        if sent >= 2:
+            cuts = statistics.quantiles(latencies, n=100)
+            self.stdout.write(f"发送延迟: p50 {cuts[49] * 1000:.1f} ms，p99 {cuts[98] * 1000:.1f} ms，"
+                              f"最大 {max(latencies) * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"总耗时 {elapsed:.2f} s，{sent / elapsed:,.0f} 条/秒"
+        ))
+
+    def _seed(self, users):
+        self.stdout.write(self.style.NOTICE(f"生成 {users} 位用户及订阅额度..."))
+        recipients = [
+            User(id=uuid.uuid4(), username=f"loadtest_{index}_{uuid.uuid4().hex[:8]}",
+                 wechat_openid=f"openid-{index}", role="user")
+            for index in range(users)
+        ]
+        User.objects.bulk_create(recipients, batch_size=1000)
+        UserQuota.objects.bulk_create(
+            [UserQuota(user=user, template_id=TEMPLATE_ID, count=1) for user in recipients], batch_size=1000
+        )
@@ -17,7 +17,7 @@ class Command(BaseCommand):
         period = options["period"]
         self.stdout.write(self.style.NOTICE(f"开始推送 {period} 测评提醒..."))
         try:
-            send_mood_reminder(period=period)
-            self.stdout.write(self.style.SUCCESS(f"{period} 测评提醒推送任务已执行"))
+            shards = send_mood_reminder(period=period)
+            self.stdout.write(self.style.SUCCESS(f"{period} 测评提醒已派发 {shards} 个分片任务"))
         except Exception as e:
             raise CommandError(f"推送失败: {e}")
\ No newline at end of file
@@ -1,5 +1,5 @@
 """
-Django 管理命令：创建情绪测评提醒定时任务
+Django 管理命令：创建情绪测评提醒等定时任务
 用于在部署时自动创建 Celery Beat 定时任务
 """
 from django.core.management.base import BaseCommand
@@ -9,21 +9,21 @@ import json
 
 
 class Command(BaseCommand):
-    help = "创建情绪测评提醒定时任务（早上 9:00 / 晚上 21:00）"
+    help = "创建情绪测评提醒（早上 9:00 / 晚上 21:00）、导出文件清理、量表心理测量统计、周期报告生成、access_token 提前刷新及发件箱排空定时任务"
 
     def handle(self, *args, **options):
         tz = timezone.get_current_timezone()
 
-        def upsert(name, hour, kwargs, description):
+        def upsert(name, hour, kwargs, description, task_name="apps.notice.tasks.send_mood_reminder", minute="0"):
             schedule, _ = CrontabSchedule.objects.get_or_create(
-                minute="0", hour=str(hour), day_of_week="*",
+                minute=str(minute), hour=str(hour), day_of_week="*",
                 day_of_month="*", month_of_year="*", timezone=tz,
             )
             task, created = PeriodicTask.objects.update_or_create(
                 name=name,
                 defaults={
                     "crontab": schedule,
-                    "task": "apps.notice.tasks.send_mood_reminder",
+                    "task": task_name,
                     "kwargs": json.dumps(kwargs),
                     "enabled": True,
                     "description": description,
@@ -34,4 +34,14 @@ class Command(BaseCommand):
 
         upsert("早上情绪测评提醒", 9, {"period": "morning"}, "每天早上 9:00 提醒用户进行早间情绪测评")
         upsert("晚上情绪测评提醒", 21, {"period": "evening"}, "每天晚上 21:00 提醒用户进行晚间情绪测评")
+        upsert("清理过期导出文件", "*", {}, "每小时清理过期的后台导出文件并回收中断的导出任务",
+               task_name="apps.exports.tasks.purge_expired_export_files")
+        upsert("量表心理测量统计", 3, {}, "每天凌晨 3:00 按量表与人群刷新题目统计与 Cronbach's α",
+               task_name="apps.scales.tasks.compute_scale_psychometrics")
+        upsert("周期健康报告生成", 2, {}, "每天凌晨 2:00 为跟踪用户批量生成截至前一天的周期报告",
+               task_name="apps.reports.tasks.generate_periodic_reports")
+        upsert("微信 access_token 提前刷新", "*", {}, "每 20 分钟检查一次，临近过期时提前刷新 access_token",
+               task_name="apps.notice.tasks.refresh_wechat_token", minute="*/20")
+        upsert("订阅消息发件箱排空", "*", {}, "每分钟排空发件箱中到期的待发送与待重试消息",
+               task_name="apps.notice.tasks.process_notification_outbox", minute="*")
         self.stdout.write(self.style.SUCCESS("🎉 定时任务设置完成！"))
\ No newline at end of file
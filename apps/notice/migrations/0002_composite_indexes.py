@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notice', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificationlog',
+            index=models.Index(fields=['status', 'created_at'], name='notice_noti_status_5f6b3b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userquota',
+            index=models.Index(fields=['template_id', 'count'], name='notice_user_templat_4a346f_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notice', '0002_composite_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('template_id', models.CharField(max_length=64, verbose_name='模板ID')),
+                ('page_path', models.CharField(blank=True, default='', max_length=255, verbose_name='跳转页面')),
+                ('message_data', models.JSONField(verbose_name='消息内容')),
+                ('status', models.CharField(choices=[('pending', '等待发送'), ('sending', '发送中'), ('sent', '已发送'), ('dead', '死信')], default='pending', max_length=20, verbose_name='状态')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='已尝试次数')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='下次尝试时间')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='最近错误')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '订阅消息发件箱',
+                'verbose_name_plural': '订阅消息发件箱',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='notice_noti_status_019937_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notice', '0003_notification_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_date', models.DateField(verbose_name='日期')),
+                ('period', models.CharField(max_length=16, verbose_name='时段')),
+                ('template_id', models.CharField(max_length=64, verbose_name='模板ID')),
+                ('status', models.CharField(choices=[('running', '派发中'), ('done', '已完成')], default='running', max_length=16, verbose_name='状态')),
+                ('owner', models.CharField(blank=True, default='', max_length=255, verbose_name='持有者')),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True, verbose_name='租约到期时间')),
+                ('shards', models.PositiveIntegerField(default=0, verbose_name='分片数')),
+                ('enqueued', models.PositiveIntegerField(default=0, verbose_name='入队数')),
+                ('skipped', models.PositiveIntegerField(default=0, verbose_name='跳过数')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+            ],
+            options={
+                'verbose_name': '提醒批次',
+                'verbose_name_plural': '提醒批次',
+                'ordering': ['-run_date', 'period'],
+            },
+        ),
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='run_key',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='提醒批次'),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationoutbox',
+            constraint=models.UniqueConstraint(condition=models.Q(('run_key', ''), _negated=True), fields=('run_key', 'user'), name='uniq_outbox_run_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='reminderrun',
+            constraint=models.UniqueConstraint(fields=('run_date', 'period', 'template_id'), name='uniq_reminder_run'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notice', '0004_reminder_run'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reminderrun',
+            name='status',
+            field=models.CharField(choices=[('running', '派发中'), ('done', '已完成'), ('failed', '派发失败')], default='running', max_length=16, verbose_name='状态'),
+        ),
+    ]
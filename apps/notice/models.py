@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class UserQuota(models.Model):
@@ -18,6 +19,10 @@ class UserQuota(models.Model):
     class Meta:
         # 联合唯一索引：一个用户对同一个模板只有一条记录
         unique_together = ('user', 'template_id')
+        indexes = [
+            # 提醒任务：按模板筛选仍有额度的用户
+            models.Index(fields=['template_id', 'count']),
+        ]
         verbose_name = "用户订阅额度"
         verbose_name_plural = "用户订阅额度"
 
@@ -52,6 +57,101 @@ class NotificationLog(models.Model):
         verbose_name = "通知发送日志"
         verbose_name_plural = "通知发送日志"
         ordering = ['-created_at']
+        indexes = [
+            # 按状态筛选待发送/失败日志并按时间排序（后台筛选、失败重试）
+            models.Index(fields=['status', 'created_at']),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.template_id}: {self.status}"
\ No newline at end of file
+        return f"{self.user.username} - {self.template_id}: {self.status}"
+
+class NotificationOutbox(models.Model):
+    """
+    订阅消息发件箱：待发送/待重试的消息，由 worker 按批认领（SKIP LOCKED）后发送
+    入队时已扣减额度；发送成功写成功日志，永久失败或重试耗尽转为死信并回补额度
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, '等待发送'),
+        (STATUS_SENDING, '发送中'),
+        (STATUS_SENT, '已发送'),
+        (STATUS_DEAD, '死信'),
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    template_id = models.CharField("模板ID", max_length=64)
+    page_path = models.CharField("跳转页面", max_length=255, blank=True, default='')
+    message_data = models.JSONField("消息内容")
+    status = models.CharField("状态", choices=STATUS_CHOICES, default=STATUS_PENDING, max_length=20)
+    attempts = models.PositiveSmallIntegerField("已尝试次数", default=0)
+    # pending: 最早可发送时间（重试退避）；sending: 认领租约到期时间，到期未完成视为 worker 丢失，可被重新认领
+    next_attempt_at = models.DateTimeField("下次尝试时间", default=timezone.now)
+    last_error = models.TextField("最近错误", blank=True, default='')
+    # 所属提醒批次（ReminderRun.run_key），同一批次内每位用户至多一条，作为逐用户的幂等记录
+    run_key = models.CharField("提醒批次", max_length=100, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "订阅消息发件箱"
+        verbose_name_plural = "订阅消息发件箱"
+        indexes = [
+            # worker 认领到期消息：status IN (pending, sending) AND next_attempt_at <= now
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['run_key', 'user'], condition=~models.Q(run_key=''), name='uniq_outbox_run_user'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.template_id}: {self.status}"
+
+
+class ReminderRun(models.Model):
+    """
+    提醒批次台账：每个 (日期, 时段, 模板) 一行，保证多个 beat/worker 实例下同一批次只派发一次
+    派发前以租约认领（owner + lease_expires_at），持有者崩溃后租约到期可由其他实例接管；
+    分片异常时标记为派发失败并释放租约，重新派发即可续跑；
+    接管或重试时已入队（发件箱中有本批次记录）的用户不会再次发送
+    """
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_RUNNING, '派发中'),
+        (STATUS_DONE, '已完成'),
+        (STATUS_FAILED, '派发失败'),
+    )
+
+    run_date = models.DateField("日期")
+    period = models.CharField("时段", max_length=16)
+    template_id = models.CharField("模板ID", max_length=64)
+    status = models.CharField("状态", choices=STATUS_CHOICES, default=STATUS_RUNNING, max_length=16)
+    owner = models.CharField("持有者", max_length=255, blank=True, default='')
+    lease_expires_at = models.DateTimeField("租约到期时间", null=True, blank=True)
+    shards = models.PositiveIntegerField("分片数", default=0)
+    enqueued = models.PositiveIntegerField("入队数", default=0)
+    skipped = models.PositiveIntegerField("跳过数", default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField("完成时间", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "提醒批次"
+        verbose_name_plural = "提醒批次"
+        ordering = ['-run_date', 'period']
+        constraints = [
+            models.UniqueConstraint(fields=['run_date', 'period', 'template_id'], name='uniq_reminder_run'),
+        ]
+
+    @property
+    def run_key(self):
+        return f"{self.run_date.isoformat()}:{self.period}:{self.template_id}"
+
+    def __str__(self):
+        return f"{self.run_date} {self.period} ({self.status})"
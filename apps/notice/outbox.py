@@ -0,0 +1,152 @@
+"""
+订阅消息发件箱：批量入队（额度一次扣减）后由 worker 异步投递
+认领用 SELECT ... FOR UPDATE SKIP LOCKED，多个 worker 并行排空互不阻塞；认领即写入租约，
+worker 丢失后租约到期可被重新认领。暂时失败按指数退避重试，永久失败或重试耗尽转为死信并回补额度
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .dispatcher import post_concurrently
+from .models import NotificationLog, NotificationOutbox
+from .services import (
+    QUOTA_EXHAUSTED, SEND_RETRY, SEND_SUCCESS, classify_send_result, failed_log, refund_quotas,
+    reserve_quotas, retry_delay, success_log,
+)
+
+logger = logging.getLogger("notice.outbox")
+
+
+def enqueue_template_msgs(users, template_id, page_path, data_dict, run_key=''):
+    """
+    为 users 入队同一条订阅消息，返回 (入队数, 跳过数)
+    额度在入队时一次扣减；无 openid 的用户直接跳过，无额度的写失败日志
+    指定 run_key 时本批次已入队的用户计入跳过；扣减与入队在同一事务内，
+    并发重复入队由 (run_key, user) 唯一约束兜底整体回滚，额度不会重复扣减
+    """
+    users = list(users)
+    with transaction.atomic():
+        attempted = set()
+        if run_key:
+            attempted = set(NotificationOutbox.objects.filter(
+                run_key=run_key, user_id__in=[user.id for user in users],
+            ).values_list('user_id', flat=True))
+        candidates = [user for user in users if user.wechat_openid and user.id not in attempted]
+        reserved = reserve_quotas([user.id for user in candidates], template_id)
+        NotificationOutbox.objects.bulk_create([
+            NotificationOutbox(
+                user_id=user_id, template_id=template_id, page_path=page_path, message_data=data_dict,
+                run_key=run_key,
+            )
+            for user_id in reserved
+        ], batch_size=500)
+        NotificationLog.objects.bulk_create([
+            failed_log(user.id, template_id, data_dict, QUOTA_EXHAUSTED)
+            for user in candidates if user.id not in reserved
+        ], batch_size=500)
+    return len(reserved), len(users) - len(reserved)
+
+
+def claim_due(limit):
+    """认领至多 limit 条到期消息（含租约过期的 sending），置为 sending 并写入租约，返回消息列表"""
+    now = timezone.now()
+    with transaction.atomic():
+        entries = list(
+            NotificationOutbox.objects
+            .select_for_update(skip_locked=True, of=('self',))
+            .select_related('user')
+            .filter(
+                status__in=(NotificationOutbox.STATUS_PENDING, NotificationOutbox.STATUS_SENDING),
+                next_attempt_at__lte=now,
+            )
+            .order_by('next_attempt_at')[:limit]
+        )
+        if entries:
+            NotificationOutbox.objects.filter(id__in=[entry.id for entry in entries]).update(
+                status=NotificationOutbox.STATUS_SENDING, attempts=F('attempts') + 1,
+                next_attempt_at=now + timedelta(seconds=settings.NOTICE_OUTBOX_LEASE_SECONDS), updated_at=now,
+            )
+    for entry in entries:
+        entry.attempts += 1
+    return entries
+
+
+def deliver(entries):
+    """发送已认领的消息并批量落库结果，返回 {'sent', 'retry', 'dead'} 计数"""
+    by_id = {entry.id: entry for entry in entries}
+    counts = {'sent': 0, 'retry': 0, 'dead': 0}
+    logs = []
+    refunds = {}
+    messages = (
+        (entry.id, entry.user.wechat_openid, entry.template_id, entry.page_path, entry.message_data)
+        for entry in entries
+    )
+    for entry_id, res_json, error in post_concurrently(messages):
+        entry = by_id[entry_id]
+        entry.updated_at = timezone.now()
+        outcome, entry.last_error = classify_send_result(res_json=res_json, error=error)
+        if outcome == SEND_SUCCESS:
+            entry.status = NotificationOutbox.STATUS_SENT
+            logs.append(success_log(entry.user_id, entry.template_id, entry.message_data, res_json))
+            counts['sent'] += 1
+            continue
+        logger.error("发件箱 %s 用户 %s 第 %s 次发送失败: %s",
+                     entry.id, entry.user.username, entry.attempts, entry.last_error)
+        if outcome == SEND_RETRY and entry.attempts < settings.NOTICE_OUTBOX_MAX_ATTEMPTS:
+            entry.status = NotificationOutbox.STATUS_PENDING
+            entry.next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(entry.attempts))
+            counts['retry'] += 1
+        else:
+            entry.status = NotificationOutbox.STATUS_DEAD
+            logs.append(failed_log(entry.user_id, entry.template_id, entry.message_data, entry.last_error))
+            refunds.setdefault(entry.template_id, []).append(entry.user_id)
+            counts['dead'] += 1
+
+    NotificationOutbox.objects.bulk_update(entries, ['status', 'next_attempt_at', 'last_error', 'updated_at'])
+    NotificationLog.objects.bulk_create(logs, batch_size=500)
+    for template_id, user_ids in refunds.items():
+        refund_quotas(user_ids, template_id)
+    return counts
+
+
+def drain_outbox(max_seconds=None, batch_size=None):
+    """
+    循环认领并投递到期消息，直到没有到期消息或超过 max_seconds；返回累计计数
+    只处理到期消息，退避中的重试留给下一次排空
+    """
+    deadline = time.monotonic() + (max_seconds or settings.NOTICE_OUTBOX_DRAIN_SECONDS)
+    totals = {'sent': 0, 'retry': 0, 'dead': 0}
+    while time.monotonic() < deadline:
+        entries = claim_due(batch_size or settings.NOTICE_OUTBOX_BATCH_SIZE)
+        if not entries:
+            break
+        for key, count in deliver(entries).items():
+            totals[key] += count
+    return totals
+
+
+def requeue_dead(queryset):
+    """死信重新投递：重新扣减额度，有额度的恢复为待发送并清零尝试次数，返回恢复条数"""
+    requeued = 0
+    with transaction.atomic():
+        entries = list(queryset.select_for_update().filter(status=NotificationOutbox.STATUS_DEAD))
+        by_template = {}
+        for entry in entries:
+            by_template.setdefault(entry.template_id, []).append(entry)
+        for template_id, group in by_template.items():
+            # 同一用户的多条死信每次只恢复一条，与一次扣减对应
+            first = {}
+            for entry in group:
+                first.setdefault(entry.user_id, entry.id)
+            reserved = reserve_quotas(list(first), template_id)
+            ids = [entry_id for user_id, entry_id in first.items() if user_id in reserved]
+            requeued += NotificationOutbox.objects.filter(id__in=ids).update(
+                status=NotificationOutbox.STATUS_PENDING, attempts=0, last_error='',
+                next_attempt_at=timezone.now(), updated_at=timezone.now(),
+            )
+    return requeued
@@ -0,0 +1,47 @@
+"""
+提醒批次台账：以数据库租约保证同一 (日期, 时段, 模板) 的提醒只有一个实例在派发
+租约条件更新是原子的，不依赖额外的锁服务；Celery 重试沿用同一任务 ID，可重新认领自己的租约
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ReminderRun
+
+
+def acquire_reminder_run(run_date, period, template_id, owner, lease_seconds=None):
+    """
+    认领批次租约：批次未完成且租约空闲、已过期或本就属于 owner 时成功，返回批次；否则返回 None
+    派发失败的批次同样可以认领，认领后恢复为派发中，只处理尚未入队的用户
+    """
+    run, _ = ReminderRun.objects.get_or_create(run_date=run_date, period=period, template_id=template_id)
+    now = timezone.now()
+    lease = timedelta(seconds=lease_seconds or settings.REMINDER_RUN_LEASE_SECONDS)
+    claimed = (
+        ReminderRun.objects
+        .filter(id=run.id, status__in=(ReminderRun.STATUS_RUNNING, ReminderRun.STATUS_FAILED))
+        .filter(Q(owner='') | Q(owner=owner) | Q(lease_expires_at__lt=now))
+        .update(status=ReminderRun.STATUS_RUNNING, owner=owner, lease_expires_at=now + lease, updated_at=now)
+    )
+    if not claimed:
+        return None
+    run.refresh_from_db()
+    return run
+
+
+def finish_reminder_run(run_id, shards, enqueued, skipped):
+    """所有分片入队完成后标记批次完成并记录统计"""
+    now = timezone.now()
+    ReminderRun.objects.filter(id=run_id).update(
+        status=ReminderRun.STATUS_DONE, shards=shards, enqueued=enqueued, skipped=skipped,
+        lease_expires_at=None, finished_at=now, updated_at=now,
+    )
+
+
+def fail_reminder_run(run_id):
+    """分片异常、汇总无法执行时标记批次派发失败并释放租约，重新派发即可续跑"""
+    ReminderRun.objects.filter(id=run_id, status=ReminderRun.STATUS_RUNNING).update(
+        status=ReminderRun.STATUS_FAILED, owner='', lease_expires_at=None, updated_at=timezone.now(),
+    )
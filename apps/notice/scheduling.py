@@ -0,0 +1,68 @@
+"""
+提醒发送时间打散：把一次提醒分散到 REMINDER_SPREAD_MINUTES 分钟的窗口内，按 ETA 时间桶延迟派发分片，
+避免所有用户同一时刻打开小程序集中请求填写与量表接口
+每位用户的偏移是确定的：惯常开始作答时刻（提前 REMINDER_HABIT_LEAD_MINUTES 分钟）落在窗口内时取该时刻，
+否则按用户 UUID 均匀散列。提醒一发出就作答的活跃用户惯常时刻紧贴提醒时间，若截断到窗口起点会全部挤进第一个桶，
+且其作答时间又由提醒本身决定、逐日自我强化，因此这部分用户同样按散列打散
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Avg
+from django.db.models.functions import ExtractHour, ExtractMinute
+from django.utils import timezone
+
+from apps.emotiontracker.models import EmotionRecord
+
+
+def habit_minutes(period, today):
+    """近 REMINDER_HISTORY_DAYS 天该时段开始作答的平均本地时刻（当日第几分钟），返回 {user_id: 分钟}"""
+    tz = timezone.get_current_timezone()
+    rows = (
+        EmotionRecord.objects
+        .filter(
+            period=period, started_at__isnull=False,
+            record_date__gte=today - timedelta(days=settings.REMINDER_HISTORY_DAYS), record_date__lt=today,
+        )
+        .values('user_id')
+        .annotate(minute=Avg(ExtractHour('started_at', tzinfo=tz) * 60 + ExtractMinute('started_at', tzinfo=tz)))
+        .order_by()
+    )
+    return {row['user_id']: row['minute'] for row in rows}
+
+
+def spread_offsets(user_ids, period, now):
+    """逐个产出 (user_id, 相对 now 的发送偏移秒数)，偏移落在 [0, 窗口) 内；窗口为 0 时全部为 0"""
+    window = settings.REMINDER_SPREAD_MINUTES * 60
+    if window <= 0:
+        for user_id in user_ids:
+            yield user_id, 0
+        return
+
+    habits = habit_minutes(period, now.date()) if settings.REMINDER_SPREAD_STRATEGY == 'history' else {}
+    start_minute = now.hour * 60 + now.minute
+    for user_id in user_ids:
+        habit = habits.get(user_id)
+        offset = None if habit is None else int((habit - settings.REMINDER_HABIT_LEAD_MINUTES - start_minute) * 60)
+        if offset is None or not 0 < offset < window:
+            offset = user_id.int % window
+        yield user_id, offset
+
+
+def eta_buckets(user_ids, period, now):
+    """
+    按 REMINDER_SPREAD_BUCKET_MINUTES 把用户归入时间桶，桶内再按 REMINDER_SHARD_SIZE 切分，
+    返回按延迟升序的 [(countdown 秒数, [用户 ID 字符串]), ...]
+    """
+    bucket_seconds = max(1, settings.REMINDER_SPREAD_BUCKET_MINUTES * 60)
+    buckets = defaultdict(list)
+    for user_id, offset in spread_offsets(user_ids, period, now):
+        buckets[offset // bucket_seconds * bucket_seconds].append(str(user_id))
+
+    shard_size = settings.REMINDER_SHARD_SIZE
+    return [
+        (countdown, buckets[countdown][start:start + shard_size])
+        for countdown in sorted(buckets)
+        for start in range(0, len(buckets[countdown]), shard_size)
+    ]
@@ -1,35 +1,65 @@
+import threading
+import time
+import uuid
+from datetime import timedelta
+
 import requests
-from urllib.parse import urlencode
+from requests.adapters import HTTPAdapter
 from django.utils import timezone
 from django.conf import settings
 from django.core.cache import cache
+from django.db import transaction
 from django.db.models import F
 import logging
-from .models import UserQuota, NotificationLog
+from .models import UserQuota, NotificationLog, NotificationOutbox
 
 logger = logging.getLogger("notice.services")
 
-_WECHAT_TOKEN_CACHE_KEY = "wechat:access_token"
+QUOTA_EXHAUSTED = '无可用订阅额度'
+SEND_SUCCESS, SEND_RETRY, SEND_FAILED = 'success', 'retry', 'failed'
+# 可重试的错误码：系统繁忙、token 失效/过期（发送时已刷新重试过一次）、调用超出限额或频率
+TRANSIENT_ERRCODES = {-1, 40001, 42001, 45009, 45011}
 
+# 缓存值为 {'token', 'expires_at'}，与旧版纯字符串缓存使用不同的键
+_WECHAT_TOKEN_CACHE_KEY = "wechat:access_token:entry"
+_WECHAT_TOKEN_LOCK_KEY = "wechat:access_token:lock"
+# 进程内副本 (entry, 上次与缓存核对的 monotonic 时间)，省去每次发送一次 Redis 往返
+_local_token = None
+_session = None
+_session_lock = threading.Lock()
 
-def get_wechat_access_token(force_refresh=False):
-    """获取微信 access_token（缓存 ~7000s，复用现有 Redis，避免每次请求耗尽日配额）"""
-    if not force_refresh:
-        cached = cache.get(_WECHAT_TOKEN_CACHE_KEY)
-        if cached:
-            return cached
 
-    appid = settings.WECHAT_MINI_PROGRAM_APP_ID
-    secret = settings.WECHAT_MINI_PROGRAM_APP_SECRET
-    params = urlencode({
-        "grant_type": "client_credential",
-        "appid": appid,
-        "secret": secret,
-    })
-    url = f"https://api.weixin.qq.com/cgi-bin/token?{params}"
+def wechat_session():
+    """进程内共享的 HTTP 会话，连接池大小与批量发送并发数一致，复用 TCP/TLS 连接"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, settings.WECHAT_SEND_CONCURRENCY))
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _remember_token(entry):
+    global _local_token
+    _local_token = (entry, time.monotonic())
+    return entry['token']
 
+
+def _fetch_access_token():
+    """调用 cgi-bin/token 获取新 token，返回 {'token', 'expires_at'}，失败返回 None"""
+    params = {
+        "grant_type": "client_credential",
+        "appid": settings.WECHAT_MINI_PROGRAM_APP_ID,
+        "secret": settings.WECHAT_MINI_PROGRAM_APP_SECRET,
+    }
     try:
-        response = requests.get(url, timeout=5)
+        response = wechat_session().get(
+            f"{settings.WECHAT_API_BASE_URL}/cgi-bin/token", params=params, timeout=settings.WECHAT_HTTP_TIMEOUT
+        )
         result = response.json()
     except Exception as e:
         # 不记录 url（含 secret），仅记录异常类型
@@ -37,90 +67,211 @@ def get_wechat_access_token(force_refresh=False):
         return None
 
     token = result.get('access_token')
-    expires_in = result.get('expires_in', 7200)
-    if token:
-        cache.set(_WECHAT_TOKEN_CACHE_KEY, token, max(60, int(expires_in) - 200))
-        return token
+    if not token:
+        logger.error("获取access_token失败: errcode=%s", result.get('errcode'))
+        return None
+    # 提前 200 秒视为过期，留出发送途中的余量
+    lifetime = max(60, int(result.get('expires_in', 7200)) - 200)
+    return {'token': token, 'expires_at': time.time() + lifetime}
 
-    logger.error("获取access_token失败: errcode=%s", result.get('errcode'))
-    return None
 
+def get_wechat_access_token():
+    """
+    获取微信 access_token：优先用进程内副本（每 WECHAT_TOKEN_LOCAL_SECONDS 秒与 Redis 复核一次），
+    其次读 Redis，都没有时走单飞刷新
+    """
+    local = _local_token
+    if local is not None:
+        entry, checked_at = local
+        if time.monotonic() - checked_at < settings.WECHAT_TOKEN_LOCAL_SECONDS and entry['expires_at'] > time.time():
+            return entry['token']
+    entry = cache.get(_WECHAT_TOKEN_CACHE_KEY)
+    if entry:
+        return _remember_token(entry)
+    return refresh_wechat_access_token()
 
-def send_template_msg(user, template_id, page_path, data_dict):
-    """发送订阅消息：原子扣减额度，发送失败则回补，token 过期重试一次"""
-    if not user.wechat_openid:
-        logger.warning("跳过推送: 用户 %s 无 wechat_openid", user.username)
+
+def refresh_wechat_access_token(invalid_token=None):
+    """
+    单飞刷新 access_token：cache.add（Redis 上为 SET NX）抢锁，只有持锁者请求 cgi-bin/token，
+    其余调用者指数退避轮询缓存，直到出现与 invalid_token 不同的新 token
+    invalid_token 为调用方确认失效（40001）或即将过期的 token；为 None 时缓存中已有 token 即直接返回
+    """
+    deadline = time.monotonic() + settings.WECHAT_TOKEN_LOCK_SECONDS
+    delay = 0.05
+    while True:
+        entry = cache.get(_WECHAT_TOKEN_CACHE_KEY)
+        if entry and entry['token'] != invalid_token:
+            return _remember_token(entry)
+
+        owner = uuid.uuid4().hex
+        if cache.add(_WECHAT_TOKEN_LOCK_KEY, owner, settings.WECHAT_TOKEN_LOCK_SECONDS):
+            try:
+                # 抢锁期间可能已有其他 worker 完成刷新
+                entry = cache.get(_WECHAT_TOKEN_CACHE_KEY)
+                if entry and entry['token'] != invalid_token:
+                    return _remember_token(entry)
+                entry = _fetch_access_token()
+                if entry is None:
+                    return None
+                cache.set(_WECHAT_TOKEN_CACHE_KEY, entry, max(1, int(entry['expires_at'] - time.time())))
+                return _remember_token(entry)
+            finally:
+                # 只释放自己持有的锁；锁已超时被他人持有时不删除
+                if cache.get(_WECHAT_TOKEN_LOCK_KEY) == owner:
+                    cache.delete(_WECHAT_TOKEN_LOCK_KEY)
+
+        if time.monotonic() >= deadline:
+            logger.error("等待access_token刷新超时")
+            return None
+        time.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+
+def refresh_access_token_if_expiring():
+    """剩余有效期不足 WECHAT_TOKEN_REFRESH_AHEAD 秒时提前刷新，返回是否发生了刷新"""
+    entry = cache.get(_WECHAT_TOKEN_CACHE_KEY)
+    if entry and entry['expires_at'] - time.time() > settings.WECHAT_TOKEN_REFRESH_AHEAD:
         return False
+    return refresh_wechat_access_token(invalid_token=entry['token'] if entry else None) is not None
+
+
+def failed_log(user_id, template_id, data_dict, error_text):
+    """失败日志（未保存）"""
+    return NotificationLog(
+        user_id=user_id, template_id=template_id, message_data=data_dict,
+        status='failed', error_response=error_text
+    )
+
+
+def success_log(user_id, template_id, data_dict, res_json):
+    """成功日志（未保存）"""
+    return NotificationLog(
+        user_id=user_id, template_id=template_id, message_data=data_dict,
+        status='success', wechat_msg_id=res_json.get('msgid'), sent_at=timezone.now()
+    )
+
 
-    # 1. 原子条件扣减额度（immune to lost-update）
+def reserve_quota(user, template_id, data_dict):
+    """原子条件扣减一次额度（immune to lost-update）；无额度时记录失败日志并返回 False"""
     rows = (
         UserQuota.objects
         .filter(user=user, template_id=template_id, count__gt=0)
         .update(count=F('count') - 1)
     )
     if rows == 0:
-        NotificationLog.objects.create(
-            user=user, template_id=template_id, message_data=data_dict,
-            status='failed', error_response='无可用订阅额度'
-        )
+        failed_log(user.id, template_id, data_dict, QUOTA_EXHAUSTED).save()
         return False
+    return True
+
+
+def reserve_quotas(user_ids, template_id):
+    """批量扣减：锁定仍有额度的行后一条 UPDATE 各扣一次，返回扣减成功的用户 ID 集合"""
+    with transaction.atomic():
+        quotas = list(
+            UserQuota.objects
+            .select_for_update()
+            .filter(user_id__in=user_ids, template_id=template_id, count__gt=0)
+            .values_list('id', 'user_id')
+        )
+        if quotas:
+            UserQuota.objects.filter(id__in=[quota_id for quota_id, _ in quotas]).update(count=F('count') - 1)
+    return {user_id for _, user_id in quotas}
+
 
-    def _refund():
-        UserQuota.objects.filter(user=user, template_id=template_id).update(count=F('count') + 1)
+def refund_quotas(user_ids, template_id):
+    """批量回补：每位用户各回补一次，合并为一条 UPDATE"""
+    if user_ids:
+        UserQuota.objects.filter(user_id__in=user_ids, template_id=template_id).update(count=F('count') + 1)
 
-    # 2. 获取 token
+
+def post_subscribe_message(openid, template_id, page_path, data_dict):
+    """
+    调用订阅消息接口（不访问数据库，可在线程池中执行），token 失效 40001 时刷新重试一次
+    返回微信响应；无法获取 token 时返回带 errmsg 的字典，网络异常直接抛出
+    """
     access_token = get_wechat_access_token()
     if not access_token:
-        _refund()
-        NotificationLog.objects.create(
-            user=user, template_id=template_id, message_data=data_dict,
-            status='failed', error_response='无法获取access_token'
-        )
-        return False
+        return {'errmsg': '无法获取access_token'}
 
     def _do_send(token):
-        url = f"https://api.weixin.qq.com/cgi-bin/message/subscribe/send?access_token={token}"
         payload = {
-            "touser": user.wechat_openid,
+            "touser": openid,
             "template_id": template_id,
             "page": page_path,
             "miniprogram_state": "formal",
             "lang": "zh_CN",
             "data": data_dict,
         }
-        resp = requests.post(url, json=payload, timeout=5)
+        resp = wechat_session().post(
+            f"{settings.WECHAT_API_BASE_URL}/cgi-bin/message/subscribe/send",
+            params={"access_token": token}, json=payload, timeout=settings.WECHAT_HTTP_TIMEOUT,
+        )
         return resp.json()
 
-    # 3. 发送（token 失效 40001 时刷新重试一次）
-    try:
-        res_json = _do_send(access_token)
-        if isinstance(res_json, dict) and res_json.get('errcode') == 40001:
-            access_token = get_wechat_access_token(force_refresh=True)
-            if access_token:
-                res_json = _do_send(access_token)
-    except Exception as e:
-        _refund()
-        NotificationLog.objects.create(
-            user=user, template_id=template_id, message_data=data_dict,
-            status='failed', error_response=str(e)
-        )
-        logger.error("用户 %s 模板 %s 微信接口异常: %s", user.username, template_id, type(e).__name__)
-        return False
+    res_json = _do_send(access_token)
+    if isinstance(res_json, dict) and res_json.get('errcode') == 40001:
+        access_token = refresh_wechat_access_token(invalid_token=access_token)
+        if access_token:
+            res_json = _do_send(access_token)
+    return res_json if isinstance(res_json, dict) else {}
 
-    # 4. 处理结果
-    if not isinstance(res_json, dict):
-        res_json = {}
-    if res_json.get('errcode') == 0:
-        NotificationLog.objects.create(
-            user=user, template_id=template_id, message_data=data_dict,
-            status='success', wechat_msg_id=res_json.get('msgid'), sent_at=timezone.now()
-        )
+
+def retry_delay(attempts):
+    """第 attempts 次尝试失败后的退避秒数：基数按 2 的幂增长，封顶 NOTICE_OUTBOX_RETRY_MAX_SECONDS"""
+    return min(settings.NOTICE_OUTBOX_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1),
+               settings.NOTICE_OUTBOX_RETRY_MAX_SECONDS)
+
+
+def classify_send_result(res_json=None, error=None):
+    """
+    归类一次发送结果，返回 (SEND_SUCCESS/SEND_RETRY/SEND_FAILED, 错误信息)
+    网络异常、无法获取 token、TRANSIENT_ERRCODES 视为暂时失败可重试，其余错误码为永久失败
+    """
+    if error is None and res_json.get('errcode') == 0:
+        return SEND_SUCCESS, ''
+    if error is not None:
+        return SEND_RETRY, str(error) or type(error).__name__
+    errcode = res_json.get('errcode')
+    error_text = res_json.get('errmsg') or ''
+    if errcode is None or errcode in TRANSIENT_ERRCODES:
+        return SEND_RETRY, error_text
+    return SEND_FAILED, error_text
+
+
+def retry_entry(user_id, template_id, page_path, data_dict, error_text):
+    """首次发送暂时失败后转入发件箱重试的记录（未保存），额度保持已扣减"""
+    return NotificationOutbox(
+        user_id=user_id, template_id=template_id, page_path=page_path, message_data=data_dict,
+        attempts=1, last_error=error_text,
+        next_attempt_at=timezone.now() + timedelta(seconds=retry_delay(1)),
+    )
+
+
+def record_send_result(user, template_id, page_path, data_dict, res_json=None, error=None):
+    """记录发送结果：成功写成功日志；暂时失败转入发件箱重试；永久失败回补额度并写失败日志"""
+    outcome, error_text = classify_send_result(res_json=res_json, error=error)
+    if outcome == SEND_SUCCESS:
+        success_log(user.id, template_id, data_dict, res_json).save()
         return True
-    else:
-        _refund()
-        NotificationLog.objects.create(
-            user=user, template_id=template_id, message_data=data_dict,
-            status='failed', error_response=res_json.get('errmsg')
-        )
-        logger.error("用户 %s 模板 %s 推送失败: %s", user.username, template_id, res_json.get('errmsg'))
+    logger.error("用户 %s 模板 %s 推送失败（%s）: %s", user.username, template_id, outcome, error_text)
+    if outcome == SEND_RETRY:
+        retry_entry(user.id, template_id, page_path, data_dict, error_text).save()
         return False
+    UserQuota.objects.filter(user=user, template_id=template_id).update(count=F('count') + 1)
+    failed_log(user.id, template_id, data_dict, error_text).save()
+    return False
+
+
+def send_template_msg(user, template_id, page_path, data_dict):
+    """发送订阅消息：原子扣减额度，token 过期重试一次；暂时失败转入发件箱退避重试，永久失败回补额度"""
+    if not user.wechat_openid:
+        logger.warning("跳过推送: 用户 %s 无 wechat_openid", user.username)
+        return False
+    if not reserve_quota(user, template_id, data_dict):
+        return False
+    try:
+        res_json = post_subscribe_message(user.wechat_openid, template_id, page_path, data_dict)
+    except Exception as e:
+        return record_send_result(user, template_id, page_path, data_dict, error=e)
+    return record_send_result(user, template_id, page_path, data_dict, res_json=res_json)
@@ -1,112 +1,177 @@
 """
-定时任务：情绪测评提醒 - 优化版
-提升性能和健壮性，日志更完善
+定时任务：情绪测评提醒 - 分片版
+派发任务流式计算待提醒用户 ID，按确定的发送偏移归入 ETA 时间桶并按固定人数切分，
+分片任务到点后在 notice 队列上并行写入发件箱，
+汇总任务（chord 回调）统计入队/跳过数；发件箱由 process_notification_outbox 异步排空，增加 worker 即可横向扩展
+批次台账（ReminderRun）租约 + 发件箱逐用户记录保证重试、重复 beat 或接管续跑都不会重复发送
 """
+import uuid
+from collections import Counter
+from datetime import timedelta
 from django.conf import settings
-from celery import shared_task
+from django.db import IntegrityError
+from celery import chord, shared_task
 # 推荐使用 celery.utils.log 来获取任务专用 logger
 from celery.utils.log import get_task_logger 
 from django.utils import timezone
-from datetime import time, timedelta
-# 导入 Q 对象用于更复杂的查询
 from django.contrib.auth import get_user_model
 from apps.emotiontracker.models import EmotionRecord
-from apps.notice.services import send_template_msg
+from apps.notice.models import NotificationOutbox
+from apps.notice.outbox import drain_outbox, enqueue_template_msgs
+from apps.notice.runs import acquire_reminder_run, fail_reminder_run, finish_reminder_run
+from apps.notice.scheduling import eta_buckets
+from apps.notice.services import refresh_access_token_if_expiring
 from typing import Literal
 
 User = get_user_model()
 # 使用任务专用的 logger
 logger = get_task_logger(__name__) 
 
-# 将时间切分点定义为常量，便于维护
-MORNING_END_TIME = time(14, 0, 0) # 14:00:00
 
-def get_time_range_for_period(today, period: Literal['morning', 'evening']):
-    """
-    根据日期和时间段获取查询情绪记录的精确时区时间范围。
-    """
-    tz = timezone.get_current_timezone()
-    
-    if period == "morning":
-        # 早上：今天 00:00:00 到今天 14:00:00 (不包含)
-        start = timezone.make_aware(timezone.datetime.combine(today, time.min), tz)
-        end = timezone.make_aware(timezone.datetime.combine(today, MORNING_END_TIME), tz)
-    elif period == "evening":
-        # 晚上：今天 14:00:00 到明天 00:00:00 (不包含)
-        start = timezone.make_aware(timezone.datetime.combine(today, MORNING_END_TIME), tz)
-        tomorrow = today + timedelta(days=1)
-        end = timezone.make_aware(timezone.datetime.combine(tomorrow, time.min), tz)
-    else:
-        # 兜底逻辑
-        raise ValueError(f"无效的 period 参数: {period}")
-        
-    return start, end
+def _reminder_message(period):
+    page_path = f"pages/mood/moodtest/moodtest?period={period}"
+    thing = "早间情绪测评提醒" if period == "morning" else "晚间情绪测评提醒"
+    return page_path, thing
+
+
+def reminder_user_ids(period, today, run_key=''):
+    """流式返回需要提醒的用户 ID：今日该时段未填写、有 openid、仍有额度且本批次尚未入队"""
+    # record_date/period 在写入时已按本地时间归档，用等值匹配替代 created_at 时间范围
+    filled_user_ids = EmotionRecord.objects.filter(
+        record_date=today,
+        period=period,
+    ).values_list('user_id', flat=True)
+
+    attempted_user_ids = NotificationOutbox.objects.filter(run_key=run_key).values('user_id')
+
+    # (user, template_id) 唯一，关联额度表不会产生重复行，无需 distinct
+    return (
+        User.objects
+        .exclude(id__in=filled_user_ids)
+        .exclude(id__in=attempted_user_ids)
+        .exclude(wechat_openid__isnull=True)
+        .exclude(wechat_openid__exact='')
+        .filter(notice_quotas__template_id=settings.WECHAT_SUBSCRIPTION_TEMPLATES, notice_quotas__count__gt=0)
+        .order_by('id')
+        .values_list('id', flat=True)
+        .iterator(chunk_size=settings.REMINDER_SHARD_SIZE)
+    )
+
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+@shared_task(bind=True)
 def send_mood_reminder(self, period: Literal['morning', 'evening'] = "morning"):
     """
     推送情绪测评提醒（period: 'morning'/'evening'）
-    仅提醒有额度且未测评的用户，日志详细记录
+    先认领当天该时段的批次租约，已完成或被其他实例持有时直接跳过；
+    只查询一次待提醒用户 ID，按发送偏移归入 ETA 时间桶、桶内按 REMINDER_SHARD_SIZE 切分，
+    以 chord 派发延迟执行的分片任务，返回分片数；任一分片异常时由错误回调标记批次派发失败
     """
     task_id = self.request.id
     logger.info(f"[{task_id}] 开始处理 {period} 情绪测评提醒任务.")
-    
+
+    if period not in (EmotionRecord.PERIOD_MORNING, EmotionRecord.PERIOD_EVENING):
+        raise ValueError(f"无效的 period 参数: {period}")
+
     now = timezone.localtime()
-    today = now.date()
-    template_id = settings.WECHAT_SUBSCRIPTION_TEMPLATES
-    page_path = f"pages/mood/moodtest/moodtest?period={period}"
-    thing = "早间情绪测评提醒" if period == "morning" else "晚间情绪测评提醒"
-    
-    start_time, end_time = get_time_range_for_period(today, period)
+    # Celery 重试沿用同一任务 ID，可重新认领自己的租约；直接调用时没有任务 ID。
+    # 租约需覆盖打散窗口，最后一个时间桶入队前不允许其他实例接管
+    run = acquire_reminder_run(
+        now.date(), period, settings.WECHAT_SUBSCRIPTION_TEMPLATES, task_id or uuid.uuid4().hex,
+        lease_seconds=settings.REMINDER_RUN_LEASE_SECONDS + settings.REMINDER_SPREAD_MINUTES * 60,
+    )
+    if run is None:
+        logger.info(f"[{task_id}] {now.date()} {period} 提醒批次已完成或正由其他实例派发，跳过.")
+        return 0
 
-    # **性能优化：通过数据库查询排除已填写用户 (减少 Python 循环中的 DB 查询)**
-    
-    # 1. 过滤掉在指定时间段内已填写情绪记录的用户 ID
-    filled_user_ids = EmotionRecord.objects.filter(
-        created_at__gte=start_time,
-        created_at__lt=end_time
-    ).values_list('user_id', flat=True).distinct()
-
-    # 2. 筛选需要提醒的用户: 
-    #    - 排除已填写用户 ID
-    #    - 考虑过滤有额度的用户 (如果启用)
-    users_to_remind = (
-        User.objects
-        .exclude(id__in=filled_user_ids)
-        .exclude(wechat_openid__isnull=True)
-        .exclude(wechat_openid__exact='')
-        .filter(notice_quotas__template_id=template_id, notice_quotas__count__gt=0)
-        .distinct()
+    user_ids = reminder_user_ids(period, now.date(), run.run_key)
+    shards = []
+    bucket_sizes = Counter()
+    for countdown, shard in eta_buckets(user_ids, period, now):
+        sent_time = (now + timedelta(seconds=countdown)).strftime('%Y-%m-%d %H:%M')
+        shards.append(send_mood_reminder_shard.s(period, shard, sent_time, run.run_key).set(countdown=countdown))
+        bucket_sizes[countdown] += len(shard)
+
+    logger.info(
+        f"[{task_id}] 共有 {sum(bucket_sizes.values())} 位用户需要发送 {period} 提醒，"
+        f"派发 {len(shards)} 个分片，分布在 {len(bucket_sizes)} 个时间桶（最大桶 {max(bucket_sizes.values(), default=0)} 人）."
     )
-    
-    logger.info(f"[{task_id}] 共有 {users_to_remind.count()} 位用户需要发送 {period} 提醒.")
+    if shards:
+        chord(shards)(summarize_mood_reminder.s(period, run.id).on_error(fail_mood_reminder.s(run.id)))
+    else:
+        finish_reminder_run(run.id, 0, 0, 0)
+    return len(shards)
+
+
+@shared_task(bind=True)
+def send_mood_reminder_shard(self, period, user_ids, sent_time, run_key=''):
+    """
+    将一个分片的提醒写入发件箱（额度一次扣减）并触发排空，返回 [入队数, 跳过数]
+    本批次已入队的用户计入跳过，分片重复执行不会重复发送；实际发送由 process_notification_outbox 异步完成
+    """
+    page_path, thing = _reminder_message(period)
+
+    def _enqueue():
+        return enqueue_template_msgs(
+            User.objects.filter(id__in=user_ids).only('id', 'username', 'wechat_openid'),
+            template_id=settings.WECHAT_SUBSCRIPTION_TEMPLATES,
+            page_path=page_path,
+            data_dict={
+                'thing1': {'value': thing},
+                'time2': {'value': sent_time}
+            },
+            run_key=run_key,
+        )
 
-    successful_count = 0
-    failed_count = 0
-    
-    for user in users_to_remind:
+    try:
+        enqueued, skipped = _enqueue()
+    except IntegrityError:
+        # 与并发执行的同一分片撞上 (run_key, user) 唯一约束，本次事务整体回滚；
+        # 对方已提交的用户在重新入队时计入跳过，其余用户照常入队
+        logger.warning(f"[{self.request.id}] {period} 提醒分片与并发实例冲突，重新入队.")
         try:
-            # 内部业务逻辑（如：检查用户是否订阅、额度扣减等）应该在 send_template_msg 中处理
-            result = send_template_msg(
-                user=user,
-                template_id=template_id,
-                page_path=page_path,
-                data_dict={
-                    'thing1': {'value': thing},
-                    'time2': {'value': now.strftime('%Y-%m-%d %H:%M')}
-                }
-            )
-            
-            # 记录成功日志
-            logger.info(f"[{task_id}] 成功推送 {period} 提醒给 {user.username} (ID: {user.id})，结果: {result}")
-            successful_count += 1
-            
-        except Exception as e:
-            # 记录失败日志，包含任务 ID，便于回溯
-            logger.error(
-                f"[{task_id}] 推送 {period} 提醒给 {user.username} (ID: {user.id}) 失败: {e}",
-                exc_info=True # 打印堆栈信息，提升健壮性
-            )
-            failed_count += 1
-            
-    logger.info(f"[{task_id}] {period} 情绪测评提醒任务完成. 成功: {successful_count}, 失败: {failed_count}.")
\ No newline at end of file
+            enqueued, skipped = _enqueue()
+        except IntegrityError:
+            logger.warning(f"[{self.request.id}] {period} 提醒分片再次冲突，整片计入跳过.")
+            enqueued, skipped = 0, len(user_ids)
+    logger.info(f"[{self.request.id}] {period} 提醒分片已入队. 入队: {enqueued}, 跳过: {skipped}.")
+    if enqueued:
+        process_notification_outbox.delay()
+    return [enqueued, skipped]
+
+
+@shared_task
+def summarize_mood_reminder(shard_results, period, run_id=None):
+    """chord 回调：汇总各分片的入队/跳过数并标记批次完成"""
+    enqueued = sum(result[0] for result in shard_results)
+    skipped = sum(result[1] for result in shard_results)
+    if run_id is not None:
+        finish_reminder_run(run_id, len(shard_results), enqueued, skipped)
+    logger.info(
+        f"{period} 情绪测评提醒任务完成. 分片: {len(shard_results)}, 入队: {enqueued}, 跳过: {skipped}."
+    )
+    return {'shards': len(shard_results), 'enqueued': enqueued, 'skipped': skipped}
+
+
+@shared_task
+def fail_mood_reminder(request, exc, traceback, run_id):
+    """chord 错误回调：分片异常时汇总不会执行，标记批次派发失败并释放租约"""
+    logger.error(f"情绪测评提醒批次 {run_id} 分片失败: {exc!r}，已标记为派发失败，重新派发即可续跑.")
+    fail_reminder_run(run_id)
+
+
+@shared_task
+def process_notification_outbox():
+    """排空发件箱中到期的消息；多个 worker 可同时执行（SKIP LOCKED 认领互不重叠）"""
+    totals = drain_outbox()
+    if any(totals.values()):
+        logger.info(f"发件箱排空完成. 成功: {totals['sent']}, 待重试: {totals['retry']}, 死信: {totals['dead']}.")
+    return totals
+
+
+@shared_task
+def refresh_wechat_token():
+    """定时任务：access_token 临近过期时提前刷新，避免发送高峰期集中刷新"""
+    refreshed = refresh_access_token_if_expiring()
+    if refreshed:
+        logger.info("微信 access_token 已提前刷新.")
+    return refreshed
@@ -0,0 +1,65 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.notice import services
+from apps.notice.fake_wechat import FakeWechatServer
+from apps.notice.tasks import refresh_wechat_token
+
+
+class AccessTokenSingleFlightTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_token = mock.patch.object(services, "_local_token", None)
+        local_token.start()
+        self.addCleanup(local_token.stop)
+        self.server = FakeWechatServer(token_latency=0.2).start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(WECHAT_API_BASE_URL=self.server.base_url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _concurrently(self, func, callers=20):
+        barrier = threading.Barrier(callers)
+        results = []
+
+        def call():
+            barrier.wait()
+            results.append(func())
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_cache_miss_fetches_once(self):
+        tokens = self._concurrently(services.get_wechat_access_token)
+        self.assertEqual(self.server.token_requests, 1)
+        self.assertEqual(set(tokens), {"fake-token-1"})
+
+    def test_concurrent_invalid_token_refreshes_once(self):
+        stale = services.get_wechat_access_token()
+        tokens = self._concurrently(lambda: services.refresh_wechat_access_token(invalid_token=stale))
+        self.assertEqual(self.server.token_requests, 2)
+        self.assertEqual(set(tokens), {"fake-token-2"})
+
+    def test_local_copy_skips_cache_round_trip(self):
+        services.get_wechat_access_token()
+        with mock.patch.object(services.cache, "get") as cache_get:
+            self.assertEqual(services.get_wechat_access_token(), "fake-token-1")
+        cache_get.assert_not_called()
+
+    def test_beat_task_refreshes_only_when_expiring(self):
+        services.get_wechat_access_token()
+        self.assertFalse(refresh_wechat_token())
+        entry = cache.get(services._WECHAT_TOKEN_CACHE_KEY)
+        entry["expires_at"] = time.time() + 60
+        cache.set(services._WECHAT_TOKEN_CACHE_KEY, entry)
+        self.assertTrue(refresh_wechat_token())
+        self.assertEqual(self.server.token_requests, 2)
+        self.assertEqual(services.get_wechat_access_token(), "fake-token-2")
@@ -0,0 +1,145 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.notice import services
+from apps.notice import dispatcher
+from apps.notice.dispatcher import SharedRateLimiter, TokenBucket
+from apps.notice.fake_wechat import FakeWechatServer
+from apps.notice.models import NotificationLog, UserQuota
+from apps.notice.outbox import drain_outbox, enqueue_template_msgs
+from apps.notice.services import send_template_msg
+from apps.notice.tasks import send_mood_reminder
+
+User = get_user_model()
+TEMPLATE_ID = "tmpl-reminder"
+DATA = {'thing1': {'value': "早间情绪测评提醒"}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ReminderDispatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_token = mock.patch.object(services, "_local_token", None)
+        local_token.start()
+        self.addCleanup(local_token.stop)
+        self.server = FakeWechatServer(latency=0.02, refuse_openids={"openid-refuse"}).start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(
+            WECHAT_API_BASE_URL=self.server.base_url, WECHAT_SUBSCRIPTION_TEMPLATES=TEMPLATE_ID,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _users(self, openids, quota=1):
+        users = []
+        for openid in openids:
+            user = User.objects.create(username=f"user_{openid}", wechat_openid=openid, role="user")
+            UserQuota.objects.create(user=user, template_id=TEMPLATE_ID, count=quota)
+            users.append(user)
+        return users
+
+    def _quota(self, user):
+        return UserQuota.objects.get(user=user, template_id=TEMPLATE_ID).count
+
+    def _send(self, users):
+        enqueue_template_msgs(users, TEMPLATE_ID, "pages/index", DATA)
+        return drain_outbox()
+
+    def test_expired_token_is_refreshed_once(self):
+        first, second = self._users(["openid-a", "openid-b"])
+        self._send([first])
+        self.server.invalidate_tokens()
+        self.assertEqual(self._send([second])['sent'], 1)
+        self.assertEqual(self.server.token_requests, 2)
+
+    @override_settings(WECHAT_SEND_CONCURRENCY=4, WECHAT_SEND_QPS=1000)
+    def test_requests_run_concurrently_within_bound(self):
+        users = self._users([f"openid-{idx}" for idx in range(12)])
+        self.assertEqual(self._send(users), {'sent': 12, 'retry': 0, 'dead': 0})
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(self.server.max_in_flight, 4)
+        self.assertEqual(UserQuota.objects.filter(template_id=TEMPLATE_ID, count=0).count(), 12)
+
+    @override_settings(WECHAT_SEND_QPS=1000)
+    def test_database_writes_do_not_grow_with_users(self):
+        def writes(openids):
+            users = self._users(openids)
+            with CaptureQueriesContext(connection) as queries:
+                self._send(users)
+            return len(queries)
+
+        # 两批各有一位拒收用户，回补与失败日志的写入条数相同
+        self.server.refuse_openids.add("openid-refuse2")
+        few = writes(["openid-refuse", "openid-f1"])
+        many = writes(["openid-refuse2", *[f"openid-m{idx}" for idx in range(10)]])
+        self.assertEqual(few, many)
+        self.assertEqual(NotificationLog.objects.filter(status='success').count(), 11)
+
+    def test_single_send_path_keeps_per_message_writes(self):
+        ok, refused = self._users(["openid-single", "openid-refuse"])
+        self.assertTrue(send_template_msg(ok, TEMPLATE_ID, "pages/index", DATA))
+        self.assertFalse(send_template_msg(refused, TEMPLATE_ID, "pages/index", DATA))
+        self.assertEqual((self._quota(ok), self._quota(refused)), (0, 1))
+        self.assertEqual(NotificationLog.objects.get(user=refused).status, 'failed')
+
+    def test_send_mood_reminder_delivers_through_outbox(self):
+        self._users(["openid-x", "openid-y"])
+        send_mood_reminder.apply(args=("morning",))
+        self.assertEqual(sorted(self.server.sent_to), ["openid-x", "openid-y"])
+        self.assertEqual(NotificationLog.objects.filter(status='success').count(), 2)
+
+
+class TokenBucketTests(TestCase):
+    def test_rate_limits_after_burst(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, burst=2, clock=clock, sleep=clock.sleep)
+        for _ in range(6):
+            bucket.acquire()
+        # 前 2 个令牌来自初始容量，其余 4 个每个需等待 0.1 秒
+        self.assertAlmostEqual(clock.now, 0.4)
+        self.assertEqual(len(clock.sleeps), 4)
+
+    def test_bucket_is_shared_across_batches(self):
+        # 同一进程的各批次共用一个令牌桶，连续排空时不会每批重新获得突发额度
+        with override_settings(WECHAT_SEND_QPS=7):
+            bucket, limiter = dispatcher.send_limiters()
+            self.assertIs(dispatcher.send_limiters()[0], bucket)
+            self.assertEqual((bucket.rate, limiter.limit), (7.0, 7))
+        with override_settings(WECHAT_SEND_QPS=9):
+            self.assertIsNot(dispatcher.send_limiters()[0], bucket)
+
+
+class SharedRateLimiterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_limit_holds_across_limiters(self):
+        # 两个限速器模拟两个 worker 进程，共用缓存中的每秒计数
+        clock = FakeClock()
+        clock.now = 100.25
+        first, second = [SharedRateLimiter(2, clock=clock, sleep=clock.sleep) for _ in range(2)]
+        first.acquire()
+        second.acquire()
+        self.assertEqual(clock.sleeps, [])
+        first.acquire()
+        self.assertAlmostEqual(clock.now, 101.0)
+        second.acquire()
+        second.acquire()
+        self.assertAlmostEqual(clock.now, 102.0)
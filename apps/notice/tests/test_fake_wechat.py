@@ -0,0 +1,52 @@
+from io import StringIO
+from unittest import mock
+
+import requests
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from apps.notice import services
+from apps.notice.fake_wechat import ERRCODE_RATE_LIMITED, FakeWechatServer
+from apps.notice.models import NotificationLog
+from apps.users.wechat_auth import WeChatAuthService
+
+
+class FakeWechatServerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_token = mock.patch.object(services, "_local_token", None)
+        local_token.start()
+        self.addCleanup(local_token.stop)
+
+    def _send(self, server, openid):
+        token = requests.get(f"{server.base_url}/cgi-bin/token", timeout=5).json()["access_token"]
+        return requests.post(
+            f"{server.base_url}/cgi-bin/message/subscribe/send", params={"access_token": token},
+            json={"touser": openid}, timeout=5,
+        ).json()
+
+    def test_rate_limit_and_injected_errors(self):
+        with FakeWechatServer(rate_limit=2) as server:
+            errcodes = [self._send(server, f"openid-{idx}")["errcode"] for idx in range(6)]
+        # 6 个请求最多跨两个秒级窗口，每个窗口只受理 2 个
+        self.assertGreaterEqual(errcodes.count(ERRCODE_RATE_LIMITED), 2)
+        self.assertEqual(server.rate_limited, errcodes.count(ERRCODE_RATE_LIMITED))
+
+        with FakeWechatServer(error_rate=1.0, error_code=45015) as server:
+            self.assertEqual(self._send(server, "openid-x")["errcode"], 45015)
+
+    def test_login_uses_configured_base_url(self):
+        with FakeWechatServer() as server, override_settings(WECHAT_API_BASE_URL=server.base_url):
+            self.assertEqual(WeChatAuthService().get_access_token("abc")["openid"], "openid-abc")
+            with self.assertRaises(Exception):
+                WeChatAuthService().get_access_token("invalid-code")
+        self.assertEqual(server.login_requests, 2)
+
+    def test_load_harness_reports_latency_and_rolls_back(self):
+        out = StringIO()
+        call_command("loadtest_reminders", users=5, latency=0, jitter=0, shard_size=2, stdout=out)
+        output = out.getvalue()
+        self.assertIn("分片 3，发送请求 5，成功 5，失败 0", output)
+        self.assertIn("p99", output)
+        self.assertFalse(NotificationLog.objects.exists())
@@ -0,0 +1,120 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.notice import services
+from apps.notice.fake_wechat import FakeWechatServer
+from apps.notice.models import NotificationLog, NotificationOutbox, UserQuota
+from apps.notice.outbox import claim_due, drain_outbox, enqueue_template_msgs, requeue_dead
+from apps.notice.services import send_template_msg
+
+User = get_user_model()
+TEMPLATE_ID = "tmpl-outbox"
+DATA = {'thing1': {'value': "早间情绪测评提醒"}}
+
+
+@override_settings(NOTICE_OUTBOX_MAX_ATTEMPTS=3, NOTICE_OUTBOX_RETRY_BASE_SECONDS=60)
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_token = mock.patch.object(services, "_local_token", None)
+        local_token.start()
+        self.addCleanup(local_token.stop)
+
+    def _serve(self, **kwargs):
+        server = FakeWechatServer(**kwargs).start()
+        self.addCleanup(server.stop)
+        settings_override = override_settings(WECHAT_API_BASE_URL=server.base_url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        return server
+
+    def _enqueue(self, *openids, quota=1):
+        users = []
+        for openid in openids:
+            user = User.objects.create(username=f"user_{openid}", wechat_openid=openid, role="user")
+            UserQuota.objects.create(user=user, template_id=TEMPLATE_ID, count=quota)
+            users.append(user)
+        return users, enqueue_template_msgs(users, TEMPLATE_ID, "pages/index", DATA)
+
+    def _quota(self, user):
+        return UserQuota.objects.get(user=user, template_id=TEMPLATE_ID).count
+
+    def _make_due(self):
+        NotificationOutbox.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+    def test_enqueue_reserves_quota_and_drain_delivers(self):
+        self._serve(refuse_openids={"openid-refuse"})
+        (ok, refused, empty), counts = self._enqueue("openid-ok", "openid-refuse", "openid-empty")
+        UserQuota.objects.filter(user=empty).update(count=0)
+        self.assertEqual(counts, (3, 0))
+        self.assertEqual(self._quota(ok), 0)
+
+        self.assertEqual(drain_outbox(), {'sent': 2, 'retry': 0, 'dead': 1})
+        self.assertEqual(NotificationOutbox.objects.get(user=ok).status, NotificationOutbox.STATUS_SENT)
+        # 43101 为永久失败：直接转为死信并回补额度
+        dead = NotificationOutbox.objects.get(user=refused)
+        self.assertEqual((dead.status, dead.attempts), (NotificationOutbox.STATUS_DEAD, 1))
+        self.assertEqual(self._quota(refused), 1)
+        self.assertEqual(NotificationLog.objects.get(user=refused).status, 'failed')
+        self.assertEqual(NotificationLog.objects.filter(status='success').count(), 2)
+
+    def test_enqueue_without_quota_logs_failure(self):
+        (user,), counts = self._enqueue("openid-none", quota=0)
+        self.assertEqual(counts, (0, 1))
+        self.assertFalse(NotificationOutbox.objects.exists())
+        self.assertEqual(NotificationLog.objects.get(user=user).error_response, services.QUOTA_EXHAUSTED)
+
+    def test_transient_errors_back_off_then_dead_letter(self):
+        self._serve(error_rate=1.0, error_code=-1)
+        (user,), _ = self._enqueue("openid-busy")
+
+        self.assertEqual(drain_outbox(), {'sent': 0, 'retry': 1, 'dead': 0})
+        entry = NotificationOutbox.objects.get(user=user)
+        self.assertEqual((entry.status, entry.attempts), (NotificationOutbox.STATUS_PENDING, 1))
+        self.assertGreater(entry.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        # 未到期的重试不会被认领
+        self.assertEqual(drain_outbox(), {'sent': 0, 'retry': 0, 'dead': 0})
+
+        self._make_due()
+        drain_outbox()
+        entry.refresh_from_db()
+        # 第二次退避翻倍
+        self.assertGreater(entry.next_attempt_at, timezone.now() + timedelta(seconds=110))
+        self._make_due()
+        self.assertEqual(drain_outbox(), {'sent': 0, 'retry': 0, 'dead': 1})
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), (NotificationOutbox.STATUS_DEAD, 3))
+        self.assertEqual(self._quota(user), 1)
+
+        self.assertEqual(requeue_dead(NotificationOutbox.objects.all()), 1)
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), (NotificationOutbox.STATUS_PENDING, 0))
+        self.assertEqual(self._quota(user), 0)
+
+    def test_expired_lease_is_reclaimed(self):
+        self._enqueue("openid-a", "openid-b")
+        self.assertEqual(len(claim_due(10)), 2)
+        # 租约未到期时其他 worker 认领不到
+        self.assertEqual(claim_due(10), [])
+        self._make_due()
+        reclaimed = claim_due(1)
+        self.assertEqual(len(reclaimed), 1)
+        self.assertEqual(reclaimed[0].attempts, 2)
+
+    def test_single_send_transient_failure_moves_to_outbox(self):
+        self._serve(error_rate=1.0, error_code=45009)
+        user = User.objects.create(username="user_single", wechat_openid="openid-single", role="user")
+        UserQuota.objects.create(user=user, template_id=TEMPLATE_ID, count=1)
+        self.assertFalse(send_template_msg(user, TEMPLATE_ID, "pages/index", DATA))
+        entry = NotificationOutbox.objects.get(user=user)
+        self.assertEqual(
+            (entry.status, entry.attempts, entry.page_path), (NotificationOutbox.STATUS_PENDING, 1, "pages/index")
+        )
+        # 额度保持已扣减，等待重试
+        self.assertEqual(self._quota(user), 0)
+        self.assertFalse(NotificationLog.objects.exists())
@@ -0,0 +1,72 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.emotiontracker.models import EmotionRecord
+from apps.notice import services, tasks
+from apps.notice.fake_wechat import FakeWechatServer
+from apps.notice.models import NotificationLog, UserQuota
+
+User = get_user_model()
+TEMPLATE_ID = "tmpl-fanout"
+
+
+@override_settings(WECHAT_SUBSCRIPTION_TEMPLATES=TEMPLATE_ID, REMINDER_SHARD_SIZE=2, REMINDER_SPREAD_MINUTES=0)
+class ReminderFanOutTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_token = mock.patch.object(services, "_local_token", None)
+        local_token.start()
+        self.addCleanup(local_token.stop)
+        self.users = []
+        for idx in range(5):
+            user = User.objects.create(username=f"fanout_{idx}", wechat_openid=f"openid-{idx}", role="user")
+            UserQuota.objects.create(user=user, template_id=TEMPLATE_ID, count=1)
+            self.users.append(user)
+        # 今日已填写、无额度、无 openid 的用户都不提醒
+        EmotionRecord.objects.create(
+            user_id=self.users[0].id, record_date=timezone.localdate(), period=EmotionRecord.PERIOD_MORNING,
+            depression=1, anxiety=1, energy=1, sleep=1,
+        )
+        EmotionRecord.objects.create(
+            user_id=self.users[1].id, record_date=timezone.localdate() - timedelta(days=1),
+            period=EmotionRecord.PERIOD_MORNING, depression=1, anxiety=1, energy=1, sleep=1,
+        )
+        UserQuota.objects.filter(user=self.users[4]).update(count=0)
+        no_openid = User.objects.create(username="fanout_no_openid", role="user")
+        UserQuota.objects.create(user=no_openid, template_id=TEMPLATE_ID, count=1)
+
+    def test_eligible_ids_are_queried_once_and_split_into_shards(self):
+        with mock.patch.object(tasks, "chord") as fake_chord, CaptureQueriesContext(connection) as queries:
+            self.assertEqual(tasks.send_mood_reminder.apply(args=("morning",)).get(), 2)
+        # 待提醒用户只查询一次（其余为批次台账的认领）
+        self.assertEqual(sum('notice_userquota' in query['sql'] for query in queries.captured_queries), 1)
+        shards, = fake_chord.call_args.args
+        self.assertEqual([len(signature.args[1]) for signature in shards], [2, 1])
+        self.assertEqual(
+            {user_id for signature in shards for user_id in signature.args[1]},
+            {str(user.id) for user in self.users[1:4]},
+        )
+        self.assertEqual({signature.args[0] for signature in shards}, {"morning"})
+
+    def test_shards_send_and_summary_aggregates(self):
+        with FakeWechatServer() as server, override_settings(WECHAT_API_BASE_URL=server.base_url):
+            tasks.send_mood_reminder.apply(args=("morning",))
+        self.assertEqual(sorted(server.sent_to), ["openid-1", "openid-2", "openid-3"])
+        self.assertEqual(NotificationLog.objects.filter(status='success').count(), 3)
+        self.assertEqual(
+            tasks.summarize_mood_reminder([[2, 0], [0, 1]], "morning"),
+            {'shards': 2, 'enqueued': 2, 'skipped': 1},
+        )
+
+    def test_no_eligible_users_dispatches_nothing(self):
+        UserQuota.objects.update(count=0)
+        with mock.patch.object(tasks, "chord") as fake_chord:
+            self.assertEqual(tasks.send_mood_reminder.apply(args=("evening",)).get(), 0)
+        fake_chord.assert_not_called()
@@ -0,0 +1,102 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.notice import services, tasks
+from apps.notice.fake_wechat import FakeWechatServer
+from apps.notice.models import NotificationLog, NotificationOutbox, ReminderRun, UserQuota
+from apps.notice.outbox import enqueue_template_msgs
+from apps.notice.runs import acquire_reminder_run
+
+User = get_user_model()
+TEMPLATE_ID = "tmpl-runs"
+
+
+@override_settings(WECHAT_SUBSCRIPTION_TEMPLATES=TEMPLATE_ID, REMINDER_SHARD_SIZE=2, REMINDER_SPREAD_MINUTES=0)
+class ReminderRunTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_token = mock.patch.object(services, "_local_token", None)
+        local_token.start()
+        self.addCleanup(local_token.stop)
+        self.server = FakeWechatServer().start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(WECHAT_API_BASE_URL=self.server.base_url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.users = []
+        for idx in range(3):
+            user = User.objects.create(username=f"run_{idx}", wechat_openid=f"openid-{idx}", role="user")
+            # 额度充足时重复派发也会扣减，用于验证不重复发送
+            UserQuota.objects.create(user=user, template_id=TEMPLATE_ID, count=5)
+            self.users.append(user)
+
+    def _run(self, task_id):
+        return tasks.send_mood_reminder.apply(args=("morning",), task_id=task_id).get()
+
+    def test_second_instance_and_rerun_do_not_resend(self):
+        self.assertEqual(self._run("beat-a"), 2)
+        run = ReminderRun.objects.get()
+        self.assertEqual((run.status, run.enqueued, run.shards), (ReminderRun.STATUS_DONE, 3, 2))
+        # 重复 beat 或同一任务重试：批次已完成，直接跳过
+        self.assertEqual(self._run("beat-b"), 0)
+        self.assertEqual(self._run("beat-a"), 0)
+        self.assertEqual(len(self.server.sent_to), 3)
+        self.assertEqual(UserQuota.objects.filter(template_id=TEMPLATE_ID, count=4).count(), 3)
+
+    def test_lease_blocks_other_owner_until_expiry(self):
+        today = timezone.localdate()
+        self.assertIsNotNone(acquire_reminder_run(today, "morning", TEMPLATE_ID, "beat-a"))
+        self.assertIsNone(acquire_reminder_run(today, "morning", TEMPLATE_ID, "beat-b"))
+        # 同一任务重试可重新认领
+        self.assertIsNotNone(acquire_reminder_run(today, "morning", TEMPLATE_ID, "beat-a"))
+        ReminderRun.objects.update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(acquire_reminder_run(today, "morning", TEMPLATE_ID, "beat-b").owner, "beat-b")
+
+    def test_takeover_only_processes_users_not_yet_attempted(self):
+        # 模拟崩溃的实例：认领租约并入队了第一位用户后失联
+        run = acquire_reminder_run(timezone.localdate(), "morning", TEMPLATE_ID, "crashed")
+        enqueue_template_msgs(self.users[:1], TEMPLATE_ID, "pages/index", {}, run_key=run.run_key)
+        ReminderRun.objects.update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self._run("beat-b"), 1)
+        self.assertEqual(NotificationOutbox.objects.filter(run_key=run.run_key).count(), 3)
+        self.assertEqual(sorted(self.server.sent_to), ["openid-0", "openid-1", "openid-2"])
+        self.assertEqual(NotificationLog.objects.filter(status='success').count(), 3)
+
+    def test_repeated_shard_is_idempotent(self):
+        first = enqueue_template_msgs(self.users, TEMPLATE_ID, "pages/index", {}, run_key="2026-01-01:morning:x")
+        again = enqueue_template_msgs(self.users, TEMPLATE_ID, "pages/index", {}, run_key="2026-01-01:morning:x")
+        self.assertEqual((first, again), ((3, 0), (0, 3)))
+        self.assertEqual(UserQuota.objects.filter(template_id=TEMPLATE_ID, count=4).count(), 3)
+
+    def test_shard_conflict_is_reenqueued_instead_of_raising(self):
+        user_ids = [str(user.id) for user in self.users]
+        with mock.patch.object(tasks, "enqueue_template_msgs", side_effect=[IntegrityError, (1, 2)]) as enqueue:
+            self.assertEqual(tasks.send_mood_reminder_shard.apply(args=("morning", user_ids, "t", "k")).get(), [1, 2])
+        self.assertEqual(enqueue.call_count, 2)
+        with mock.patch.object(tasks, "enqueue_template_msgs", side_effect=IntegrityError):
+            self.assertEqual(tasks.send_mood_reminder_shard.apply(args=("morning", user_ids, "t", "k")).get(), [0, 3])
+
+    def test_failed_shard_marks_run_failed_and_rerun_resumes(self):
+        with mock.patch.object(tasks, "chord") as fake_chord:
+            self._run("beat-a")
+        run = ReminderRun.objects.get()
+        callback = fake_chord.return_value.call_args.args[0]
+        errback, = callback.options["link_error"]
+        self.assertEqual((errback["task"], tuple(errback["args"])), (tasks.fail_mood_reminder.name, (run.id,)))
+
+        # 分片异常时 chord 调用错误回调，参数为 (request, exc, traceback, run_id)
+        tasks.fail_mood_reminder(None, RuntimeError("shard lost"), None, run.id)
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.owner, run.lease_expires_at), (ReminderRun.STATUS_FAILED, "", None))
+
+        self.assertEqual(self._run("beat-b"), 2)
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.enqueued), (ReminderRun.STATUS_DONE, 3))
+        self.assertEqual(len(self.server.sent_to), 3)
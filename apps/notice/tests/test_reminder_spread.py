@@ -0,0 +1,92 @@
+import uuid
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.emotiontracker.models import EmotionRecord
+from apps.notice import tasks
+from apps.notice.models import UserQuota
+from apps.notice.scheduling import eta_buckets, spread_offsets
+
+User = get_user_model()
+TEMPLATE_ID = "tmpl-spread"
+NOW = timezone.make_aware(datetime(2026, 3, 10, 9, 0))
+
+
+@override_settings(
+    REMINDER_SPREAD_MINUTES=30, REMINDER_SPREAD_BUCKET_MINUTES=5, REMINDER_SHARD_SIZE=50,
+    REMINDER_SPREAD_STRATEGY='history', REMINDER_HABIT_LEAD_MINUTES=10,
+)
+class ReminderSpreadTests(TestCase):
+    def _history(self, user_id, hour, minute, days=3):
+        for offset in range(1, days + 1):
+            day = NOW.date() - timedelta(days=offset)
+            started_at = timezone.make_aware(datetime(day.year, day.month, day.day, hour, minute))
+            EmotionRecord.objects.create(
+                user_id=user_id, record_date=day, period=EmotionRecord.PERIOD_MORNING,
+                depression=1, anxiety=1, energy=1, sleep=1,
+                started_at=started_at,
+            )
+
+    def test_offsets_follow_history_and_fall_back_to_hash(self):
+        habitual, early, late, new = (uuid.uuid4() for _ in range(4))
+        self._history(habitual, 9, 25)
+        self._history(early, 7, 30)
+        self._history(late, 11, 0)
+        offsets = dict(spread_offsets([habitual, early, late, new], EmotionRecord.PERIOD_MORNING, NOW))
+        # 惯常 9:25 开始作答，提前 10 分钟在 9:15 发送
+        self.assertEqual(offsets[habitual], 15 * 60)
+        # 惯常时刻落在窗口外的用户与无历史的用户一样按散列打散，不堆积在窗口两端
+        self.assertEqual(offsets[early], early.int % (30 * 60))
+        self.assertEqual(offsets[late], late.int % (30 * 60))
+        self.assertEqual(offsets[new], new.int % (30 * 60))
+        # 偏移对同一用户是确定的
+        self.assertEqual(dict(spread_offsets([new], EmotionRecord.PERIOD_MORNING, NOW))[new], offsets[new])
+
+    def test_buckets_flatten_the_burst(self):
+        user_ids = [uuid.uuid4() for _ in range(600)]
+        buckets = eta_buckets(user_ids, EmotionRecord.PERIOD_MORNING, NOW)
+        countdowns = sorted({countdown for countdown, _ in buckets})
+        self.assertEqual(countdowns, [minute * 60 for minute in range(0, 30, 5)])
+        self.assertEqual(sum(len(ids) for _, ids in buckets), 600)
+        self.assertTrue(all(len(ids) <= 50 for _, ids in buckets))
+        per_bucket = [sum(len(ids) for countdown, ids in buckets if countdown == c) for c in countdowns]
+        # 均匀散列下每个桶约 100 人，远低于一次性派发的 600 人
+        self.assertLess(max(per_bucket), 150)
+
+    def test_engaged_users_answering_right_after_reminder_are_spread(self):
+        # 大量用户习惯在 9:05 作答（提醒发出后立即作答），减去提前量后早于提醒时刻
+        user_ids = [uuid.uuid4() for _ in range(300)]
+        for user_id in user_ids:
+            self._history(user_id, 9, 5, days=1)
+        buckets = eta_buckets(user_ids, EmotionRecord.PERIOD_MORNING, NOW)
+        per_bucket = {}
+        for countdown, ids in buckets:
+            per_bucket[countdown] = per_bucket.get(countdown, 0) + len(ids)
+        self.assertEqual(len(per_bucket), 6)
+        self.assertLess(per_bucket[0], 100)
+
+    @override_settings(REMINDER_SPREAD_MINUTES=0)
+    def test_zero_window_sends_everything_now(self):
+        buckets = eta_buckets([uuid.uuid4() for _ in range(120)], EmotionRecord.PERIOD_MORNING, NOW)
+        self.assertEqual([(countdown, len(ids)) for countdown, ids in buckets], [(0, 50), (0, 50), (0, 20)])
+
+    @override_settings(WECHAT_SUBSCRIPTION_TEMPLATES=TEMPLATE_ID)
+    def test_task_dispatches_delayed_shards(self):
+        for idx in range(20):
+            user = User.objects.create(username=f"spread_{idx}", wechat_openid=f"openid-{idx}", role="user")
+            UserQuota.objects.create(user=user, template_id=TEMPLATE_ID, count=1)
+        with mock.patch.object(tasks, "chord") as fake_chord, \
+                mock.patch.object(tasks.timezone, "localtime", return_value=NOW):
+            tasks.send_mood_reminder.apply(args=("morning",))
+        shards, = fake_chord.call_args.args
+        countdowns = [signature.options["countdown"] for signature in shards]
+        self.assertGreater(len(set(countdowns)), 1)
+        self.assertTrue(all(0 <= countdown < 30 * 60 for countdown in countdowns))
+        # 消息中的提醒时间与实际发送时间一致
+        for signature in shards:
+            expected = (NOW + timedelta(seconds=signature.options["countdown"])).strftime('%Y-%m-%d %H:%M')
+            self.assertEqual(signature.args[2], expected)
@@ -3,7 +3,8 @@ from django.contrib import admin
 from django.utils.html import format_html
 import json
 from apps.users.admin_mixins import UUIDUserAdminMixin, UserRealNameFilter
-from .models import HealthReport
+from .models import HealthReport, ReportGenerationCheckpoint
+from .services import invalidate_report_summary
 
 
 @admin.register(HealthReport)
@@ -125,4 +126,41 @@ class HealthReportAdmin(UUIDUserAdminMixin, admin.ModelAdmin):
     
     def has_change_permission(self, request, obj=None):
         """只允许查看，不允许修改"""
-        return False
\ No newline at end of file
+        return False
+
+    def delete_model(self, request, obj):
+        """删除后使该用户的报告摘要缓存失效"""
+        super().delete_model(request, obj)
+        invalidate_report_summary(obj.user_id)
+
+    def delete_queryset(self, request, queryset):
+        user_ids = set(queryset.values_list('user_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for user_id in user_ids:
+            invalidate_report_summary(user_id)
+
+
+@admin.register(ReportGenerationCheckpoint)
+class ReportGenerationCheckpointAdmin(admin.ModelAdmin):
+    """周期报告生成断点：只读查看各分片进度"""
+
+    list_display = [
+        'period_end', 'shard_display', 'status', 'processed_users',
+        'reports_created', 'updated_at', 'finished_at',
+    ]
+    list_filter = ['status', 'period_end']
+    readonly_fields = [
+        'period_end', 'period_days', 'shard', 'shard_count', 'status', 'last_user_id',
+        'processed_users', 'reports_created', 'error', 'updated_at', 'finished_at',
+    ]
+
+    def shard_display(self, obj):
+        return f"{obj.shard + 1}/{obj.shard_count}"
+
+    shard_display.short_description = '分片'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
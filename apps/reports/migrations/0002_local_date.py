@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:22
+
+import config.fields
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_local_date(apps, schema_editor):
+    """按 TIME_ZONE 将存量记录的 created_at 换算为本地日期，单条 UPDATE 完成"""
+    HealthReport = apps.get_model('reports', 'HealthReport')
+    HealthReport.objects.filter(local_date__isnull=True).update(
+        local_date=TruncDate('created_at', tzinfo=timezone.get_current_timezone())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='healthreport',
+            name='local_date',
+            field=config.fields.LocalDateField(null=True, source='created_at', verbose_name='本地日期'),
+        ),
+        migrations.RunPython(backfill_local_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='healthreport',
+            index=models.Index(fields=['user_id', 'local_date'], name='reports_hea_user_id_a35f6c_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_local_date'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='healthreport',
+            name='user_id',
+            field=models.UUIDField(verbose_name='用户'),
+        ),
+        migrations.AddIndex(
+            model_name='healthreport',
+            index=models.Index(fields=['user_id', '-created_at'], name='reports_hea_user_id_2a5696_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportGenerationCheckpoint',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('period_end', models.DateField(verbose_name='周期结束日')),
+                ('period_days', models.PositiveSmallIntegerField(verbose_name='周期天数')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='分片')),
+                ('shard_count', models.PositiveSmallIntegerField(verbose_name='分片数')),
+                ('status', models.CharField(choices=[('pending', '等待执行'), ('running', '正在生成'), ('done', '已完成'), ('failed', '失败')], default='pending', max_length=16, verbose_name='状态')),
+                ('last_user_id', models.UUIDField(blank=True, null=True, verbose_name='已处理到的用户')),
+                ('processed_users', models.PositiveIntegerField(default=0, verbose_name='已处理用户数')),
+                ('reports_created', models.PositiveIntegerField(default=0, verbose_name='已生成报告数')),
+                ('error', models.TextField(blank=True, default='', verbose_name='错误信息')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+            ],
+            options={
+                'verbose_name': '报告生成断点',
+                'verbose_name_plural': '报告生成断点',
+                'ordering': ['-period_end', 'shard'],
+                'constraints': [models.UniqueConstraint(fields=('period_end', 'shard_count', 'shard'), name='unique_report_checkpoint_shard')],
+            },
+        ),
+    ]
@@ -1,8 +1,9 @@
 from django.db import models
+from config.fields import LocalDateField
 
 class HealthReport(models.Model):
     id = models.AutoField(primary_key=True)
-    user_id = models.UUIDField(verbose_name='用户', db_index=True)
+    user_id = models.UUIDField(verbose_name='用户')
     assessment_id = models.IntegerField(verbose_name='评估ID')
     report_type = models.CharField(max_length=50, verbose_name='报告类型')
     overall_risk = models.CharField(max_length=50, verbose_name='总体风险')
@@ -13,11 +14,62 @@ class HealthReport(models.Model):
     trend_data = models.JSONField(verbose_name='趋势数据', default=dict)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    # created_at 的本地日期，趋势接口按此列做范围过滤
+    local_date = LocalDateField(null=True, verbose_name='本地日期')
 
     class Meta:
         verbose_name = '健康报告'
         verbose_name_plural = '健康报告'
         ordering = ['-created_at']
+        indexes = [
+            # 列表/摘要：user_id 过滤 + -created_at 排序
+            models.Index(fields=['user_id', '-created_at']),
+            models.Index(fields=['user_id', 'local_date']),
+        ]
 
     def __str__(self):
-        return f"健康报告({self.id}) - 用户: {self.user_id}"
\ No newline at end of file
+        return f"健康报告({self.id}) - 用户: {self.user_id}"
+
+class ReportGenerationCheckpoint(models.Model):
+    """
+    批量生成周期报告的断点：每个 (周期结束日, 分片数, 分片) 一行
+    分片按用户 UUID 区间划分，各 worker 互不重叠；last_user_id 与报告在同一事务内推进，
+    任务中断后重新派发即从断点继续，不会重复生成
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, '等待执行'),
+        (STATUS_RUNNING, '正在生成'),
+        (STATUS_DONE, '已完成'),
+        (STATUS_FAILED, '失败'),
+    )
+
+    id = models.AutoField(primary_key=True)
+    period_end = models.DateField(verbose_name='周期结束日')
+    period_days = models.PositiveSmallIntegerField(verbose_name='周期天数')
+    shard = models.PositiveSmallIntegerField(verbose_name='分片')
+    shard_count = models.PositiveSmallIntegerField(verbose_name='分片数')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name='状态')
+    last_user_id = models.UUIDField(null=True, blank=True, verbose_name='已处理到的用户')
+    processed_users = models.PositiveIntegerField(default=0, verbose_name='已处理用户数')
+    reports_created = models.PositiveIntegerField(default=0, verbose_name='已生成报告数')
+    error = models.TextField(blank=True, default='', verbose_name='错误信息')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+
+    class Meta:
+        verbose_name = '报告生成断点'
+        verbose_name_plural = '报告生成断点'
+        ordering = ['-period_end', 'shard']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period_end', 'shard_count', 'shard'],
+                name='unique_report_checkpoint_shard'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.period_end} 分片 {self.shard + 1}/{self.shard_count} ({self.status})"
@@ -0,0 +1,233 @@
+"""
+周期健康报告批量生成：按用户 UUID 区间分片，每批用户用少量集合查询读取周期内的
+每日情绪汇总、情绪日记、量表结果与认知测评，以 NumPy 一次算出各项均值、趋势斜率、
+综合风险与 key_factors，bulk_create 写入 HealthReport，并在同一事务内推进断点
+"""
+import uuid
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from apps.cognitive_flow.models import CognitiveAssessmentRecord
+from apps.emotiontracker.models import EmotionDailyRollup
+from apps.journals.models import MoodJournal
+from apps.scales.models import ScaleResult
+from apps.users.models import User
+
+from .models import HealthReport, ReportGenerationCheckpoint
+from .services import invalidate_report_summaries
+
+PERIODIC_REPORT_TYPE = '周期报告'
+# 每日情绪指标：(字段, 名称, 取值下限, 取值上限, 方向)；方向 1 表示分数越高越不利，-1 表示越高越好
+# 量程与方向以小程序 miniprogram/utils/scales.js 的 moodtestQ 为准：四项均为 0 分最好，
+# 精力 0 为“精力充沛”、3 为“极度疲劳”，睡眠 0 为“非常好”、4 为“很差”
+METRICS = (
+    ('depression', '抑郁', 0, 3, 1),
+    ('anxiety', '焦虑', 0, 10, 1),
+    ('energy', '疲劳', 0, 3, 1),
+    ('sleep', '睡眠问题', 0, 4, 1),
+)
+# 综合不利程度（0~1）的分级上界，依次对应 RISK_LEVELS
+RISK_THRESHOLDS = (0.25, 0.5, 0.75)
+RISK_LEVELS = ('低风险', '中风险', '高风险', '极高风险')
+# key_factors 的入选门槛：均值不利程度 / 周期内不利变化幅度（均为占量程比例）
+LEVEL_FACTOR_THRESHOLD = 0.5
+TREND_FACTOR_THRESHOLD = 0.1
+MAX_KEY_FACTORS = 3
+RECOMMENDATIONS = {
+    '低风险': ['保持规律作息与适度运动', '继续坚持每日情绪记录'],
+    '中风险': ['关注情绪变化，适当安排放松活动', '与家人朋友多沟通交流'],
+    '高风险': ['建议尽快与心理咨询师沟通', '减少压力源，保证充足睡眠'],
+    '极高风险': ['请尽快寻求专业心理或医疗帮助', '如有紧急情况请拨打心理援助热线'],
+}
+PROFESSIONAL_ADVICE = {
+    '低风险': '近期情绪状态总体平稳，建议保持良好的生活习惯。',
+    '中风险': '近期部分情绪指标偏离正常范围，建议持续观察并进行自我调节。',
+    '高风险': '近期情绪指标明显偏离正常范围，建议预约专业评估。',
+    '极高风险': '近期情绪指标严重偏离正常范围，建议立即寻求专业帮助。',
+}
+UUID_SPACE = 1 << 128
+
+
+def shard_bounds(shard, shard_count):
+    """分片对应的用户 UUID 区间 [lower, upper)，upper 为 None 表示不设上界"""
+    lower = uuid.UUID(int=UUID_SPACE * shard // shard_count)
+    upper = uuid.UUID(int=UUID_SPACE * (shard + 1) // shard_count) if shard + 1 < shard_count else None
+    return lower, upper
+
+
+def emotion_statistics(daily_means):
+    """
+    daily_means: 用户 × 天 × 指标 的日均值（缺失为 NaN）
+    返回每个指标的周期均值、按天的最小二乘斜率与有记录的天数（均为 用户 × 指标 / 用户）
+    """
+    valid = ~np.isnan(daily_means)
+    values = np.where(valid, daily_means, 0.0)
+    counts = valid.sum(axis=1)
+    days = np.arange(daily_means.shape[1], dtype=np.float64)[np.newaxis, :, np.newaxis]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = values.sum(axis=1) / counts
+        x_mean = (valid * days).sum(axis=1, keepdims=True) / counts[:, np.newaxis, :]
+        dx = np.where(valid, days - x_mean, 0.0)
+        sxx = (dx * dx).sum(axis=1)
+        slopes = np.where(sxx > 0, (dx * (values - means[:, np.newaxis, :])).sum(axis=1) / sxx, 0.0)
+    return means, slopes, valid.any(axis=2).sum(axis=1)
+
+
+def assess(means, slopes, period_days):
+    """按指标量程归一化为不利程度，得出综合风险等级下标与 key_factors"""
+    lows = np.array([low for _, _, low, _, _ in METRICS], dtype=np.float64)
+    spans = np.array([high - low for _, _, low, high, _ in METRICS], dtype=np.float64)
+    directions = np.array([direction for *_, direction in METRICS], dtype=np.float64)
+    normalized = np.clip((means - lows) / spans, 0, 1)
+    adverse_level = np.where(directions > 0, normalized, 1 - normalized)
+    adverse_trend = slopes * max(period_days - 1, 1) * directions / spans
+    level_counts = (~np.isnan(adverse_level)).sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        composite = np.nansum(adverse_level, axis=1) / level_counts
+    risk_index = np.searchsorted(np.array(RISK_THRESHOLDS), composite, side='right')
+
+    # 候选因素：每个指标的“偏高/偏低”与“上升/下降”，按幅度降序取前 MAX_KEY_FACTORS 个
+    labels = [f"{label}{'水平偏高' if direction > 0 else '水平偏低'}" for _, label, _, _, direction in METRICS]
+    labels += [f"{label}{'上升' if direction > 0 else '下降'}" for _, label, _, _, direction in METRICS]
+    # 缺失指标为 NaN，比较结果为 False，同样记为 -inf 不入选
+    strengths = np.concatenate([
+        np.where(adverse_level >= LEVEL_FACTOR_THRESHOLD, adverse_level, -np.inf),
+        np.where(adverse_trend >= TREND_FACTOR_THRESHOLD, adverse_trend, -np.inf),
+    ], axis=1)
+    order = np.argsort(-strengths, axis=1, kind='stable')[:, :MAX_KEY_FACTORS]
+    key_factors = [
+        [labels[col] for col in row if np.isfinite(strengths[idx, col])]
+        for idx, row in enumerate(order.tolist())
+    ]
+    return risk_index, key_factors
+
+
+def _load_batch(user_ids, start, end):
+    """一批用户周期内的全部输入，每类数据一条查询"""
+    rollups = list(
+        EmotionDailyRollup.objects.filter(user_id__in=user_ids, record_date__range=[start, end])
+        .values_list('user_id', 'record_date', 'record_count',
+                     *[f'{name}_sum' for name, *_ in METRICS])
+    )
+    journals = {
+        row['user_id']: row for row in
+        MoodJournal.objects.filter(user_id__in=user_ids, local_date__range=[start, end])
+        .values('user_id').annotate(count=Count('id'), intensity=Avg('moodIntensity')).order_by()
+    }
+    scales = {}
+    for row in (ScaleResult.objects.filter(user_id__in=user_ids, local_date__range=[start, end])
+                .order_by('user_id', 'scale_code', '-created_at')
+                .values('user_id', 'scale_code', 'score', 'level')):
+        scales.setdefault(row['user_id'], {}).setdefault(
+            row['scale_code'], {'score': row['score'], 'level': row['level']}
+        )
+    cognitive = {}
+    for row in (CognitiveAssessmentRecord.objects.filter(user_id__in=user_ids, local_date__range=[start, end])
+                .order_by('user_id', '-created_at')
+                .values('user_id', 'score_scd', 'score_mmse', 'score_moca', 'score_gad7', 'score_phq9', 'score_adl')):
+        user_id = row.pop('user_id')
+        cognitive.setdefault(user_id, {key: value for key, value in row.items() if value is not None})
+    return rollups, journals, scales, cognitive
+
+
+def build_reports(user_ids, start, end):
+    """为一批用户生成周期报告（未保存），周期内没有情绪记录的用户不生成"""
+    period_days = (end - start).days + 1
+    rollups, journals, scales, cognitive = _load_batch(user_ids, start, end)
+    positions = {user_id: idx for idx, user_id in enumerate(user_ids)}
+    daily_means = np.full((len(user_ids), period_days, len(METRICS)), np.nan)
+    if rollups:
+        rows = np.array([row[2:] for row in rollups], dtype=np.float64)
+        user_pos = np.array([positions[row[0]] for row in rollups])
+        day_pos = np.array([(row[1] - start).days for row in rollups])
+        recorded = rows[:, 0] > 0
+        daily_means[user_pos[recorded], day_pos[recorded]] = rows[recorded, 1:] / rows[recorded, :1]
+
+    means, slopes, recorded_days = emotion_statistics(daily_means)
+    risk_index, key_factors = assess(means, slopes, period_days)
+    reports = []
+    for idx, user_id in enumerate(user_ids):
+        if not recorded_days[idx]:
+            continue
+        risk = RISK_LEVELS[risk_index[idx]]
+        journal = journals.get(user_id) or {'count': 0, 'intensity': None}
+        metrics = {
+            name: {
+                'mean': None if np.isnan(means[idx, col]) else round(float(means[idx, col]), 2),
+                'slope': round(float(slopes[idx, col]), 4),
+            }
+            for col, (name, *_) in enumerate(METRICS)
+        }
+        trend_analysis = '；'.join(
+            f"{label}均值 {metrics[name]['mean']}"
+            f"（{'上升' if metrics[name]['slope'] > 0 else '下降' if metrics[name]['slope'] < 0 else '持平'}）"
+            for name, label, *_ in METRICS if metrics[name]['mean'] is not None
+        )
+        reports.append(HealthReport(
+            user_id=user_id,
+            assessment_id=0,
+            report_type=PERIODIC_REPORT_TYPE,
+            overall_risk=risk,
+            summary=(
+                f"{start.isoformat()} 至 {end.isoformat()} 共记录情绪 {int(recorded_days[idx])} 天、"
+                f"情绪日记 {journal['count']} 篇，综合评估为{risk}。"
+            ),
+            recommendations=RECOMMENDATIONS[risk],
+            professional_advice=PROFESSIONAL_ADVICE[risk],
+            trend_analysis=trend_analysis,
+            trend_data={
+                'period': [start.isoformat(), end.isoformat()],
+                'recorded_days': int(recorded_days[idx]),
+                'metrics': metrics,
+                'key_factors': key_factors[idx],
+                'journal': {
+                    'count': journal['count'],
+                    'avg_intensity': round(journal['intensity'], 2) if journal['intensity'] is not None else None,
+                },
+                'scales': scales.get(user_id, {}),
+                'cognitive': cognitive.get(user_id, {}),
+            },
+        ))
+    return reports
+
+
+def run_shard(checkpoint_id, batch_size=None):
+    """
+    从断点开始处理一个分片：每批在一个事务内锁定断点行、读取用户、生成报告并推进断点，
+    并发派发同一分片时后到的 worker 会等待锁并从新断点继续
+    """
+    batch_size = batch_size or settings.REPORT_BATCH_USERS
+    ReportGenerationCheckpoint.objects.filter(id=checkpoint_id).exclude(
+        status=ReportGenerationCheckpoint.STATUS_DONE
+    ).update(status=ReportGenerationCheckpoint.STATUS_RUNNING, error='')
+    while True:
+        with transaction.atomic():
+            checkpoint = ReportGenerationCheckpoint.objects.select_for_update().get(id=checkpoint_id)
+            if checkpoint.status == ReportGenerationCheckpoint.STATUS_DONE:
+                return checkpoint
+            start = checkpoint.period_end - timedelta(days=checkpoint.period_days - 1)
+            lower, upper = shard_bounds(checkpoint.shard, checkpoint.shard_count)
+            users = User.objects.filter(is_tracked=True, id__gte=lower)
+            if upper is not None:
+                users = users.filter(id__lt=upper)
+            if checkpoint.last_user_id is not None:
+                users = users.filter(id__gt=checkpoint.last_user_id)
+            user_ids = list(users.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not user_ids:
+                checkpoint.status = ReportGenerationCheckpoint.STATUS_DONE
+                checkpoint.finished_at = timezone.now()
+                checkpoint.save(update_fields=['status', 'finished_at', 'updated_at'])
+                return checkpoint
+
+            reports = build_reports(user_ids, start, checkpoint.period_end)
+            HealthReport.objects.bulk_create(reports, batch_size=1000)
+            checkpoint.last_user_id = user_ids[-1]
+            checkpoint.processed_users += len(user_ids)
+            checkpoint.reports_created += len(reports)
+            checkpoint.save(update_fields=['last_user_id', 'processed_users', 'reports_created', 'updated_at'])
+        invalidate_report_summaries([report.user_id for report in reports])
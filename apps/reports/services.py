@@ -0,0 +1,78 @@
+"""
+健康报告摘要：聚合在数据库端完成（总数、风险分布、按 Case/When 映射的平均风险分），
+结果按用户缓存，报告增删改时失效
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Case, Count, FloatField, Value, When
+
+from .models import HealthReport
+
+# 风险等级 -> 风险分数，未列出的等级不计入平均分
+RISK_SCORES = {
+    '低风险': 1,
+    '中风险': 2,
+    '高风险': 3,
+    '极高风险': 4,
+}
+RECENT_REPORTS = 5
+
+
+def _summary_cache_key(user_id):
+    return f"reports:summary:{user_id}"
+
+
+def report_payload(report):
+    """报告的响应字段（与 HealthReportResponseSchema 一致），可直接缓存"""
+    return {
+        'id': report.id,
+        'user_id': str(report.user_id),
+        'assessment_id': report.assessment_id,
+        'report_type': report.report_type,
+        'overall_risk': report.overall_risk,
+        'summary': report.summary,
+        'recommendations': report.recommendations,
+        'professional_advice': report.professional_advice,
+        'trend_analysis': report.trend_analysis,
+        'trend_data': report.trend_data,
+        'created_at': report.created_at.isoformat(),
+        'updated_at': report.updated_at.isoformat(),
+    }
+
+
+def build_report_summary(user_id):
+    """固定 3 条查询：总数与平均风险分、风险分布、最近报告，与报告数量无关"""
+    user_reports = HealthReport.objects.filter(user_id=user_id)
+    risk_score = Case(
+        *[When(overall_risk=risk, then=Value(score)) for risk, score in RISK_SCORES.items()],
+        default=None,
+        output_field=FloatField(),
+    )
+    totals = user_reports.aggregate(total=Count('id'), average=Avg(risk_score))
+    risk_distribution = user_reports.values('overall_risk').annotate(count=Count('id')).order_by('-count')
+    return {
+        'total_reports': totals['total'],
+        'risk_distribution': {item['overall_risk']: item['count'] for item in risk_distribution},
+        'recent_reports': [report_payload(r) for r in user_reports.order_by('-created_at')[:RECENT_REPORTS]],
+        'average_risk_score': round(totals['average'] or 0, 2),
+    }
+
+
+def get_report_summary(user_id):
+    """读取缓存的报告摘要，未命中时计算并写入"""
+    key = _summary_cache_key(user_id)
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_report_summary(user_id)
+        cache.set(key, summary, settings.REPORT_SUMMARY_CACHE_SECONDS)
+    return summary
+
+
+def invalidate_report_summary(user_id):
+    """报告增删改后调用，使该用户的摘要缓存失效"""
+    cache.delete(_summary_cache_key(user_id))
+
+
+def invalidate_report_summaries(user_ids):
+    """批量生成报告后使相关用户的摘要缓存失效"""
+    cache.delete_many([_summary_cache_key(user_id) for user_id in user_ids])
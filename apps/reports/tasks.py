@@ -0,0 +1,53 @@
+"""
+周期健康报告批量生成任务：派发任务为每个分片登记断点并并行派发分片任务，
+分片任务从断点继续，失败后重新派发同一周期即可续跑
+"""
+from datetime import date, timedelta
+from celery import group, shared_task
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.utils import timezone
+from .models import ReportGenerationCheckpoint
+from .pipeline import run_shard
+
+logger = get_task_logger(__name__)
+
+
+@shared_task
+def generate_periodic_reports(period_end=None):
+    """
+    为所有跟踪用户生成截至 period_end（默认昨天）的周期报告
+    已完成的分片不会重复派发
+    """
+    end = date.fromisoformat(period_end) if period_end else timezone.localdate() - timedelta(days=1)
+    shard_count = settings.REPORT_SHARDS
+    pending = []
+    for shard in range(shard_count):
+        checkpoint, _ = ReportGenerationCheckpoint.objects.get_or_create(
+            period_end=end, shard_count=shard_count, shard=shard,
+            defaults={'period_days': settings.REPORT_PERIOD_DAYS},
+        )
+        if checkpoint.status != ReportGenerationCheckpoint.STATUS_DONE:
+            pending.append(checkpoint.id)
+    logger.info("周期报告 %s：派发 %s/%s 个分片", end, len(pending), shard_count)
+    if pending:
+        group(generate_report_shard.s(checkpoint_id) for checkpoint_id in pending).apply_async()
+    return pending
+
+
+@shared_task(bind=True, acks_late=True)
+def generate_report_shard(self, checkpoint_id):
+    """处理单个分片；异常时记录到断点，重新派发周期任务即可从断点继续"""
+    try:
+        checkpoint = run_shard(checkpoint_id)
+    except Exception as exc:
+        ReportGenerationCheckpoint.objects.filter(id=checkpoint_id).update(
+            status=ReportGenerationCheckpoint.STATUS_FAILED, error=str(exc)[:2000],
+        )
+        logger.error("[%s] 周期报告分片 %s 失败: %s", self.request.id, checkpoint_id, exc, exc_info=True)
+        raise
+    logger.info(
+        "[%s] 周期报告分片完成: %s，处理 %s 位用户，生成 %s 份报告",
+        self.request.id, checkpoint, checkpoint.processed_users, checkpoint.reports_created,
+    )
+    return checkpoint.reports_created
@@ -0,0 +1,123 @@
+from datetime import date, timedelta
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.emotiontracker.models import EmotionRecord
+from apps.emotiontracker.services import rebuild_rollups
+from apps.reports import pipeline
+from apps.reports.models import HealthReport, ReportGenerationCheckpoint
+from apps.reports.pipeline import assess, emotion_statistics
+from apps.reports.tasks import generate_periodic_reports
+from apps.scales.models import ScaleResult
+
+User = get_user_model()
+PERIOD_END = date(2026, 3, 7)
+
+
+@override_settings(REPORT_SHARDS=3, REPORT_BATCH_USERS=1, REPORT_PERIOD_DAYS=7)
+class PeriodicReportPipelineTests(TestCase):
+    def setUp(self):
+        # 取值参照小程序每日测评：抑郁 0~3、焦虑 0~10、精力 0（充沛）~3（极度疲劳）、睡眠 0（非常好）~4（很差）
+        self.worsening = self._user("worsening", depression=[0, 0, 1, 1, 2, 3, 3], anxiety=8, energy=2, sleep=3)
+        self.steady = self._user("steady", depression=[0] * 7, anxiety=1, energy=0, sleep=0)
+        self._user("no_data")
+        self._user("untracked", depression=[3] * 7, anxiety=10, energy=3, sleep=4, tracked=False)
+        rebuild_rollups(EmotionRecord.objects.all())
+
+    def _user(self, name, depression=(), anxiety=0, energy=0, sleep=0, tracked=True):
+        user = User.objects.create(username=f"openid_{name}", role="user", is_tracked=tracked)
+        start = PERIOD_END - timedelta(days=len(depression) - 1)
+        EmotionRecord.objects.bulk_create([
+            EmotionRecord(
+                user_id=user.id, record_date=start + timedelta(days=offset), period=EmotionRecord.PERIOD_MORNING,
+                depression=value, anxiety=anxiety, energy=energy, sleep=sleep,
+            )
+            for offset, value in enumerate(depression)
+        ])
+        return user
+
+    def test_generates_reports_for_tracked_users_with_data(self):
+        result = ScaleResult.objects.create(
+            user_id=self.worsening.id, scale_code="GAD-7", score=15, level="重度焦虑",
+            started_at="2026-03-05T10:00:00+08:00", completed_at="2026-03-05T10:05:00+08:00",
+        )
+        ScaleResult.objects.filter(id=result.id).update(local_date=PERIOD_END - timedelta(days=2))
+        generate_periodic_reports(PERIOD_END.isoformat())
+
+        reports = {report.user_id: report for report in HealthReport.objects.all()}
+        self.assertEqual(set(reports), {self.worsening.id, self.steady.id})
+        worsening, steady = reports[self.worsening.id], reports[self.steady.id]
+        self.assertEqual(steady.overall_risk, "低风险")
+        self.assertIn(worsening.overall_risk, ("高风险", "极高风险"))
+        self.assertEqual(worsening.trend_data["key_factors"][0], "抑郁上升")
+        self.assertLessEqual(len(worsening.trend_data["key_factors"]), 3)
+        self.assertEqual(worsening.trend_data["scales"]["GAD-7"]["level"], "重度焦虑")
+        self.assertEqual(worsening.local_date.isoformat(), worsening.created_at.date().isoformat())
+        self.assertEqual(steady.trend_data["key_factors"], [])
+
+        checkpoints = ReportGenerationCheckpoint.objects.filter(period_end=PERIOD_END)
+        self.assertEqual(checkpoints.count(), 3)
+        self.assertTrue(all(c.status == ReportGenerationCheckpoint.STATUS_DONE for c in checkpoints))
+        self.assertEqual(sum(c.processed_users for c in checkpoints), 3)
+        # 已完成的周期重新派发不会重复生成
+        self.assertEqual(generate_periodic_reports(PERIOD_END.isoformat()), [])
+        self.assertEqual(HealthReport.objects.count(), 2)
+
+    @override_settings(REPORT_SHARDS=1)
+    def test_failed_shard_resumes_from_checkpoint(self):
+        original = pipeline.build_reports
+        calls = []
+
+        def flaky(user_ids, start, end):
+            calls.append(user_ids)
+            if len(calls) == 2:
+                raise RuntimeError("worker lost")
+            return original(user_ids, start, end)
+
+        with mock.patch.object(pipeline, "build_reports", side_effect=flaky):
+            generate_periodic_reports(PERIOD_END.isoformat())
+        checkpoint = ReportGenerationCheckpoint.objects.get(period_end=PERIOD_END)
+        self.assertEqual(checkpoint.status, ReportGenerationCheckpoint.STATUS_FAILED)
+        self.assertEqual(checkpoint.processed_users, 1)
+        self.assertIn("worker lost", checkpoint.error)
+
+        generate_periodic_reports(PERIOD_END.isoformat())
+        checkpoint.refresh_from_db()
+        self.assertEqual(checkpoint.status, ReportGenerationCheckpoint.STATUS_DONE)
+        self.assertEqual(checkpoint.processed_users, 3)
+        self.assertEqual(HealthReport.objects.count(), 2)
+
+    @override_settings(REPORT_SHARDS=1, REPORT_BATCH_USERS=500)
+    def test_batch_query_count_does_not_grow_with_users(self):
+        with CaptureQueriesContext(connection) as few:
+            generate_periodic_reports(PERIOD_END.isoformat())
+        users = [self._user(f"more_{idx}", depression=[1] * 7) for idx in range(20)]
+        rebuild_rollups(EmotionRecord.objects.filter(user_id__in=[user.id for user in users]))
+        ReportGenerationCheckpoint.objects.all().delete()
+        HealthReport.objects.all().delete()
+        with CaptureQueriesContext(connection) as many:
+            generate_periodic_reports(PERIOD_END.isoformat())
+        self.assertEqual(HealthReport.objects.count(), 22)
+        self.assertEqual(len(many), len(few))
+
+    def test_emotion_statistics_matches_least_squares(self):
+        daily = np.full((1, 7, 4), np.nan)
+        daily[0, [0, 2, 3, 6], 0] = [1, 2, 2, 4]
+        means, slopes, recorded_days = emotion_statistics(daily)
+        self.assertAlmostEqual(means[0, 0], 2.25)
+        self.assertAlmostEqual(slopes[0, 0], np.polyfit([0, 2, 3, 6], [1, 2, 2, 4], 1)[0])
+        self.assertEqual(recorded_days[0], 4)
+        self.assertTrue(np.isnan(means[0, 1]))
+
+    def test_poor_sleep_and_fatigue_are_adverse(self):
+        # 每晚睡眠“很差”(4)、精力“极度疲劳”(3)，抑郁与焦虑为 0
+        means = np.array([[0.0, 0.0, 3.0, 4.0], [0.0, 0.0, 0.0, 0.0]])
+        risk_index, key_factors = assess(means, np.zeros_like(means), 7)
+        self.assertEqual(risk_index.tolist(), [2, 0])
+        self.assertEqual(set(key_factors[0]), {"疲劳水平偏高", "睡眠问题水平偏高"})
+        self.assertEqual(key_factors[1], [])
@@ -0,0 +1,75 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.reports.models import HealthReport
+from config.jwt_auth_adapter import create_tokens_for_user
+
+User = get_user_model()
+
+
+class ReportSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="openid_report_summary", role="user")
+        token = create_tokens_for_user(self.user)["access"]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def _create_reports(self, risks):
+        HealthReport.objects.bulk_create([
+            HealthReport(
+                user_id=self.user.id, assessment_id=idx, report_type="综合", overall_risk=risk,
+                summary="s", professional_advice="a", trend_analysis="t",
+            )
+            for idx, risk in enumerate(risks)
+        ])
+
+    def _summary(self):
+        return self.client.get("/api/reports/summary", secure=True, **self.auth).json()
+
+    def test_average_and_distribution_computed_in_database(self):
+        self._create_reports(["低风险", "高风险", "高风险", "未知"])
+        summary = self._summary()
+        self.assertEqual(summary["total_reports"], 4)
+        self.assertEqual(summary["risk_distribution"], {"高风险": 2, "低风险": 1, "未知": 1})
+        # 未知等级不计入平均分
+        self.assertEqual(summary["average_risk_score"], round(7 / 3, 2))
+        self.assertEqual(len(summary["recent_reports"]), 4)
+
+    def test_query_count_is_constant_and_cached(self):
+        self._create_reports(["中风险"] * 3)
+        # JWT 用户查询 1 条 + 摘要 3 条
+        with self.assertNumQueries(4):
+            small = self._summary()
+        cache.clear()
+        self._create_reports(["低风险"] * 300)
+        with self.assertNumQueries(4):
+            large = self._summary()
+        self.assertEqual((small["total_reports"], large["total_reports"]), (3, 303))
+        self.assertEqual(len(large["recent_reports"]), 5)
+        # 命中缓存时只剩 JWT 用户查询
+        with self.assertNumQueries(1):
+            self.assertEqual(self._summary(), large)
+
+    def test_writes_invalidate_cached_summary(self):
+        self.assertEqual(self._summary()["total_reports"], 0)
+        created = self.client.post(
+            "/api/reports/",
+            json.dumps({
+                "assessment_id": 1, "report_type": "综合", "overall_risk": "低风险", "summary": "s",
+                "recommendations": [], "professional_advice": "a", "trend_analysis": "t", "trend_data": {},
+            }),
+            content_type="application/json", secure=True, **self.auth,
+        ).json()
+        self.assertEqual(self._summary()["average_risk_score"], 1.0)
+
+        self.client.put(
+            f"/api/reports/{created['id']}", json.dumps({"overall_risk": "极高风险"}),
+            content_type="application/json", secure=True, **self.auth,
+        )
+        self.assertEqual(self._summary()["risk_distribution"], {"极高风险": 1})
+
+        self.client.delete(f"/api/reports/{created['id']}", secure=True, **self.auth)
+        self.assertEqual(self._summary()["total_reports"], 0)
@@ -1,9 +1,9 @@
 from ninja import Router, Query
 from django.shortcuts import get_object_or_404
-from django.db.models import Count
 from django.utils import timezone
 from datetime import datetime, timedelta
 from .models import HealthReport
+from .services import get_report_summary, invalidate_report_summary
 from .serializers import (
     HealthReportCreateSchema, HealthReportUpdateSchema, HealthReportResponseSchema,
     HealthReportListQuerySchema, HealthReportSummarySchema, HealthTrendSchema
@@ -60,7 +60,7 @@ def list_reports(request, filters: HealthReportListQuerySchema = Query(...)):
         for r in reports
     ]
 
-@reports_router.get("/{report_id}", response=HealthReportResponseSchema, auth=jwt_auth)
+@reports_router.get("/{int:report_id}", response=HealthReportResponseSchema, auth=jwt_auth)
 def get_report(request, report_id: int):
     """
     获取单份健康报告详情（仅本人）
@@ -98,6 +98,7 @@ def create_report(request, data: HealthReportCreateSchema):
         trend_analysis=data.trend_analysis,
         trend_data=data.trend_data
     )
+    invalidate_report_summary(current_user.id)
     
     return HealthReportResponseSchema(
         id=report.id,
@@ -114,7 +115,7 @@ def create_report(request, data: HealthReportCreateSchema):
         updated_at=report.updated_at.isoformat()
     )
 
-@reports_router.put("/{report_id}", response=HealthReportResponseSchema, auth=jwt_auth)
+@reports_router.put("/{int:report_id}", response=HealthReportResponseSchema, auth=jwt_auth)
 def update_report(request, report_id: int, data: HealthReportUpdateSchema):
     """
     更新健康报告（仅本人）
@@ -136,6 +137,7 @@ def update_report(request, report_id: int, data: HealthReportUpdateSchema):
         report.trend_data = data.trend_data
     
     report.save()
+    invalidate_report_summary(report.user_id)
     
     return HealthReportResponseSchema(
         id=report.id,
@@ -152,74 +154,22 @@ def update_report(request, report_id: int, data: HealthReportUpdateSchema):
         updated_at=report.updated_at.isoformat()
     )
 
-@reports_router.delete("/{report_id}", auth=jwt_auth)
+@reports_router.delete("/{int:report_id}", auth=jwt_auth)
 def delete_report(request, report_id: int):
     """
     删除健康报告（仅本人）
     """
     report = get_object_or_404(HealthReport, id=report_id, user_id=request.auth.id)
     report.delete()
+    invalidate_report_summary(request.auth.id)
     return {"success": True}
 
 @reports_router.get("/summary", response=HealthReportSummarySchema, auth=jwt_auth)
 def get_user_report_summary(request):
     """
-    获取当前用户的健康报告摘要
+    获取当前用户的健康报告摘要（聚合在数据库端完成，按用户缓存）
     """
-    current_user = request.auth
-    user_reports = HealthReport.objects.filter(user_id=current_user.id)
-    total_reports = user_reports.count()
-    
-    # 风险等级分布
-    risk_distribution = user_reports.values('overall_risk').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    risk_dict = {item['overall_risk']: item['count'] for item in risk_distribution}
-    
-    # 最近的报告
-    recent_reports = user_reports.order_by('-created_at')[:5]
-    
-    # 计算平均风险分数（这里假设风险等级可以转换为分数）
-    risk_scores = {
-        '低风险': 1,
-        '中风险': 2,
-        '高风险': 3,
-        '极高风险': 4
-    }
-    
-    total_score = 0
-    valid_reports = 0
-    
-    for report in user_reports:
-        if report.overall_risk in risk_scores:
-            total_score += risk_scores[report.overall_risk]
-            valid_reports += 1
-    
-    average_risk_score = total_score / valid_reports if valid_reports > 0 else 0
-    
-    return HealthReportSummarySchema(
-        total_reports=total_reports,
-        risk_distribution=risk_dict,
-        recent_reports=[
-            HealthReportResponseSchema(
-                id=r.id,
-                user_id=str(r.user_id),
-                assessment_id=r.assessment_id,
-                report_type=r.report_type,
-                overall_risk=r.overall_risk,
-                summary=r.summary,
-                recommendations=r.recommendations,
-                professional_advice=r.professional_advice,
-                trend_analysis=r.trend_analysis,
-                trend_data=r.trend_data,
-                created_at=r.created_at.isoformat(),
-                updated_at=r.updated_at.isoformat()
-            )
-            for r in recent_reports
-        ],
-        average_risk_score=round(average_risk_score, 2)
-    )
+    return get_report_summary(request.auth.id)
 
 @reports_router.get("/trends", response=list[HealthTrendSchema], auth=jwt_auth)
 def get_health_trends(request, days: int = Query(90, ge=1, le=365)):
@@ -227,13 +177,13 @@ def get_health_trends(request, days: int = Query(90, ge=1, le=365)):
     获取当前用户健康趋势
     """
     current_user = request.auth
-    end_date = timezone.now().date()
+    end_date = timezone.localtime().date()
     start_date = end_date - timedelta(days=days)
     
+    # 按存储的本地日期列做范围过滤，走 (user_id, local_date) 索引
     reports = HealthReport.objects.filter(
         user_id=current_user.id,
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date
+        local_date__range=[start_date, end_date],
     ).order_by('created_at')
     
     trends = []
@@ -250,7 +200,7 @@ def get_health_trends(request, days: int = Query(90, ge=1, le=365)):
         }.get(report.overall_risk, 2)
         
         trends.append(HealthTrendSchema(
-            date=report.created_at.date().isoformat(),
+            date=report.local_date.isoformat(),
             risk_level=report.overall_risk,
             score=risk_score,
             factors=factors[:3]  # 只取前3个因素
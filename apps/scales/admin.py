@@ -1,9 +1,11 @@
 """量表模块的 admin 配置"""
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.urls import reverse
 from django.utils.html import format_html
 import json
 from apps.users.admin_mixins import UUIDUserAdminMixin, UserRealNameFilter
-from .models import ScaleResult
+from .models import ScalePsychometrics, ScaleResult
+from .tasks import compute_scale_psychometrics
 
 
 @admin.register(ScaleResult)
@@ -12,7 +14,7 @@ class ScaleResultAdmin(UUIDUserAdminMixin, admin.ModelAdmin):
     
     list_display = [
         'id', 'user_real_name', 'scale_code', 
-        'score', 'duration_display', 'created_at'
+        'score', 'level', 'duration_display', 'created_at'
     ]
     
     list_filter = [
@@ -25,7 +27,7 @@ class ScaleResultAdmin(UUIDUserAdminMixin, admin.ModelAdmin):
     
     readonly_fields = [
         'id', 'user_id', 'created_at', 'duration_display',
-        'selected_options_display'
+        'selected_options_display', 'level', 'scale_version'
     ]
     
     fieldsets = (
@@ -37,7 +39,7 @@ class ScaleResultAdmin(UUIDUserAdminMixin, admin.ModelAdmin):
             'classes': ('wide',)
         }),
         ('结论', {
-            'fields': ('conclusion',),
+            'fields': ('level', 'scale_version', 'conclusion'),
             'classes': ('wide',)
         }),
         ('时间信息', {
@@ -123,11 +125,59 @@ class ScaleResultAdmin(UUIDUserAdminMixin, admin.ModelAdmin):
         """禁止手动添加量表结果"""
         return False
     
-    actions = ['export_selected']
+    actions = ['export_selected', 'compute_psychometrics']
     
     def export_selected(self, request, queryset):
         """导出选中的量表结果"""
         # 这里可以添加导出功能
         self.message_user(request, f'已选择 {queryset.count()} 条记录进行导出')
     
-    export_selected.short_description = '导出选中的记录'
\ No newline at end of file
+    export_selected.short_description = '导出选中的记录'
+
+    def compute_psychometrics(self, request, queryset):
+        """按所选记录涉及的量表提交心理测量统计任务（统计范围为量表的全部答卷）"""
+        codes = sorted(set(queryset.values_list('scale_code', flat=True)))
+        compute_scale_psychometrics.delay(codes)
+        self.message_user(
+            request,
+            format_html(
+                '已提交 {} 的心理测量统计任务，完成后可在 <a href="{}">量表心理测量统计</a> 中查看',
+                '、'.join(codes), reverse('admin:scales_scalepsychometrics_changelist'),
+            ),
+            level=messages.SUCCESS,
+        )
+
+    compute_psychometrics.short_description = '计算所选量表的心理测量统计'
+
+
+@admin.register(ScalePsychometrics)
+class ScalePsychometricsAdmin(admin.ModelAdmin):
+    """心理测量统计：只读查看，由定时任务或量表结果列表的操作刷新"""
+
+    list_display = ['scale_code', 'cohort', 'respondents', 'alpha', 'scale_version', 'computed_at']
+    list_filter = ['scale_code', 'cohort']
+    readonly_fields = [
+        'scale_code', 'scale_version', 'cohort', 'respondents', 'alpha', 'items_display', 'computed_at',
+    ]
+    exclude = ['items']
+
+    def items_display(self, obj):
+        """逐题统计表"""
+        rows = format_html(
+            '<tr><th>题目</th><th>均值</th><th>标准差</th><th>校正题总相关</th></tr>'
+        )
+        for item in obj.items or []:
+            rows += format_html(
+                '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+                item.get('question_id'), item.get('mean'), item.get('std'),
+                '-' if item.get('item_total_r') is None else item['item_total_r'],
+            )
+        return format_html('<table>{}</table>', rows)
+
+    items_display.short_description = '题目统计'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -3,4 +3,9 @@ from django.apps import AppConfig
 class ScalesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.scales'
-    verbose_name = '量表管理'
\ No newline at end of file
+    verbose_name = '量表管理'
+
+    def ready(self):
+        # 进程启动时构建一次量表注册表快照，请求中不再重复扫描定义模块
+        from apps.scales.definitions.registry import ScaleRegistry
+        ScaleRegistry.discover_scales()
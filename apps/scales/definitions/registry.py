@@ -1,55 +1,145 @@
 import importlib
+import json
+import logging
+import os
 import pkgutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+from django.conf import settings
 
 from apps.scales.definitions.base import BaseScale
+from apps.scales.definitions.yaml_loader import load_yaml_scales
+from apps.scales.payloads import build_payloads
+
+logger = logging.getLogger(__name__)
+
+DEFINITIONS_PACKAGE = "apps.scales.definitions"
+# 基类与注册表本身不参与重新导入，否则会生成新的类对象，导致 issubclass 判断与快照引用失效
+INFRASTRUCTURE_MODULES = {"base", "registry", "yaml_loader"}
+# DEBUG 下两次 mtime 检查的最小间隔（秒），避免每个请求都遍历定义目录
+DEBUG_CHECK_INTERVAL = 1.0
+# 计分结果 LRU 缓存的默认容量（条），可用 SCALE_SCORE_CACHE_SIZE 覆盖
+DEFAULT_SCORE_CACHE_SIZE = 4096
+# 每累计多少次缓存查询记录一次命中统计日志
+SCORE_CACHE_LOG_INTERVAL = 1000
+
 
 class ScaleRegistry:
-    _registry = {}
+    """
+    量表注册表：进程启动时（AppConfig.ready）构建一次只读快照，各请求线程共享
+    重新加载会先在局部字典中构建新注册表，再整体替换快照引用，读取方不会看到半成品
+    DEBUG 下按定义文件的 mtime 判断是否需要重新加载，生产环境定义随发布重启生效
+    公开接口的 JSON 响应随快照一起预编码（见 apps.scales.payloads）
+    calculate 按 (code, version, 答案) 做进程内 LRU 缓存，注册表重建时整体清空
+    """
+
+    _registry = MappingProxyType({})
+    _payloads = MappingProxyType({})
+    _fingerprint = None
+    _checked_at = 0.0
+    _loaded = False
+    _lock = threading.Lock()
+    _score_cache = OrderedDict()
+    _score_cache_lock = threading.Lock()
+    _score_hits = 0
+    _score_misses = 0
 
     @classmethod
-    def discover_scales(cls, package="apps.scales.definitions"):
-        """自动发现所有量表定义类并注册（仅注册BaseScale子类），异常安全"""
-        cls._registry.clear()
-        pkg = importlib.import_module(package)
-        for _, modname, ispkg in pkgutil.iter_modules(pkg.__path__):
-            if ispkg:
-                continue
-            try:
-                module = importlib.import_module(f"{package}.{modname}")
-                for attr in dir(module):
-                    obj = getattr(module, attr)
-                    if (
-                        isinstance(obj, type)
-                        and issubclass(obj, BaseScale)
-                        and obj is not BaseScale
-                        and hasattr(obj, "code")
-                        and hasattr(obj, "questions")
-                    ):
-                        # 自检功能，提前发现量表定义错误
-                        try:
-                            check_result = obj().self_check()
-                            if not check_result["valid"]:
-                                import logging
-                                logging.getLogger(__name__).error(
-                                    f"量表插件 {modname}.{obj.__name__} 自检失败: {check_result['errors']}"
-                                )
-                                continue  # 跳过有错误的量表
-                        except Exception as ce:
-                            import logging
-                            logging.getLogger(__name__).error(
-                                f"量表插件 {modname}.{obj.__name__} 自检异常: {ce}", exc_info=True
-                            )
-                            continue
-                        cls._registry[obj.code] = obj
-            except Exception as e:
-                # 插件解析异常，记录但不中断整体流程
-                import logging
-                logging.getLogger(__name__).error(f"量表插件 {modname} 加载失败: {e}", exc_info=True)
+    def discover_scales(cls, package=DEFINITIONS_PACKAGE, reload=False):
+        """自动发现所有量表定义类并注册（仅注册BaseScale子类），异常安全；reload=True 时重新导入已加载的模块"""
+        with cls._lock:
+            registry = {}
+            pkg = importlib.import_module(package)
+            fingerprint = cls._definition_fingerprint(pkg)
+            for _, modname, ispkg in pkgutil.iter_modules(pkg.__path__):
+                if ispkg:
+                    continue
+                module_name = f"{package}.{modname}"
+                try:
+                    if reload and module_name in sys.modules and modname not in INFRASTRUCTURE_MODULES:
+                        module = importlib.reload(sys.modules[module_name])
+                    else:
+                        module = importlib.import_module(module_name)
+                    for attr in dir(module):
+                        obj = getattr(module, attr)
+                        if (
+                            isinstance(obj, type)
+                            and issubclass(obj, BaseScale)
+                            and obj is not BaseScale
+                            and hasattr(obj, "code")
+                            and hasattr(obj, "questions")
+                            and cls._passes_self_check(obj, f"{modname}.{obj.__name__}")
+                        ):
+                            registry[obj.code] = obj
+                except Exception as e:
+                    # 插件解析异常，记录但不中断整体流程
+                    logger.error(f"量表插件 {modname} 加载失败: {e}", exc_info=True)
+            # YAML 定义的量表；与 Python 实现同 code 时以 Python 实现为准
+            for scale_cls in load_yaml_scales():
+                if scale_cls.code in registry:
+                    continue
+                if cls._passes_self_check(scale_cls, f"yaml_configs/{scale_cls.code}"):
+                    registry[scale_cls.code] = scale_cls
+            cls._payloads = MappingProxyType(build_payloads(registry))
+            cls._registry = MappingProxyType(registry)
+            with cls._score_cache_lock:
+                cls._score_cache.clear()
+            cls._fingerprint = fingerprint
+            cls._loaded = True
+            return cls._registry
+
+    @staticmethod
+    def _passes_self_check(scale_cls, source):
+        """自检功能，提前发现量表定义错误；有错误的量表跳过注册"""
+        try:
+            check_result = scale_cls().self_check()
+        except Exception as ce:
+            logger.error(f"量表插件 {source} 自检异常: {ce}", exc_info=True)
+            return False
+        if not check_result["valid"]:
+            logger.error(f"量表插件 {source} 自检失败: {check_result['errors']}")
+            return False
+        return True
+
+    @staticmethod
+    def _definition_fingerprint(pkg):
+        """定义目录下所有文件的 (路径, mtime) 集合，用于 DEBUG 下检测定义变更"""
+        entries = []
+        for path in pkg.__path__:
+            for root, _, files in os.walk(path):
+                for filename in files:
+                    if filename.endswith((".py", ".yaml", ".yml")):
+                        full_path = os.path.join(root, filename)
+                        entries.append((full_path, os.stat(full_path).st_mtime_ns))
+        return tuple(sorted(entries))
+
+    @classmethod
+    def snapshot(cls):
+        """当前注册表快照（只读）；未加载时构建，DEBUG 下定义文件变化时重新加载"""
+        if not cls._loaded:
+            return cls.discover_scales()
+        if settings.DEBUG and time.monotonic() - cls._checked_at >= DEBUG_CHECK_INTERVAL:
+            cls._checked_at = time.monotonic()
+            pkg = importlib.import_module(DEFINITIONS_PACKAGE)
+            if cls._definition_fingerprint(pkg) != cls._fingerprint:
+                logger.info("检测到量表定义变更，重新加载注册表")
+                return cls.discover_scales(reload=True)
+        return cls._registry
+
+    @classmethod
+    def payload(cls, kind, code=None):
+        """预编码的公开响应（EncodedPayload）；kind 为 list / detail / questions，不存在时返回 None"""
+        cls.snapshot()
+        return cls._payloads.get((kind, code))
 
     @classmethod
     def get_scale(cls, code):
         """返回量表实例（无用户信息）"""
-        scale_cls = cls._registry.get(code)
+        scale_cls = cls.snapshot().get(code)
         if scale_cls:
             return scale_cls()
         return None
@@ -57,20 +147,66 @@ class ScaleRegistry:
     @classmethod
     def all_scales(cls):
         """返回所有量表类（可用于批量实例化）"""
-        return [cls._registry[k] for k in cls._registry]
+        return list(cls.snapshot().values())
 
     @classmethod
-    def get_questions(cls, code):
-        """获取指定量表的题目结构"""
-        scale_cls = cls._registry.get(code)
-        if scale_cls:
-            return scale_cls().get_question_info()
-        return []
+    def score_batch(cls, code, answers):
+        """
+        批量计分：answers 为 N×Q 选项下标矩阵（缺答为 -1），返回 (ScoringTable, BatchScores)
+        量表不存在时返回 None
+        """
+        from apps.scales.scoring import score_batch, scoring_table
+
+        scale_cls = cls.snapshot().get(code)
+        if scale_cls is None:
+            return None
+        table = scoring_table(scale_cls)
+        return table, score_batch(table, answers)
 
     @classmethod
     def calculate(cls, code, selected_options):
-        """直接调用量表的评估/计分逻辑"""
-        scale = cls.get_scale(code)
-        if scale:
-            return scale.calculate(selected_options)
-        return {"error": "量表或评估逻辑不存在"}
\ No newline at end of file
+        """
+        调用量表的评估/计分逻辑，相同量表版本与答案的结果走 LRU 缓存
+        答案按 JSON 序列化作为缓存键，多选题等列表答案同样可缓存；无法序列化的答案不走缓存
+        返回顶层字典的副本；answers 等嵌套结构与缓存共享，调用方只读使用
+        """
+        scale_cls = cls.snapshot().get(code)
+        if scale_cls is None:
+            return {"error": "量表或评估逻辑不存在"}
+        try:
+            key = (code, scale_cls.version, json.dumps(selected_options, sort_keys=True))
+        except (TypeError, ValueError):
+            return scale_cls().calculate(selected_options)
+        with cls._score_cache_lock:
+            result = cls._score_cache.get(key)
+            if result is not None:
+                cls._score_cache.move_to_end(key)
+                cls._score_hits += 1
+            else:
+                cls._score_misses += 1
+            log_stats = (cls._score_hits + cls._score_misses) % SCORE_CACHE_LOG_INTERVAL == 0
+        if log_stats:
+            logger.info("量表计分缓存统计: %s", cls.score_cache_info())
+        if result is not None:
+            return dict(result)
+        # 计分在锁外进行，并发的相同未命中最多重复计算一次
+        result = scale_cls().calculate(selected_options)
+        maxsize = getattr(settings, "SCALE_SCORE_CACHE_SIZE", DEFAULT_SCORE_CACHE_SIZE)
+        with cls._score_cache_lock:
+            cls._score_cache[key] = result
+            while len(cls._score_cache) > maxsize:
+                cls._score_cache.popitem(last=False)
+        return dict(result)
+
+    @classmethod
+    def score_cache_info(cls):
+        """计分缓存的命中统计（本进程），由 calculate 定期写入日志，管理员也可通过 /scales/score-cache 查看"""
+        with cls._score_cache_lock:
+            lookups = cls._score_hits + cls._score_misses
+            return {
+                "hits": cls._score_hits,
+                "misses": cls._score_misses,
+                "hit_rate": round(cls._score_hits / lookups, 4) if lookups else 0.0,
+                "size": len(cls._score_cache),
+                "maxsize": getattr(settings, "SCALE_SCORE_CACHE_SIZE", DEFAULT_SCORE_CACHE_SIZE),
+            }
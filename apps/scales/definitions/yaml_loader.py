@@ -0,0 +1,198 @@
+"""
+YAML 量表编译器：把 yaml_configs/*.yaml 编译为与 GAD7Scale 接口一致的 BaseScale 子类
+只编译 YAML 中已声明的内容：题目选项的 value 即计分；声明了 levels 的量表编译分级阈值表，
+未声明的只出分不定级（level 为空），与没有 LEVELS 的 Python 量表一致
+每个文件只解析一次，编译结果（选项计分查找表、分级阈值表、答案校验用的每题选项数）按文件内容
+sha256 缓存到 SCALE_COMPILE_CACHE_DIR，文件未变化时启动直接读取编译结果，跳过 YAML 解析
+"""
+import bisect
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+from django.conf import settings
+
+from apps.scales.definitions.base import BaseScale
+
+logger = logging.getLogger(__name__)
+
+YAML_CONFIG_DIR = Path(__file__).resolve().parent / "yaml_configs"
+# 编译结果格式变化时递增，使旧缓存失效
+COMPILER_VERSION = 4
+META_FIELDS = ("name", "code", "version", "description", "type", "status")
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class YamlScale(BaseScale):
+    """
+    由 YAML 编译而来的量表基类，计分、分级与答案校验只做查表
+    提交接口沿用宽松计分（缺答与越界选项记 0 分），validate_answers 只供调用方按需检查，不拒绝提交
+    """
+
+    # 以下属性由 compile_scale 的编译结果填充
+    option_scores: tuple = ()  # 每题各选项的计分（选项 value）
+    option_counts: tuple = ()  # 每题选项数，答案校验查表用
+    level_thresholds: tuple = ()  # 分级上界（不含），最后一级为 inf
+    levels: tuple = ()  # 与 level_thresholds 对应的 (等级, 建议列表)；未声明 levels 时为单个空等级
+    subscales: tuple = ()  # (分量表名, 题目 id 元组)
+    max_score: float = 0.0
+
+    def validate_answers(self, selected_options: List[int]) -> List[str]:
+        """校验答案数量与每题选项下标，返回错误信息列表，为空表示完整有效"""
+        if len(selected_options) != len(self.option_counts):
+            return [f"答案数量应为 {len(self.option_counts)}，实际为 {len(selected_options)}"]
+        return [
+            f"第{idx + 1}题选项超出范围"
+            for idx, (opt_idx, count) in enumerate(zip(selected_options, self.option_counts))
+            if not 0 <= opt_idx < count
+        ]
+
+    def calculate(self, selected_options: List[int]) -> Dict[str, Any]:
+        raw_score = 0.0
+        answers = []
+        for idx, (question, scores) in enumerate(zip(self.questions, self.option_scores)):
+            answer_info = {
+                "question_id": question.get("id"),
+                "question_text": question.get("text"),
+                "selected_option": None,
+                "selected_text": None,
+                "value": 0,
+            }
+            if idx < len(selected_options) and 0 <= selected_options[idx] < len(scores):
+                opt_idx = selected_options[idx]
+                raw_score += scores[opt_idx]
+                answer_info["selected_option"] = opt_idx
+                answer_info["selected_text"] = question["options"][opt_idx].get("text", "")
+                answer_info["value"] = scores[opt_idx]
+            answers.append(answer_info)
+        total_score = raw_score
+        level, recommendations = self.levels[bisect.bisect_right(self.level_thresholds, total_score)]
+        result = {
+            "score": total_score,
+            "max_score": self.max_score,
+            "level": level,
+            "recommendations": list(recommendations),
+            "interpretation": self._get_interpretation(total_score, level),
+            "answers": answers,
+        }
+        if self.subscales:
+            item_values = {answer["question_id"]: answer["value"] for answer in answers}
+            result["subscores"] = {
+                name: float(sum(item_values.get(item_id, 0) for item_id in item_ids))
+                for name, item_ids in self.subscales
+            }
+        return result
+
+    def _get_interpretation(self, score: float, level: str) -> str:
+        if not level:
+            return f"您的{self.code}评分为{score}分。如有不适，请及时寻求专业帮助。"
+        return f"您的{self.code}评分为{score}分，评估结果为：{level}。如有不适，请及时寻求专业帮助。"
+
+
+def compile_scale(config: Dict[str, Any]) -> Dict[str, Any]:
+    """把解析后的 YAML 配置编译为可 JSON 序列化的结构"""
+    questions = []
+    option_scores = []
+    for question in config.get("questions") or []:
+        options = [
+            {"text": option.get("text", ""), "value": option.get("value", 0)}
+            for option in question.get("options") or []
+        ]
+        option_scores.append([float(option["value"]) for option in options])
+        questions.append({
+            "id": question.get("id"),
+            "text": question.get("text", question.get("question", "")),
+            "options": options,
+        })
+
+    # 未声明 levels 时只出分不定级
+    levels = config.get("levels") or [{"level": ""}]
+    if "below" in levels[-1]:
+        raise ValueError("levels 的最后一级不设 below 作为兜底")
+    thresholds = [float(level["below"]) for level in levels[:-1]]
+    if thresholds != sorted(thresholds):
+        raise ValueError("levels 的 below 阈值必须递增")
+
+    question_ids = {question["id"] for question in questions}
+    subscales = config.get("subscales") or {}
+    for name, item_ids in subscales.items():
+        unknown = set(item_ids) - question_ids
+        if unknown:
+            raise ValueError(f"分量表 {name} 引用了不存在的题目: {sorted(unknown)}")
+
+    return {
+        "meta": {field: str(config.get(field, "")) for field in META_FIELDS},
+        "questions": questions,
+        "option_scores": option_scores,
+        "option_counts": [len(scores) for scores in option_scores],
+        "level_thresholds": thresholds + [float("inf")],
+        "levels": [[level["level"], list(level.get("recommendations", []))] for level in levels],
+        "subscales": [[name, list(item_ids)] for name, item_ids in subscales.items()],
+        "max_score": sum(max(scores, default=0) for scores in option_scores),
+    }
+
+
+def build_scale_class(compiled: Dict[str, Any]) -> type:
+    """由编译结果生成 YamlScale 子类，查找表转为元组避免被意外修改"""
+    meta = compiled["meta"]
+    attrs = {
+        **meta,
+        "questions": compiled["questions"],
+        "option_scores": tuple(tuple(scores) for scores in compiled["option_scores"]),
+        "option_counts": tuple(compiled["option_counts"]),
+        "level_thresholds": tuple(compiled["level_thresholds"]),
+        "levels": tuple((level, tuple(recs)) for level, recs in compiled["levels"]),
+        "subscales": tuple((name, tuple(item_ids)) for name, item_ids in compiled["subscales"]),
+        "max_score": compiled["max_score"],
+    }
+    class_name = "".join(ch for ch in meta["code"].title() if ch.isalnum()) + "YamlScale"
+    return type(class_name, (YamlScale,), attrs)
+
+
+def _cache_path(digest: str):
+    cache_dir = getattr(settings, "SCALE_COMPILE_CACHE_DIR", None)
+    if not cache_dir:
+        return None
+    return Path(cache_dir) / f"v{COMPILER_VERSION}-{digest}.json"
+
+
+def load_compiled(path: Path) -> Dict[str, Any]:
+    """读取单个 YAML 的编译结果：按文件内容 sha256 命中缓存，否则解析编译并写入缓存"""
+    raw = path.read_bytes()
+    cache_path = _cache_path(hashlib.sha256(raw).hexdigest())
+    if cache_path and cache_path.exists():
+        try:
+            compiled = json.loads(cache_path.read_text(encoding="utf-8"))
+            # JSON 不支持 inf，缓存中以 null 表示兜底等级
+            compiled["level_thresholds"][-1] = float("inf")
+            return compiled
+        except (OSError, ValueError, KeyError, IndexError) as e:
+            logger.warning(f"量表编译缓存读取失败，重新编译: {cache_path.name}: {e}")
+
+    compiled = compile_scale(yaml.load(raw, Loader=YamlLoader))
+    if cache_path:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            serializable = {**compiled, "level_thresholds": compiled["level_thresholds"][:-1] + [None]}
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(serializable, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            # 缓存目录不可写时只影响启动速度
+            logger.warning(f"量表编译缓存写入失败: {e}")
+    return compiled
+
+
+def load_yaml_scales(directory: Path = YAML_CONFIG_DIR) -> List[type]:
+    """编译目录下全部 YAML 量表，单个文件出错只记录日志"""
+    scale_classes = []
+    for path in sorted(directory.glob("*.y*ml")):
+        try:
+            scale_classes.append(build_scale_class(load_compiled(path)))
+        except Exception as e:
+            logger.error(f"YAML 量表 {path.name} 编译失败: {e}", exc_info=True)
+    return scale_classes
@@ -0,0 +1 @@
+# 量表模块管理命令
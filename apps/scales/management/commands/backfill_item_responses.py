@@ -0,0 +1,42 @@
+"""
+回填存量量表结果的逐题作答（ScaleItemResponse）
+按 id 分批展开 selected_options，已存在的题目行忽略，可重复执行
+使用方式: python manage.py backfill_item_responses [--chunk-size 2000]
+"""
+from django.core.management.base import BaseCommand
+from apps.scales.models import ScaleItemResponse, ScaleResult
+from apps.scales.services import item_responses
+
+
+class Command(BaseCommand):
+    help = "分批回填量表结果的逐题作答"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=2000,
+            help="每批处理的量表结果数（默认 2000）"
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options["chunk_size"])
+        total = ScaleResult.objects.count()
+        self.stdout.write(self.style.NOTICE(f"开始回填逐题作答，共 {total} 条量表结果..."))
+
+        processed = 0
+        last_id = 0
+        while True:
+            rows = list(
+                ScaleResult.objects.filter(id__gt=last_id).order_by("id")
+                .values_list("id", "selected_options")[:chunk_size]
+            )
+            if not rows:
+                break
+            ScaleItemResponse.objects.bulk_create(
+                [item for result_id, selected in rows for item in item_responses(result_id, selected)],
+                batch_size=5000, ignore_conflicts=True,
+            )
+            processed += len(rows)
+            last_id = rows[-1][0]
+            self.stdout.write(f"  已处理 {processed}/{total} 条")
+
+        self.stdout.write(self.style.SUCCESS(f"回填完成：处理 {processed} 条量表结果"))
@@ -0,0 +1,55 @@
+"""
+回填存量量表结果的评估字段（analysis / level / scale_version）
+按 id 分批处理 analysis 为空的记录，可重复执行；已保存的分数与结论保持不变，
+仅在结论为空时用计分解释补齐
+使用方式: python manage.py backfill_scale_analysis [--chunk-size 500]
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.scales.definitions.registry import ScaleRegistry
+from apps.scales.models import ScaleResult
+from apps.scales.services import analysis_fields
+
+
+class Command(BaseCommand):
+    help = "分批回填量表结果的评估字段"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=500,
+            help="每批处理的记录数（默认 500）"
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options["chunk_size"])
+        pending = ScaleResult.objects.filter(analysis__isnull=True)
+        total = pending.count()
+        self.stdout.write(self.style.NOTICE(f"开始回填量表评估，共 {total} 条记录..."))
+
+        processed = 0
+        unregistered = 0
+        last_id = 0
+        while True:
+            rows = list(
+                pending.filter(id__gt=last_id).order_by("id")
+                .only("id", "scale_code", "selected_options", "conclusion")[:chunk_size]
+            )
+            if not rows:
+                break
+            for row in rows:
+                scale_obj = ScaleRegistry.get_scale(row.scale_code)
+                unregistered += scale_obj is None
+                fields = analysis_fields(scale_obj, row.selected_options)
+                row.analysis = fields["analysis"]
+                row.level = fields["level"]
+                row.scale_version = fields["scale_version"]
+                row.conclusion = row.conclusion or fields["conclusion"]
+            with transaction.atomic():
+                ScaleResult.objects.bulk_update(rows, ["analysis", "level", "scale_version", "conclusion"])
+            processed += len(rows)
+            last_id = rows[-1].id
+            self.stdout.write(f"  已处理 {processed}/{total} 条")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"回填完成：处理 {processed} 条，其中量表未注册 {unregistered} 条（记为空评估）"
+        ))
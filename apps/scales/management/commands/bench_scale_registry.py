@@ -0,0 +1,58 @@
+"""
+量表注册表单次请求开销基准：每次请求重新扫描定义 vs 读取启动时构建的快照
+按 /scales/list 与 /scales/{scale_code} 的访问方式测量注册表部分的耗时
+使用方式: python manage.py bench_scale_registry [--repeat 2000]
+"""
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from apps.scales.definitions.registry import ScaleRegistry
+
+
+def _list_and_get(code):
+    """模拟一次列表请求 + 一次详情请求对注册表的访问（预编码响应）"""
+    return ScaleRegistry.payload("list"), ScaleRegistry.payload("detail", code)
+
+
+class Command(BaseCommand):
+    help = "对比量表注册表每请求重新发现与快照读取的开销"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=2000, help="每种方式的执行次数（默认 2000）")
+
+    def handle(self, *args, **options):
+        repeat = max(1, options["repeat"])
+        code = next(iter(ScaleRegistry.snapshot()), "")
+
+        def rediscover():
+            # 改造前：每个请求都清空并重新扫描、自检全部定义，再逐个构建响应
+            registry = ScaleRegistry.discover_scales()
+            return [scale_cls().get_meta() for scale_cls in registry.values()], registry[code]()
+
+        with override_settings(DEBUG=False):
+            results = [
+                ("每请求重新发现", self._measure(rediscover, repeat)),
+                ("启动快照", self._measure(lambda: _list_and_get(code), repeat)),
+            ]
+        with override_settings(DEBUG=True):
+            results.append(("启动快照 + DEBUG mtime 检查", self._measure(lambda: _list_and_get(code), repeat)))
+
+        baseline = results[0][1]["mean_us"]
+        for label, result in results:
+            self.stdout.write(
+                f"{label}: 平均 {result['mean_us']:.1f} µs, p95 {result['p95_us']:.1f} µs, "
+                f"相对改造前 {baseline / result['mean_us']:.1f}x"
+            )
+        self.stdout.write(self.style.SUCCESS(f"共 {len(ScaleRegistry.snapshot())} 个量表，每种方式执行 {repeat} 次"))
+
+    def _measure(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1_000_000)
+        return {
+            "mean_us": statistics.mean(timings),
+            "p95_us": sorted(timings)[max(0, int(len(timings) * 0.95) - 1)],
+        }
@@ -0,0 +1,20 @@
+"""
+重新加载并自检量表定义
+修改定义文件后用于校验：重新导入定义模块，输出注册成功的量表与自检失败信息（见日志）
+注意：只作用于执行命令的进程，运行中的 Web/Celery 进程需重启后生效（DEBUG 下会按文件 mtime 自动重新加载）
+使用方式: python manage.py reload_scales
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.scales.definitions.registry import ScaleRegistry
+
+
+class Command(BaseCommand):
+    help = "重新加载量表定义并输出注册结果"
+
+    def handle(self, *args, **options):
+        registry = ScaleRegistry.discover_scales(reload=True)
+        if not registry:
+            raise CommandError("没有可用的量表定义，请检查日志中的自检/加载错误")
+        for code, scale_cls in sorted(registry.items()):
+            self.stdout.write(f"  {code}: {scale_cls.name}（版本 {scale_cls.version}）")
+        self.stdout.write(self.style.SUCCESS(f"量表注册表已重新加载，共 {len(registry)} 个量表"))
@@ -0,0 +1,205 @@
+"""
+量表阈值或计分规则变更后批量重算历史结果
+ScaleResult：按 id 分批读取答卷，组成 N×Q 矩阵批量计分，回写分数、等级、结论、评估结果与量表版本
+CognitiveAssessmentRecord：答卷只保存各量表总分，按当前阈值批量重新定级，写入 analysis 中对应量表的 level；
+未定义分级的量表不重新定级，保留客户端给出的 level
+回写使用按 id 冲突的原生 upsert
+使用方式: python manage.py rescore_scales [--scale PHQ-9] [--stale-only] [--chunk-size 2000] [--dry-run]
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+import numpy as np
+from apps.cognitive_flow.models import CognitiveAssessmentRecord
+from apps.scales.definitions.registry import ScaleRegistry
+from apps.scales.models import ScaleResult
+from apps.scales.scoring import answer_matrix, band_batch, scoring_table
+
+# upsert 回写时 INSERT 部分必须提供的非空列（冲突时不会被更新）
+UPSERT_REQUIRED_FIELDS = ("user_id", "started_at", "completed_at")
+
+# 认知测评答卷中的总分字段 -> (量表 code, analysis 中的键)
+COGNITIVE_SCORE_FIELDS = {
+    "score_scd": ("SCD-Q9", "scd"),
+    "score_mmse": ("MMSE", "mmse"),
+    "score_moca": ("MoCA", "moca"),
+    "score_gad7": ("GAD-7", "gad7"),
+    "score_phq9": ("PHQ-9", "phq9"),
+    "score_adl": ("ADL", "adl"),
+}
+
+
+class Command(BaseCommand):
+    help = "按当前量表定义批量重算历史量表结果与认知测评等级"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale", action="append", dest="scales",
+            help="仅重算指定量表（可重复），默认全部已注册量表"
+        )
+        parser.add_argument(
+            "--stale-only", action="store_true",
+            help="仅重算 scale_version 与当前定义不一致的量表结果"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=2000,
+            help="每批读取与回写的记录数（默认 2000）"
+        )
+        parser.add_argument("--dry-run", action="store_true", help="只计分统计，不写回数据库")
+
+    def handle(self, *args, **options):
+        registry = ScaleRegistry.snapshot()
+        codes = options["scales"] or sorted(registry)
+        unknown = [code for code in codes if code not in registry]
+        if unknown:
+            raise CommandError(f"量表未注册: {', '.join(unknown)}")
+        self.chunk_size = max(1, options["chunk_size"])
+        self.dry_run = options["dry_run"]
+
+        started = time.perf_counter()
+        total = 0
+        for code in codes:
+            total += self._rescore_results(registry[code], options["stale_only"])
+        total += self._rebase_cognitive(registry, codes)
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0
+        suffix = "（dry-run，未写回）" if self.dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"重算完成{suffix}：共 {total} 条，耗时 {elapsed:.1f}s，{rate:,.0f} 行/秒"
+        ))
+
+    def _report(self, label, rows, started):
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(f"  {label}: {rows} 条，{elapsed:.2f}s，{rate:,.0f} 行/秒")
+
+    def _write_back(self, model, objs, fields):
+        """
+        以 id 冲突 upsert 回写（INSERT ... ON CONFLICT DO UPDATE），只更新 fields；
+        bulk_update 的 CASE WHEN 表达式编译占重算耗时的绝大部分，upsert 的 SQL 随行数线性增长
+        先锁定本批仍存在的记录，避免并发删除的记录被重新插入
+        """
+        if self.dry_run:
+            return
+        with transaction.atomic():
+            alive = set(
+                model.objects.select_for_update().filter(id__in=[obj.id for obj in objs])
+                .values_list("id", flat=True)
+            )
+            model.objects.bulk_create(
+                [obj for obj in objs if obj.id in alive],
+                update_conflicts=True, unique_fields=["id"], update_fields=fields,
+            )
+
+    def _rescore_results(self, scale_cls, stale_only):
+        """按 id 游标分批重算某个量表的 ScaleResult"""
+        scale_obj = scale_cls()
+        table = scoring_table(scale_cls)
+        question_count = len(scale_cls.questions)
+        queryset = ScaleResult.objects.filter(scale_code=scale_cls.code)
+        if stale_only:
+            queryset = queryset.exclude(scale_version=scale_cls.version)
+
+        started = time.perf_counter()
+        processed = 0
+        last_id = 0
+        while True:
+            rows = list(
+                queryset.filter(id__gt=last_id).order_by("id")
+                .values_list("id", "selected_options", "analysis", *UPSERT_REQUIRED_FIELDS)[:self.chunk_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            answers = answer_matrix([row[1] for row in rows], question_count)
+            _, scores = ScaleRegistry.score_batch(scale_cls.code, answers)
+
+            totals = scores.totals.tolist()
+            item_scores = scores.item_scores.tolist()
+            subscores = {name: values.tolist() for name, values in scores.subscores.items()}
+            updates = []
+            for idx, (row_id, selected, analysis, *required) in enumerate(rows):
+                level, recommendations = table.levels[scores.band_index[idx]]
+                interpretation = scale_obj._get_interpretation(totals[idx], level)
+                analysis = dict(analysis or {})
+                analysis.update({
+                    "score": totals[idx],
+                    "max_score": table.max_score,
+                    "level": level,
+                    "recommendations": list(recommendations),
+                    "interpretation": interpretation,
+                })
+                for answer, value in zip(analysis.get("answers", []), item_scores[idx]):
+                    if answer.get("selected_option") is not None:
+                        answer["value"] = value
+                if subscores:
+                    analysis["subscores"] = {name: values[idx] for name, values in subscores.items()}
+                updates.append(ScaleResult(
+                    id=row_id, scale_code=scale_cls.code, selected_options=selected,
+                    score=totals[idx], level=level, conclusion=interpretation,
+                    analysis=analysis, scale_version=scale_cls.version,
+                    **dict(zip(UPSERT_REQUIRED_FIELDS, required)),
+                ))
+            self._write_back(ScaleResult, updates, ["score", "level", "conclusion", "analysis", "scale_version"])
+            processed += len(rows)
+
+        self._report(f"ScaleResult[{scale_cls.code}]", processed, started)
+        return processed
+
+    def _rebase_cognitive(self, registry, codes):
+        """认知测评只有总分，按当前阈值批量重新定级"""
+        fields = {
+            field: (code, key) for field, (code, key) in COGNITIVE_SCORE_FIELDS.items()
+            if code in codes and code in registry and scoring_table(registry[code]).graded
+        }
+        if not fields:
+            return 0
+        tables = {field: scoring_table(registry[code]) for field, (code, _) in fields.items()}
+
+        columns = list(fields)
+        scored = Q()
+        for field in columns:
+            scored |= Q(**{f"{field}__isnull": False})
+        queryset = CognitiveAssessmentRecord.objects.filter(scored)
+
+        started = time.perf_counter()
+        processed = 0
+        last_id = 0
+        while True:
+            rows = list(
+                queryset.filter(id__gt=last_id).order_by("id")
+                .values_list("id", "analysis", *columns, *UPSERT_REQUIRED_FIELDS)[:self.chunk_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            bands = {}
+            for offset, field in enumerate(columns, start=2):
+                totals = np.array(
+                    [row[offset] if row[offset] is not None else np.nan for row in rows], dtype=np.float64
+                )
+                bands[field] = (np.isnan(totals), band_batch(tables[field], totals).tolist())
+
+            updates = []
+            for idx, row in enumerate(rows):
+                analysis = dict(row[1] or {})
+                for offset, field in enumerate(columns, start=2):
+                    missing, band_index = bands[field]
+                    if missing[idx]:
+                        continue
+                    code, key = fields[field]
+                    entry = dict(analysis.get(key) or {})
+                    entry.setdefault("score", row[offset])
+                    entry["level"] = tables[field].levels[band_index[idx]][0]
+                    entry["scale_version"] = registry[code].version
+                    analysis[key] = entry
+                updates.append(CognitiveAssessmentRecord(
+                    id=row[0], analysis=analysis,
+                    **dict(zip(UPSERT_REQUIRED_FIELDS, row[-len(UPSERT_REQUIRED_FIELDS):])),
+                ))
+            self._write_back(CognitiveAssessmentRecord, updates, ["analysis"])
+            processed += len(rows)
+
+        self._report("CognitiveAssessmentRecord", processed, started)
+        return processed
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scales', '0002_local_date'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='scaleresult',
+            name='scales_scal_user_id_f49efd_idx',
+        ),
+        migrations.AddField(
+            model_name='scaleresult',
+            name='analysis',
+            field=models.JSONField(blank=True, null=True, verbose_name='评估结果'),
+        ),
+        migrations.AddField(
+            model_name='scaleresult',
+            name='level',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='评估等级'),
+        ),
+        migrations.AddField(
+            model_name='scaleresult',
+            name='scale_version',
+            field=models.CharField(blank=True, default='', max_length=32, verbose_name='量表版本'),
+        ),
+        migrations.AddIndex(
+            model_name='scaleresult',
+            index=models.Index(fields=['user_id', '-created_at', '-id'], name='scales_scal_user_id_dceb22_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scales', '0003_stored_analysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScaleItemResponse',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('item_index', models.PositiveSmallIntegerField(verbose_name='题目序号')),
+                ('option_index', models.PositiveSmallIntegerField(verbose_name='选项下标')),
+            ],
+            options={
+                'verbose_name': '逐题作答',
+                'verbose_name_plural': '逐题作答',
+            },
+        ),
+        migrations.CreateModel(
+            name='ScalePsychometrics',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('scale_code', models.CharField(max_length=64, verbose_name='量表代码')),
+                ('scale_version', models.CharField(blank=True, default='', max_length=32, verbose_name='量表版本')),
+                ('cohort', models.CharField(max_length=64, verbose_name='人群')),
+                ('respondents', models.PositiveIntegerField(default=0, verbose_name='完整作答人次')),
+                ('alpha', models.FloatField(blank=True, null=True, verbose_name="Cronbach's α")),
+                ('items', models.JSONField(default=list, verbose_name='题目统计')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='计算时间')),
+            ],
+            options={
+                'verbose_name': '量表心理测量统计',
+                'verbose_name_plural': '量表心理测量统计',
+                'ordering': ['scale_code', 'cohort'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='scaleresult',
+            index=models.Index(fields=['scale_code', 'id'], name='scales_scal_scale_c_931d7d_idx'),
+        ),
+        migrations.AddField(
+            model_name='scaleitemresponse',
+            name='result',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='item_responses', to='scales.scaleresult', verbose_name='量表结果'),
+        ),
+        migrations.AddConstraint(
+            model_name='scalepsychometrics',
+            constraint=models.UniqueConstraint(fields=('scale_code', 'cohort'), name='uniq_scale_psychometrics_cohort'),
+        ),
+        migrations.AddConstraint(
+            model_name='scaleitemresponse',
+            constraint=models.UniqueConstraint(fields=('result', 'item_index'), name='uniq_scale_item_response'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from config.fields import LocalDateField
 
 class ScaleResult(models.Model):
     id = models.AutoField(primary_key=True)
@@ -7,9 +8,14 @@ class ScaleResult(models.Model):
     score = models.FloatField(default=0.0, verbose_name="分数")
     selected_options = models.JSONField(default=list, verbose_name="选项选择")
     conclusion = models.TextField(blank=True, verbose_name="结论摘要")
+    # 提交时计算并保存的完整评估结果（等级、解释、建议、逐题得分），读取时不再重新计分
+    analysis = models.JSONField(null=True, blank=True, verbose_name="评估结果")
+    level = models.CharField(max_length=64, blank=True, default="", verbose_name="评估等级")
+    scale_version = models.CharField(max_length=32, blank=True, default="", verbose_name="量表版本")
     started_at = models.DateTimeField(verbose_name="开始时间")
     completed_at = models.DateTimeField(verbose_name="完成时间")
     created_at = models.DateTimeField(auto_now_add=True)
+    local_date = LocalDateField(null=True, verbose_name="本地日期")
 
     def __str__(self):
         return f"Result-{self.id} 用户:{self.user_id} 量表:{self.scale_code}"
@@ -18,5 +24,58 @@ class ScaleResult(models.Model):
         verbose_name = "量表结果"
         verbose_name_plural = "量表结果"
         indexes = [
-            models.Index(fields=['user_id', '-created_at'])
-        ]
\ No newline at end of file
+            models.Index(fields=['user_id', '-created_at', '-id']),
+            models.Index(fields=['user_id', 'local_date']),
+            # 按量表分批读取（重算、心理测量统计）
+            models.Index(fields=['scale_code', 'id']),
+        ]
+
+class ScaleItemResponse(models.Model):
+    """
+    逐题作答（规范化）：与 ScaleResult 同时写入，每题一行，只存题号与选项下标
+    题目得分按当前计分表由选项下标换算，避免随计分规则变化而失效
+    """
+    id = models.BigAutoField(primary_key=True)
+    # 唯一约束 (result, item_index) 已覆盖按答卷的查询，不再单独建外键索引
+    result = models.ForeignKey(
+        ScaleResult, on_delete=models.CASCADE, related_name="item_responses",
+        db_index=False, verbose_name="量表结果",
+    )
+    item_index = models.PositiveSmallIntegerField(verbose_name="题目序号")
+    option_index = models.PositiveSmallIntegerField(verbose_name="选项下标")
+
+    class Meta:
+        verbose_name = "逐题作答"
+        verbose_name_plural = "逐题作答"
+        constraints = [
+            models.UniqueConstraint(fields=["result", "item_index"], name="uniq_scale_item_response"),
+        ]
+
+    def __str__(self):
+        return f"Result-{self.result_id} 第{self.item_index + 1}题: {self.option_index}"
+
+
+class ScalePsychometrics(models.Model):
+    """按量表与人群（用户分组）汇总的心理测量统计，由 compute_scale_psychometrics 任务定期刷新"""
+    COHORT_ALL = "全部"
+
+    id = models.AutoField(primary_key=True)
+    scale_code = models.CharField(max_length=64, verbose_name="量表代码")
+    scale_version = models.CharField(max_length=32, blank=True, default="", verbose_name="量表版本")
+    cohort = models.CharField(max_length=64, verbose_name="人群")
+    respondents = models.PositiveIntegerField(default=0, verbose_name="完整作答人次")
+    alpha = models.FloatField(null=True, blank=True, verbose_name="Cronbach's α")
+    # 每题统计: [{"question_id", "mean", "std", "item_total_r"}]
+    items = models.JSONField(default=list, verbose_name="题目统计")
+    computed_at = models.DateTimeField(auto_now=True, verbose_name="计算时间")
+
+    class Meta:
+        verbose_name = "量表心理测量统计"
+        verbose_name_plural = "量表心理测量统计"
+        ordering = ["scale_code", "cohort"]
+        constraints = [
+            models.UniqueConstraint(fields=["scale_code", "cohort"], name="uniq_scale_psychometrics_cohort"),
+        ]
+
+    def __str__(self):
+        return f"{self.scale_code} [{self.cohort}] n={self.respondents}"
@@ -0,0 +1,52 @@
+"""
+量表定义的公开响应（/scales/list、/scales/{code}、/scales/{code}/questions）
+在注册表加载时一次性序列化为 JSON 字节并计算强 ETag，请求时直接返回，定义变化时随注册表重建
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class EncodedPayload:
+    """预编码的 JSON 响应体与对应的强 ETag"""
+    body: bytes
+    etag: str
+
+
+def encode_payload(data) -> EncodedPayload:
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return EncodedPayload(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+
+def scale_detail(scale_cls):
+    """量表定义详情，questions 结构标准化，便于前端渲染"""
+    questions = [
+        {
+            "id": q.get("id", ""),
+            "text": q.get("text", ""),
+            "options": q.get("options", []),
+            "type": q.get("type", "single"),
+            "required": q.get("required", True),
+            "order": q.get("order", 0),
+        }
+        for q in getattr(scale_cls, "questions", [])
+    ]
+    return {
+        "code": getattr(scale_cls, "code", ""),
+        "name": getattr(scale_cls, "name", ""),
+        "version": getattr(scale_cls, "version", ""),
+        "description": getattr(scale_cls, "description", ""),
+        "type": getattr(scale_cls, "type", ""),
+        "questions": questions,
+        "status": getattr(scale_cls, "status", ""),
+    }
+
+
+def build_payloads(registry):
+    """按注册表构建全部公开响应：("list", None)、("detail", code)、("questions", code)"""
+    payloads = {("list", None): encode_payload([scale_cls().get_meta() for scale_cls in registry.values()])}
+    for code, scale_cls in registry.items():
+        payloads[("detail", code)] = encode_payload(scale_detail(scale_cls))
+        payloads[("questions", code)] = encode_payload(scale_cls().get_question_info())
+    return payloads
@@ -0,0 +1,140 @@
+"""
+量表心理测量统计：按量表分批读取逐题作答（ScaleItemResponse），按人群（用户分组）累积
+充分统计量（人次、逐题得分和、得分叉积矩阵），最后一次性得出题目均值、标准差、
+Cronbach's α 与校正的题目-总分相关；只纳入全部题目均有作答的答卷
+结果写入 ScalePsychometrics 供 admin 查看
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from django.conf import settings
+
+from apps.scales.models import ScaleItemResponse, ScalePsychometrics, ScaleResult
+from apps.scales.scoring import score_batch, scoring_table
+from apps.users.models import User
+
+DEFAULT_CHUNK_SIZE = 5000
+UNGROUPED_COHORT = "未分组"
+
+
+@dataclass
+class ItemMoments:
+    """单个人群的充分统计量，可逐批累加"""
+    question_count: int
+    n: int = 0
+    sums: np.ndarray = field(init=False)
+    cross: np.ndarray = field(init=False)
+
+    def __post_init__(self):
+        self.sums = np.zeros(self.question_count, dtype=np.float64)
+        self.cross = np.zeros((self.question_count, self.question_count), dtype=np.float64)
+
+    def add(self, item_scores: np.ndarray):
+        self.n += item_scores.shape[0]
+        self.sums += item_scores.sum(axis=0)
+        self.cross += item_scores.T @ item_scores
+
+    def summary(self, question_ids: List) -> Dict:
+        """由累积量得出题目统计与 α；方差为 0 的题目（如不计分题）不参与 α 与相关"""
+        if self.n < 2:
+            return {"respondents": self.n, "alpha": None, "items": []}
+        means = self.sums / self.n
+        cov = (self.cross - self.n * np.outer(means, means)) / (self.n - 1)
+        variances = np.clip(np.diag(cov), 0, None)
+        scored = variances > 1e-12
+        k = int(scored.sum())
+        sub_cov = cov[np.ix_(scored, scored)]
+        total_var = sub_cov.sum()
+        alpha = None
+        if k >= 2 and total_var > 1e-12:
+            alpha = float(k / (k - 1) * (1 - variances[scored].sum() / total_var))
+
+        # 校正的题目-总分相关：cov(i, T - i) / sqrt(var_i * var(T - i))
+        item_total_cov = cov[:, scored].sum(axis=1)
+        rest_cov = item_total_cov - np.where(scored, variances, 0)
+        rest_var = total_var - 2 * item_total_cov + np.where(scored, variances, 0)
+        items = []
+        for idx, question_id in enumerate(question_ids):
+            denominator = np.sqrt(variances[idx] * rest_var[idx]) if scored[idx] else 0.0
+            items.append({
+                "question_id": question_id,
+                "mean": round(float(means[idx]), 4),
+                "std": round(float(np.sqrt(variances[idx])), 4),
+                "item_total_r": round(float(rest_cov[idx] / denominator), 4) if denominator > 1e-12 else None,
+            })
+        return {
+            "respondents": self.n,
+            "alpha": round(alpha, 4) if alpha is not None else None,
+            "items": items,
+        }
+
+
+def _chunks(scale_code: str, chunk_size: int) -> Iterable[List[tuple]]:
+    """按 (scale_code, id) 索引游标分批读取答卷 (id, user_id)"""
+    queryset = ScaleResult.objects.filter(scale_code=scale_code).order_by("id")
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).values_list("id", "user_id")[:chunk_size])
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+
+def scale_moments(scale_cls, chunk_size: Optional[int] = None) -> Dict[str, ItemMoments]:
+    """逐批读取某量表的逐题作答，返回 人群 -> 充分统计量（含“全部”）"""
+    chunk_size = chunk_size or getattr(settings, "PSYCHOMETRICS_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+    table = scoring_table(scale_cls)
+    question_count = len(scale_cls.questions)
+    cohorts = {ScalePsychometrics.COHORT_ALL: ItemMoments(question_count)}
+    groups = {}
+    for rows in _chunks(scale_cls.code, chunk_size):
+        result_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        answers = np.full((len(rows), question_count), -1, dtype=np.int64)
+        # 只读本批答卷自己的作答，稀疏量表不会把 id 区间内其他量表的作答读进内存
+        responses = np.array(
+            list(
+                ScaleItemResponse.objects.filter(
+                    result_id__in=result_ids.tolist(), item_index__lt=question_count,
+                ).values_list("result_id", "item_index", "option_index")
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        answers[np.searchsorted(result_ids, responses[:, 0]), responses[:, 1]] = responses[:, 2]
+        complete = ((answers >= 0) & (answers < table.option_counts[np.newaxis, :])).all(axis=1)
+        if not complete.any():
+            continue
+        item_scores = score_batch(table, answers[complete]).item_scores
+        cohorts[ScalePsychometrics.COHORT_ALL].add(item_scores)
+
+        user_ids = [rows[pos][1] for pos in np.flatnonzero(complete).tolist()]
+        missing = {user_id for user_id in user_ids if user_id not in groups}
+        if missing:
+            groups.update(User.objects.filter(id__in=missing).values_list("id", "group"))
+        labels = np.array([groups.get(user_id) or UNGROUPED_COHORT for user_id in user_ids])
+        for cohort in np.unique(labels).tolist():
+            if cohort not in cohorts:
+                cohorts[cohort] = ItemMoments(question_count)
+            cohorts[cohort].add(item_scores[labels == cohort])
+    return cohorts
+
+
+def refresh_psychometrics(scale_cls, chunk_size: Optional[int] = None) -> int:
+    """重新计算并保存某量表各人群的统计，删除已无数据的人群，返回人群数"""
+    question_ids = [q.get("id") for q in scale_cls.questions]
+    rows = [
+        ScalePsychometrics(
+            scale_code=scale_cls.code, scale_version=scale_cls.version, cohort=cohort,
+            **moments.summary(question_ids),
+        )
+        for cohort, moments in scale_moments(scale_cls, chunk_size).items()
+    ]
+    ScalePsychometrics.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=["scale_code", "cohort"],
+        update_fields=["scale_version", "respondents", "alpha", "items", "computed_at"],
+    )
+    ScalePsychometrics.objects.filter(scale_code=scale_cls.code).exclude(
+        cohort__in=[row.cohort for row in rows]
+    ).delete()
+    return len(rows)
@@ -0,0 +1,114 @@
+"""
+量表批量计分：把 N 份答卷组成 N×Q 的选项下标矩阵，用 NumPy 一次算出逐题得分、总分、
+分量表得分与风险等级；用于量表阈值或计分规则变更后的历史数据重算（rescore_scales）
+单份答卷的提交仍走 BaseScale.calculate，两者结果一致
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from apps.scales.definitions.yaml_loader import YamlScale
+
+
+@dataclass(frozen=True)
+class ScoringTable:
+    """由量表定义编译出的计分查找表"""
+    option_scores: np.ndarray  # Q×O，不足 O 个选项的题目以 0 填充
+    option_counts: np.ndarray  # 每题选项数，用于判断下标是否有效
+    max_score: float
+    thresholds: np.ndarray  # 分级上界（不含），与 levels 一一对应，最后一级为 inf
+    levels: Tuple[Tuple[str, Tuple[str, ...]], ...]  # (等级, 建议)
+    subscales: Tuple[str, ...]
+    membership: np.ndarray  # Q×S，题目是否属于分量表
+
+    @property
+    def graded(self) -> bool:
+        """量表是否定义了分级；未定义时只有一个空等级"""
+        return any(level for level, _ in self.levels)
+
+
+@dataclass(frozen=True)
+class BatchScores:
+    """一批答卷的计分结果，各数组第一维为答卷"""
+    item_scores: np.ndarray  # N×Q
+    totals: np.ndarray  # N
+    subscores: Dict[str, np.ndarray]  # 分量表名 -> N
+    band_index: np.ndarray  # N，对应 ScoringTable.levels 的下标
+
+
+def _padded(rows: List[List[float]]) -> np.ndarray:
+    width = max((len(row) for row in rows), default=0)
+    matrix = np.zeros((len(rows), max(width, 1)), dtype=np.float64)
+    for idx, row in enumerate(rows):
+        matrix[idx, :len(row)] = row
+    return matrix
+
+
+@lru_cache(maxsize=64)
+def scoring_table(scale_cls) -> ScoringTable:
+    """编译计分查找表；YAML 量表直接复用编译结果，Python 量表按选项 value 与 LEVELS 推导"""
+    questions = scale_cls.questions
+    if issubclass(scale_cls, YamlScale):
+        rows = [list(scores) for scores in scale_cls.option_scores]
+        max_score = scale_cls.max_score
+        thresholds = list(scale_cls.level_thresholds)
+        levels = tuple(scale_cls.levels)
+        subscale_items = dict(scale_cls.subscales)
+    else:
+        rows = [[float(option.get("value", 0)) for option in q.get("options", [])] for q in questions]
+        max_score = sum(max(row, default=0) for row in rows)
+        # 与 GAD7Scale._determine_level 一致：score < threshold 落入该级，超出最后阈值仍取最后一级
+        level_defs = getattr(scale_cls, "LEVELS", None) or [(0, "", [])]
+        thresholds = [float(threshold) for threshold, _, _ in level_defs[:-1]] + [float("inf")]
+        levels = tuple((level, tuple(recs)) for _, level, recs in level_defs)
+        subscale_items = {}
+
+    question_ids = [q.get("id") for q in questions]
+    names = tuple(subscale_items)
+    membership = np.zeros((len(questions), len(names)), dtype=np.float64)
+    for col, name in enumerate(names):
+        for item_id in subscale_items[name]:
+            membership[question_ids.index(item_id), col] = 1.0
+    return ScoringTable(
+        option_scores=_padded(rows),
+        option_counts=np.array([len(row) for row in rows], dtype=np.int64),
+        max_score=float(max_score),
+        thresholds=np.array(thresholds, dtype=np.float64),
+        levels=levels,
+        subscales=names,
+        membership=membership,
+    )
+
+
+def answer_matrix(selected_options_list, question_count: int) -> np.ndarray:
+    """把多份答卷（选项下标列表）组成 N×Q 矩阵，缺答以 -1 填充，超出题数的部分忽略"""
+    matrix = np.full((len(selected_options_list), question_count), -1, dtype=np.int64)
+    for idx, selected in enumerate(selected_options_list):
+        answers = list(selected or [])[:question_count]
+        if answers:
+            matrix[idx, :len(answers)] = answers
+    return matrix
+
+
+def score_batch(table: ScoringTable, answers: np.ndarray) -> BatchScores:
+    """对 N×Q 选项下标矩阵批量计分；无效或缺失的选项记 0 分，与 calculate 的容错一致"""
+    question_count = table.option_scores.shape[0]
+    answers = np.asarray(answers, dtype=np.int64).reshape(-1, question_count)
+    valid = (answers >= 0) & (answers < table.option_counts[np.newaxis, :])
+    safe_answers = np.where(valid, answers, 0)
+    item_scores = table.option_scores[np.arange(question_count)[np.newaxis, :], safe_answers] * valid
+    totals = item_scores.sum(axis=1)
+    subscore_matrix = item_scores @ table.membership
+    return BatchScores(
+        item_scores=item_scores,
+        totals=totals,
+        subscores={name: subscore_matrix[:, col] for col, name in enumerate(table.subscales)},
+        band_index=band_batch(table, totals),
+    )
+
+
+def band_batch(table: ScoringTable, totals: np.ndarray) -> np.ndarray:
+    """按总分批量定级，返回 levels 下标"""
+    return np.searchsorted(table.thresholds, np.asarray(totals, dtype=np.float64), side="right")
@@ -1,5 +1,8 @@
-from ninja import Schema
-from typing import Optional, List
+from django.conf import settings
+from ninja import Field, Schema
+from typing import Any, Dict, Optional, List
+
+from config.pagination import CursorQuerySchema
 
 
 class ScaleResultCreateSchema(Schema):
@@ -9,6 +12,10 @@ class ScaleResultCreateSchema(Schema):
     started_at: str
     completed_at: str
 
+class ScaleHistoryQuerySchema(CursorQuerySchema):
+    """/scales/results/history 分页参数：默认每页取 SCALE_HISTORY_PAGE_SIZE 条"""
+    page_size: int = Field(default=settings.SCALE_HISTORY_PAGE_SIZE, ge=1, le=settings.SCALE_HISTORY_PAGE_SIZE)
+
 class ScaleResultResponseSchema(Schema):
     """量表结果响应结构"""
     id: int
@@ -16,6 +23,9 @@ class ScaleResultResponseSchema(Schema):
     selected_options: List[int]
     score: float
     conclusion: Optional[str]
+    risk_level: str = ""
+    scale_version: str = ""
+    analysis: Dict[str, Any] = {}
     duration_ms: int
     started_at: str
     completed_at: str
@@ -26,5 +36,6 @@ class ScaleResultHistorySchema(Schema):
     id: int
     score: float
     scale_type: str
+    level: str = ""
     conclusion: str
     created_at: str
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+量表结果的评估落库：提交时计分一次，把完整评估结果与量表版本写入 ScaleResult，
+历史与详情接口直接读取存储列；存量数据由 backfill_scale_analysis 分批回填
+逐题作答同时写入 ScaleItemResponse，供心理测量统计按题读取；存量由 backfill_item_responses 回填
+"""
+from typing import Any, Dict, List
+
+from apps.scales.definitions.registry import ScaleRegistry
+from apps.scales.models import ScaleItemResponse
+
+
+def analysis_fields(scale_obj, selected_options: List[int]) -> Dict[str, Any]:
+    """
+    计分并返回需写入 ScaleResult 的字段；量表未注册时只记录空评估，避免回填反复处理
+    计分经 ScaleRegistry.calculate，相同答案复用缓存结果
+    """
+    if scale_obj is None:
+        return {'conclusion': '', 'analysis': {}, 'level': '', 'scale_version': ''}
+    analysis = ScaleRegistry.calculate(scale_obj.code, selected_options)
+    return {
+        'score': analysis.get('score', 0.0),
+        'conclusion': analysis.get('interpretation', ''),
+        'analysis': analysis,
+        'level': analysis.get('level', ''),
+        'scale_version': getattr(scale_obj, 'version', ''),
+    }
+
+
+def item_responses(result_id: int, selected_options) -> List[ScaleItemResponse]:
+    """把答卷的选项下标列表展开为逐题作答行，跳过缺答与非法值"""
+    return [
+        ScaleItemResponse(result_id=result_id, item_index=idx, option_index=option)
+        for idx, option in enumerate(selected_options or [])
+        if isinstance(option, int) and not isinstance(option, bool) and 0 <= option <= 32767
+    ]
@@ -0,0 +1,24 @@
+"""
+量表相关 Celery 任务：心理测量统计耗时较长，与周期报告共用 batch 队列，由 celery-batch-worker 执行
+"""
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from apps.scales.definitions.registry import ScaleRegistry
+from apps.scales.psychometrics import refresh_psychometrics
+
+logger = get_task_logger(__name__)
+
+
+@shared_task
+def compute_scale_psychometrics(scale_codes=None):
+    """按量表与人群刷新心理测量统计；scale_codes 为空时计算全部已注册量表"""
+    registry = ScaleRegistry.snapshot()
+    refreshed = {}
+    for code in scale_codes or sorted(registry):
+        scale_cls = registry.get(code)
+        if scale_cls is None:
+            logger.warning("量表未注册，跳过心理测量统计: %s", code)
+            continue
+        refreshed[code] = refresh_psychometrics(scale_cls)
+        logger.info("心理测量统计已刷新: %s，%s 个人群", code, refreshed[code])
+    return refreshed
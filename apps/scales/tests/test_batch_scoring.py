@@ -0,0 +1,69 @@
+import random
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.cognitive_flow.models import CognitiveAssessmentRecord
+from apps.scales.definitions.registry import ScaleRegistry
+from apps.scales.models import ScaleResult
+from apps.scales.scoring import answer_matrix
+
+
+class BatchScoringTests(TestCase):
+    def test_score_batch_matches_calculate_for_every_scale(self):
+        rng = random.Random(7)
+        for code, scale_cls in ScaleRegistry.snapshot().items():
+            with self.subTest(scale=code):
+                scale = scale_cls()
+                sheets = [
+                    [rng.randrange(-1, len(q["options"]) + 1) for q in scale.questions[:rng.randint(0, len(scale.questions))]]
+                    for _ in range(50)
+                ]
+                table, scores = ScaleRegistry.score_batch(code, answer_matrix(sheets, len(scale.questions)))
+                for idx, sheet in enumerate(sheets):
+                    expected = scale.calculate(sheet)
+                    self.assertEqual(scores.totals[idx], expected["score"])
+                    self.assertEqual(table.levels[scores.band_index[idx]][0], expected["level"])
+                    for name, value in expected.get("subscores", {}).items():
+                        self.assertEqual(scores.subscores[name][idx], value)
+        self.assertIsNone(ScaleRegistry.score_batch("UNKNOWN", [[0]]))
+
+    def test_rescore_command_rewrites_results_and_cognitive_levels(self):
+        now = timezone.now()
+        stale = ScaleResult.objects.create(
+            user_id="00000000-0000-0000-0000-000000000001", scale_code="MMSE",
+            selected_options=[0] * 20 + [1] * 10, score=0, level="旧等级", scale_version="0.9",
+            analysis={"answers": [{"selected_option": 0, "value": 0}]},
+            started_at=now, completed_at=now,
+        )
+        cognitive = CognitiveAssessmentRecord.objects.create(
+            user_id="00000000-0000-0000-0000-000000000001", score_mmse=25, score_scd=6,
+            analysis={"mmse": {"score": 25, "level": "客户端等级"}}, started_at=now, completed_at=now,
+        )
+        untouched = CognitiveAssessmentRecord.objects.create(
+            user_id="00000000-0000-0000-0000-000000000001", analysis={}, started_at=now, completed_at=now,
+        )
+
+        out = StringIO()
+        call_command("rescore_scales", "--scale", "MMSE", "--scale", "SCD-Q9", chunk_size=1, stdout=out)
+        self.assertIn("行/秒", out.getvalue())
+
+        stale.refresh_from_db()
+        # MMSE 的 YAML 未声明分级：重算分数与分量表，等级为空
+        self.assertEqual((stale.score, stale.level, stale.scale_version), (20.0, "", "1.0"))
+        self.assertEqual(stale.analysis["subscores"]["定向力"], 10.0)
+        self.assertEqual(stale.analysis["answers"][0]["value"], 1.0)
+        self.assertTrue(stale.conclusion.startswith("您的MMSE评分为20.0分"))
+
+        # 未定义分级的量表不重新定级，保留客户端给出的等级
+        cognitive.refresh_from_db()
+        self.assertEqual(cognitive.analysis, {"mmse": {"score": 25, "level": "客户端等级"}})
+        untouched.refresh_from_db()
+        self.assertEqual(untouched.analysis, {})
+
+        # --stale-only 跳过已是当前版本的记录
+        out = StringIO()
+        call_command("rescore_scales", "--scale", "MMSE", "--stale-only", "--dry-run", stdout=out)
+        self.assertIn("ScaleResult[MMSE]: 0 条", out.getvalue())
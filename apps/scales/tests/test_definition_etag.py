@@ -0,0 +1,50 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from apps.scales.definitions.registry import ScaleRegistry
+
+
+class ScaleDefinitionEtagTests(TestCase):
+    def test_responses_carry_strong_etag_and_cache_control(self):
+        for path in ("/api/scales/list", "/api/scales/GAD-7", "/api/scales/GAD-7/questions"):
+            resp = self.client.get(path, secure=True)
+            self.assertEqual(resp.status_code, 200)
+            self.assertTrue(resp["ETag"].startswith('"'), path)
+            self.assertIn("max-age=", resp["Cache-Control"])
+
+    def test_if_none_match_returns_304(self):
+        first = self.client.get("/api/scales/GAD-7", secure=True)
+        second = self.client.get("/api/scales/GAD-7", secure=True, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b"")
+        self.assertEqual(second["ETag"], first["ETag"])
+
+        stale = self.client.get("/api/scales/GAD-7", secure=True, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_body_matches_registry_definitions(self):
+        listing = self.client.get("/api/scales/list", secure=True).json()
+        self.assertEqual(listing, [scale_cls().get_meta() for scale_cls in ScaleRegistry.snapshot().values()])
+        detail = self.client.get("/api/scales/GAD-7", secure=True).json()
+        self.assertEqual(detail["code"], "GAD-7")
+        self.assertEqual(detail["questions"][0]["type"], "single")
+        self.assertEqual(self.client.get("/api/scales/NOPE", secure=True).json(), {"error": "量表不存在"})
+        self.assertEqual(self.client.get("/api/scales/NOPE/questions", secure=True).json(), [])
+
+    def test_payloads_encoded_once_per_registry_load(self):
+        with mock.patch("apps.scales.definitions.registry.build_payloads") as build:
+            for _ in range(3):
+                self.client.get("/api/scales/list", secure=True)
+        build.assert_not_called()
+
+    @override_settings(DEBUG=True)
+    def test_etag_changes_when_definitions_reload(self):
+        etag = self.client.get("/api/scales/GAD-7", secure=True)["ETag"]
+        with mock.patch.object(ScaleRegistry, "_fingerprint", ("changed",)), \
+                mock.patch.object(ScaleRegistry, "_checked_at", 0.0), \
+                mock.patch("apps.scales.payloads.scale_detail", return_value={"code": "GAD-7"}):
+            reloaded = self.client.get("/api/scales/GAD-7", secure=True)
+        self.assertNotEqual(reloaded["ETag"], etag)
+        # 恢复真实定义，避免影响其他用例
+        ScaleRegistry.discover_scales()
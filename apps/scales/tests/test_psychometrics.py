@@ -0,0 +1,124 @@
+import json
+import random
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.scales.definitions.registry import ScaleRegistry
+from apps.scales.models import ScaleItemResponse, ScalePsychometrics, ScaleResult
+from apps.scales.psychometrics import scale_moments
+from apps.scales.tasks import compute_scale_psychometrics
+from config.jwt_auth_adapter import create_tokens_for_user
+
+User = get_user_model()
+
+
+def _alpha(matrix):
+    k = matrix.shape[1]
+    return k / (k - 1) * (1 - matrix.var(axis=0, ddof=1).sum() / matrix.sum(axis=1).var(ddof=1))
+
+
+class ScalePsychometricsTests(TestCase):
+    def test_submit_writes_item_responses(self):
+        user = User.objects.create(username="openid_item_store", role="user")
+        token = create_tokens_for_user(user)["access"]
+        now = timezone.now().isoformat()
+        resp = self.client.post(
+            "/api/scales/results",
+            json.dumps({"scale_code": "GAD-7", "selected_options": [0, 1, 2, 3, 0, 1, 2],
+                        "started_at": now, "completed_at": now}),
+            content_type="application/json", secure=True, HTTP_AUTHORIZATION=f"Bearer {token}",
+        ).json()
+        items = ScaleItemResponse.objects.filter(result_id=resp["id"]).order_by("item_index")
+        self.assertEqual([item.option_index for item in items], [0, 1, 2, 3, 0, 1, 2])
+
+    def test_statistics_match_direct_computation_per_cohort(self):
+        rng = random.Random(3)
+        now = timezone.now()
+        users = [User.objects.create(username=f"openid_psy_{i}", role="user", group="A" if i % 2 else "")
+                 for i in range(4)]
+        sheets = {"A": [], "未分组": []}
+        for idx in range(60):
+            user = users[idx % 4]
+            base = rng.randrange(4)
+            sheet = [min(3, max(0, base + rng.choice([-1, 0, 0, 1]))) for _ in range(7)]
+            sheets[user.group or "未分组"].append(sheet)
+            ScaleResult.objects.create(
+                user_id=user.id, scale_code="GAD-7", selected_options=sheet,
+                started_at=now, completed_at=now,
+            )
+        # 不完整的答卷不参与统计
+        ScaleResult.objects.create(
+            user_id=users[0].id, scale_code="GAD-7", selected_options=[1, 2],
+            started_at=now, completed_at=now,
+        )
+        call_command("backfill_item_responses", "--chunk-size", "7", stdout=StringIO())
+        call_command("backfill_item_responses", stdout=StringIO())
+        self.assertEqual(ScaleItemResponse.objects.count(), 60 * 7 + 2)
+
+        with self.settings(PSYCHOMETRICS_CHUNK_SIZE=11):
+            refreshed = compute_scale_psychometrics(["GAD-7", "NOPE"])
+        self.assertEqual(refreshed, {"GAD-7": 3})
+
+        gad7 = ScaleRegistry.snapshot()["GAD-7"]
+        values = np.array([[option["value"] for option in q["options"]] for q in gad7.questions], dtype=float)
+        sheets[ScalePsychometrics.COHORT_ALL] = sheets["A"] + sheets["未分组"]
+        for cohort, cohort_sheets in sheets.items():
+            with self.subTest(cohort=cohort):
+                matrix = values[np.arange(7), np.array(cohort_sheets)]
+                stats = ScalePsychometrics.objects.get(scale_code="GAD-7", cohort=cohort)
+                self.assertEqual(stats.respondents, len(cohort_sheets))
+                self.assertAlmostEqual(stats.alpha, _alpha(matrix), places=3)
+                first = stats.items[0]
+                rest = matrix[:, 1:].sum(axis=1)
+                self.assertAlmostEqual(first["mean"], matrix[:, 0].mean(), places=3)
+                self.assertAlmostEqual(first["item_total_r"], np.corrcoef(matrix[:, 0], rest)[0, 1], places=3)
+
+    def test_constant_items_have_no_item_total_correlation(self):
+        now = timezone.now()
+        moca = ScaleRegistry.snapshot()["MoCA"]
+        rng = random.Random(5)
+        for _ in range(10):
+            # 第 7~11 题所有人都选第一个选项，方差为 0
+            sheet = [0 if 6 <= idx <= 10 else rng.randrange(len(q["options"])) for idx, q in enumerate(moca.questions)]
+            result = ScaleResult.objects.create(
+                user_id="00000000-0000-0000-0000-000000000001", scale_code="MoCA",
+                selected_options=sheet, started_at=now, completed_at=now,
+            )
+            ScaleItemResponse.objects.bulk_create([
+                ScaleItemResponse(result=result, item_index=idx, option_index=option)
+                for idx, option in enumerate(sheet)
+            ])
+        compute_scale_psychometrics(["MoCA"])
+        stats = ScalePsychometrics.objects.get(scale_code="MoCA", cohort=ScalePsychometrics.COHORT_ALL)
+        self.assertEqual(stats.respondents, 10)
+        self.assertIsNotNone(stats.alpha)
+        constant = [item for item in stats.items if item["std"] == 0]
+        self.assertEqual([item["question_id"] for item in constant][:5], [7, 8, 9, 10, 11])
+        self.assertTrue(all(item["item_total_r"] is None for item in constant))
+
+    def test_sparse_scale_reads_only_its_own_item_rows(self):
+        now = timezone.now()
+        user = User.objects.create(username="openid_psy_sparse", role="user")
+        for idx in range(6):
+            # 两份 GAD-7 之间夹着大量 PHQ-9 答卷，按 id 区间读取会把它们一并载入
+            code, sheet = ("GAD-7", [1] * 7) if idx in (0, 5) else ("PHQ-9", [2] * 9)
+            result = ScaleResult.objects.create(
+                user_id=user.id, scale_code=code, selected_options=sheet, started_at=now, completed_at=now,
+            )
+            ScaleItemResponse.objects.bulk_create([
+                ScaleItemResponse(result=result, item_index=item, option_index=option)
+                for item, option in enumerate(sheet)
+            ])
+        with CaptureQueriesContext(connection) as queries:
+            cohorts = scale_moments(ScaleRegistry.snapshot()["GAD-7"])
+        self.assertEqual(cohorts[ScalePsychometrics.COHORT_ALL].n, 2)
+        item_sql = [query["sql"] for query in queries if ScaleItemResponse._meta.db_table in query["sql"]]
+        self.assertEqual(len(item_sql), 1)
+        self.assertIn(" IN (", item_sql[0])
@@ -0,0 +1,42 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from apps.scales.definitions.registry import ScaleRegistry
+
+
+class ScaleRegistrySnapshotTests(TestCase):
+    def test_requests_read_snapshot_without_rediscovery(self):
+        with mock.patch.object(ScaleRegistry, "discover_scales") as discover:
+            listing = self.client.get("/api/scales/list", secure=True)
+            detail = self.client.get("/api/scales/GAD-7", secure=True)
+        discover.assert_not_called()
+        self.assertIn("GAD-7", [item["code"] for item in listing.json()])
+        self.assertEqual(len(detail.json()["questions"]), 7)
+
+    def test_snapshot_is_read_only(self):
+        with self.assertRaises(TypeError):
+            ScaleRegistry.snapshot()["X"] = object
+        # 外部拿到的列表被修改不影响注册表
+        ScaleRegistry.all_scales().clear()
+        self.assertIsNotNone(ScaleRegistry.get_scale("GAD-7"))
+
+    @override_settings(DEBUG=True)
+    def test_debug_reloads_when_definitions_change(self):
+        before = ScaleRegistry.snapshot()
+        with mock.patch.object(ScaleRegistry, "_fingerprint", ("changed",)), \
+                mock.patch.object(ScaleRegistry, "_checked_at", 0.0):
+            after = ScaleRegistry.snapshot()
+            self.assertIsNot(after, before)
+        self.assertEqual(set(after), set(before))
+        # 定义未变化时不再重建
+        ScaleRegistry._checked_at = 0.0
+        self.assertIs(ScaleRegistry.snapshot(), ScaleRegistry._registry)
+
+    def test_reload_scales_command(self):
+        out = StringIO()
+        call_command("reload_scales", stdout=out)
+        self.assertIn("GAD-7", out.getvalue())
+        self.assertIs(ScaleRegistry.get_scale("GAD-7").__class__, ScaleRegistry.snapshot()["GAD-7"])
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from apps.scales.definitions import registry
+from apps.scales.definitions.registry import ScaleRegistry
+from config.jwt_auth_adapter import create_tokens_for_user
+
+
+class ScaleScoreCacheTests(TestCase):
+    def setUp(self):
+        ScaleRegistry.discover_scales()
+
+    def test_identical_answers_hit_cache(self):
+        before = ScaleRegistry.score_cache_info()
+        gad7 = ScaleRegistry.snapshot()["GAD-7"]
+        with mock.patch.object(gad7, "calculate", autospec=True, side_effect=gad7.calculate) as calculate:
+            first = ScaleRegistry.calculate("GAD-7", [1, 2, 3, 0, 1, 2, 3])
+            second = ScaleRegistry.calculate("GAD-7", [1, 2, 3, 0, 1, 2, 3])
+            ScaleRegistry.calculate("GAD-7", [0] * 7)
+        self.assertEqual(calculate.call_count, 2)
+        self.assertEqual(first, second)
+        # 顶层为副本，修改不影响缓存
+        second["level"] = "篡改"
+        self.assertNotEqual(ScaleRegistry.calculate("GAD-7", [1, 2, 3, 0, 1, 2, 3])["level"], "篡改")
+        after = ScaleRegistry.score_cache_info()
+        self.assertEqual(after["hits"] - before["hits"], 2)
+        self.assertEqual(after["misses"] - before["misses"], 2)
+
+    @override_settings(SCALE_SCORE_CACHE_SIZE=2)
+    def test_cache_is_bounded(self):
+        for score in range(4):
+            ScaleRegistry.calculate("GAD-7", [score] * 7)
+        self.assertEqual(ScaleRegistry.score_cache_info()["size"], 2)
+
+    def test_registry_reload_invalidates_cache(self):
+        ScaleRegistry.calculate("GAD-7", [1] * 7)
+        self.assertGreater(ScaleRegistry.score_cache_info()["size"], 0)
+        ScaleRegistry.discover_scales(reload=True)
+        self.assertEqual(ScaleRegistry.score_cache_info()["size"], 0)
+
+    def test_unknown_scale(self):
+        self.assertIn("error", ScaleRegistry.calculate("NOPE", [0]))
+
+    def test_list_answers_are_cached(self):
+        # 多选题等列表答案不可哈希，按 JSON 序列化后同样命中缓存
+        gad7 = ScaleRegistry.snapshot()["GAD-7"]
+        with mock.patch.object(gad7, "calculate", autospec=True, return_value={"score": 6}) as calculate:
+            first = ScaleRegistry.calculate("GAD-7", [[1], [2, 0], 3, 0, 1, 2, 3])
+            second = ScaleRegistry.calculate("GAD-7", [[1], [2, 0], 3, 0, 1, 2, 3])
+        self.assertEqual((first, second), ({"score": 6}, {"score": 6}))
+        self.assertEqual(calculate.call_count, 1)
+
+    def test_unserializable_answers_skip_cache(self):
+        gad7 = ScaleRegistry.snapshot()["GAD-7"]
+        with mock.patch.object(gad7, "calculate", autospec=True, return_value={"score": 0}) as calculate:
+            ScaleRegistry.calculate("GAD-7", [{1}] * 7)
+            ScaleRegistry.calculate("GAD-7", [{1}] * 7)
+        self.assertEqual(calculate.call_count, 2)
+
+    @mock.patch.object(registry, "SCORE_CACHE_LOG_INTERVAL", 1)
+    def test_counters_go_to_logs_not_health(self):
+        with self.assertLogs(registry.logger, "INFO") as logs:
+            ScaleRegistry.calculate("GAD-7", [0] * 7)
+        self.assertIn("量表计分缓存统计", logs.output[0])
+        self.assertNotIn("scale_score_cache", self.client.get("/health/").json())
+
+    def test_counters_require_admin(self):
+        def fetch(role):
+            user = get_user_model().objects.create(username=f"openid_cache_{role}", role=role)
+            token = create_tokens_for_user(user)["access"]
+            return self.client.get("/api/scales/score-cache", secure=True, HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        self.assertEqual(self.client.get("/api/scales/score-cache", secure=True).status_code, 401)
+        self.assertEqual(fetch("user").status_code, 403)
+        resp = fetch("admin")
+        self.assertEqual(set(resp.json()), {"hits", "misses", "hit_rate", "size", "maxsize"})
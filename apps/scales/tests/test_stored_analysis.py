@@ -0,0 +1,98 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.scales.definitions.registry import ScaleRegistry
+from apps.scales.definitions.yaml_loader import YamlScale
+from apps.scales.models import ScaleResult
+from config.jwt_auth_adapter import create_tokens_for_user
+
+User = get_user_model()
+
+
+class StoredScaleAnalysisTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="openid_scale_history", role="user")
+        token = create_tokens_for_user(self.user)["access"]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def _submit(self, scale_code, selected_options):
+        now = timezone.now().isoformat()
+        return self.client.post(
+            "/api/scales/results",
+            json.dumps({
+                "scale_code": scale_code, "selected_options": selected_options,
+                "started_at": now, "completed_at": now,
+            }),
+            content_type="application/json", secure=True, **self.auth
+        ).json()
+
+    def test_analysis_is_stored_and_reads_do_not_rescore(self):
+        ids = [self._submit("GAD-7", [3] * 7)["id"]]
+        ids += [self._submit("PHQ-9", [index % 4] * 9)["id"] for index in range(4)]
+        result = ScaleResult.objects.get(id=ids[0])
+        self.assertEqual((result.level, result.scale_version), ("重度焦虑", "1.0"))
+        self.assertEqual(result.analysis["score"], 21.0)
+
+        gad7_cls = ScaleRegistry.snapshot()["GAD-7"]
+        with mock.patch.object(gad7_cls, "calculate", side_effect=AssertionError), \
+                mock.patch.object(YamlScale, "calculate", side_effect=AssertionError):
+            seen = []
+            cursor = None
+            while True:
+                params = {"page_size": 2, **({"cursor": cursor} if cursor else {})}
+                with self.assertNumQueries(2):
+                    resp = self.client.get("/api/scales/results/history", params, secure=True, **self.auth)
+                self.assertEqual(resp.status_code, 200)
+                seen.extend(resp.json())
+                cursor = resp.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+            detail = self.client.get(f"/api/scales/results/{ids[0]}", secure=True, **self.auth).json()
+
+        self.assertEqual([item["id"] for item in seen], sorted(ids, reverse=True))
+        self.assertEqual(seen[-1]["level"], "重度焦虑")
+        self.assertEqual(seen[-1]["scale_type"], "GAD")
+        self.assertEqual(detail["risk_level"], "重度焦虑")
+        self.assertEqual(detail["analysis"]["max_score"], 21.0)
+
+    def test_history_default_page_returns_all_results(self):
+        # 小程序不传 page_size 也不读取游标：默认页须覆盖全部历史结果
+        ids = [self._submit("GAD-7", [1] * 7)["id"] for _ in range(25)]
+        resp = self.client.get("/api/scales/results/history", secure=True, **self.auth)
+        self.assertEqual([item["id"] for item in resp.json()], sorted(ids, reverse=True))
+        self.assertNotIn("X-Next-Cursor", resp.headers)
+
+    def test_backfill_fills_legacy_rows_in_chunks(self):
+        now = timezone.now()
+        legacy = [
+            ScaleResult.objects.create(
+                user_id=self.user.id, scale_code=code, score=score, selected_options=options,
+                conclusion=conclusion, started_at=now, completed_at=now,
+            )
+            for code, score, options, conclusion in [
+                ("GAD-7", 7.0, [1] * 7, "旧结论"),
+                ("PHQ-9", 0.0, [0] * 9, ""),
+                ("REMOVED", 3.0, [1], ""),
+            ]
+        ]
+        out = StringIO()
+        call_command("backfill_scale_analysis", chunk_size=2, stdout=out)
+        self.assertIn("量表未注册 1 条", out.getvalue())
+
+        gad7, phq9, removed = [ScaleResult.objects.get(id=row.id) for row in legacy]
+        self.assertEqual((gad7.level, gad7.conclusion, gad7.score), ("轻度焦虑", "旧结论", 7.0))
+        # PHQ-9 的 YAML 未声明分级，回填只出分
+        self.assertEqual(phq9.level, "")
+        self.assertTrue(phq9.conclusion.startswith("您的PHQ-9评分为0.0分"))
+        self.assertEqual(removed.analysis, {})
+        self.assertFalse(ScaleResult.objects.filter(analysis__isnull=True).exists())
+
+        # 重复执行不再处理已回填的记录
+        with mock.patch.object(ScaleRegistry, "get_scale", side_effect=AssertionError):
+            call_command("backfill_scale_analysis", stdout=StringIO())
@@ -0,0 +1,108 @@
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.scales.definitions.gad7 import GAD7Scale
+from apps.scales.definitions.registry import ScaleRegistry
+from apps.scales.definitions.yaml_loader import (
+    YAML_CONFIG_DIR, YamlScale, build_scale_class, compile_scale, load_compiled,
+)
+from apps.scales.models import ScaleResult
+from config.jwt_auth_adapter import create_tokens_for_user
+
+User = get_user_model()
+
+
+class YamlScaleTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username="openid_scale", role="user")
+        token = create_tokens_for_user(user)["access"]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def _submit(self, scale_code, selected_options):
+        now = timezone.now().isoformat()
+        return self.client.post(
+            "/api/scales/results",
+            json.dumps({
+                "scale_code": scale_code, "selected_options": selected_options,
+                "started_at": now, "completed_at": now,
+            }),
+            content_type="application/json", secure=True, **self.auth
+        ).json()
+
+    def test_yaml_scales_are_registered_and_python_wins(self):
+        codes = {item["code"] for item in self.client.get("/api/scales/list", secure=True).json()}
+        self.assertEqual(codes, {"GAD-7", "PHQ-9", "MMSE", "MoCA", "ADL", "SCD-Q9", "SUS"})
+        # 其他用例可能执行过 reload_scales，按类名比较而非类对象
+        self.assertEqual(ScaleRegistry.snapshot()["GAD-7"].__name__, GAD7Scale.__name__)
+        self.assertFalse(issubclass(ScaleRegistry.snapshot()["GAD-7"], YamlScale))
+        self.assertTrue(issubclass(ScaleRegistry.snapshot()["PHQ-9"], YamlScale))
+
+        detail = self.client.get("/api/scales/PHQ-9", secure=True).json()
+        self.assertEqual(len(detail["questions"]), 9)
+        self.assertEqual(detail["questions"][0]["text"], "做事时提不起劲或没有兴趣。")
+
+    def test_scores_follow_declared_option_values(self):
+        phq9 = ScaleRegistry.get_scale("PHQ-9").calculate([3] * 9)
+        self.assertEqual((phq9["score"], phq9["max_score"]), (27.0, 27.0))
+        self.assertEqual(phq9["answers"][0]["selected_text"], "几乎每天")
+        # YAML 未声明 levels：只出分不定级
+        self.assertEqual((phq9["level"], phq9["recommendations"]), ("", []))
+        self.assertEqual(phq9["interpretation"], "您的PHQ-9评分为27.0分。如有不适，请及时寻求专业帮助。")
+
+        # 计分即选项 value，不做 YAML 未声明的反向计分或换算
+        self.assertEqual(ScaleRegistry.get_scale("SUS").calculate([4] * 10)["score"], 50.0)
+
+        saved = self._submit("SCD-Q9", [0, 0, 0, 0, 0, 1, 2, 1, 1])
+        self.assertTrue(saved["success"])
+        self.assertEqual(ScaleResult.objects.get(id=saved["id"]).score, 5.0)
+
+        # 提交接口保持原有的宽松行为：缺答与越界选项记 0 分
+        partial = self._submit("MMSE", [0] * 29)
+        self.assertTrue(partial["success"])
+        self.assertEqual(ScaleResult.objects.get(id=partial["id"]).score, 29.0)
+
+    def test_compiled_answer_validator(self):
+        # 校验器由编译结果查表，只供调用方检查，提交接口不据此拒绝
+        mmse = ScaleRegistry.get_scale("MMSE")
+        self.assertEqual(mmse.validate_answers([0] * 30), [])
+        self.assertEqual(mmse.validate_answers([0] * 29), ["答案数量应为 30，实际为 29"])
+        adl = ScaleRegistry.get_scale("ADL")
+        self.assertEqual(len(adl.option_counts), 20)
+        self.assertEqual(adl.validate_answers([0] * 19 + [4]), ["第20题选项超出范围"])
+        self.assertEqual(adl.validate_answers([-1] + [0] * 19), ["第1题选项超出范围"])
+
+    def test_declared_levels_are_compiled_into_cutoffs(self):
+        compiled = compile_scale({
+            "code": "DEMO", "questions": [{"id": 1, "options": [{"value": 0}, {"value": 3}]}],
+            "levels": [{"below": 2, "level": "低", "recommendations": ["a"]}, {"level": "高"}],
+        })
+        scale = build_scale_class(compiled)()
+        self.assertEqual((scale.calculate([0])["level"], scale.calculate([1])["level"]), ("低", "高"))
+        with self.assertRaises(ValueError):
+            compile_scale({"code": "BAD", "questions": [], "levels": [{"below": 2, "level": "低"}]})
+
+    def test_compile_cache_is_keyed_on_file_hash(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        source = Path(cache_dir) / "phq9.yaml"
+        source.write_bytes((YAML_CONFIG_DIR / "phq9.yaml").read_bytes())
+
+        with override_settings(SCALE_COMPILE_CACHE_DIR=cache_dir):
+            compiled = load_compiled(source)
+            self.assertEqual(len(list(Path(cache_dir).glob("v*.json"))), 1)
+            # 内容未变化时直接读取缓存，不再解析 YAML
+            with mock.patch("apps.scales.definitions.yaml_loader.yaml.load") as parse:
+                self.assertEqual(load_compiled(source), compiled)
+            parse.assert_not_called()
+
+            source.write_text(source.read_text(encoding="utf-8").replace('version: "1.0"', 'version: "1.1"'),
+                              encoding="utf-8")
+            self.assertEqual(load_compiled(source)["meta"]["version"], "1.1")
+            self.assertEqual(len(list(Path(cache_dir).glob("v*.json"))), 2)
@@ -2,15 +2,24 @@
 量表API视图 - 改进版本，更好的代码组织和可维护性
 """
 
-from ninja import Router
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from ninja import Query, Router
+from ninja.errors import HttpError
 from typing import List, Dict, Any
 from apps.scales.definitions.registry import ScaleRegistry
+from apps.scales.models import ScaleItemResponse, ScaleResult
 from apps.scales.serializers import (
     ScaleResultCreateSchema,
     ScaleResultResponseSchema,
     ScaleResultHistorySchema,
+    ScaleHistoryQuerySchema,
 )
+from apps.scales.services import analysis_fields, item_responses
 from config.jwt_auth_adapter import jwt_auth
+from config.pagination import NEXT_CURSOR_HEADER, keyset_page
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,31 +33,30 @@ class ScaleResultViewHelper:
 @scales_router.get(
     "/results/history", auth=jwt_auth, response=List[ScaleResultHistorySchema]
 )
-def get_user_scale_history(request):
-    """获取用户量表结果历史（自动适配插件处理类）"""
-    try:
-        user_id = str(request.user.id)
-        from apps.scales.models import ScaleResult
-
-        ScaleRegistry.discover_scales()
-        results = ScaleResult.objects.filter(user_id=user_id).order_by("-created_at")
-        history_list = []
-        for r in results:
-            scale_obj = ScaleRegistry.get_scale(r.scale_code)
-            analysis = scale_obj.calculate(r.selected_options) if scale_obj else {}
-            history_list.append(
-                {
-                    "id": int(r.id) if r.id is not None else 0,
-                    "score": r.score,
-                    "scale_type": getattr(scale_obj, "type", "") if scale_obj else "",
-                    "conclusion": r.conclusion or analysis.get("interpretation", ""),
-                    "created_at": r.created_at.isoformat() if r.created_at else "",
-                }
-            )
-        return history_list
-    except Exception as e:
-        logger.error(f"量表历史接口异常: {e}", exc_info=True)
-        return []
+def get_user_scale_history(request, response: HttpResponse, filters: ScaleHistoryQuerySchema = Query(...)):
+    """
+    获取用户量表结果历史（按创建时间倒序，游标分页，只读取提交时保存的评估字段）
+    不传 page_size 时一次返回最近 SCALE_HISTORY_PAGE_SIZE 条，与分页前的小程序调用方式兼容；
+    还有下一页时通过响应头 X-Next-Cursor 返回游标，回传 cursor 参数即可继续翻页
+    """
+    queryset = ScaleResult.objects.filter(user_id=request.user.id).values(
+        "id", "score", "scale_code", "level", "conclusion", "created_at",
+    )
+    rows, next_cursor = keyset_page(queryset, filters.cursor, filters.page_size)
+    if next_cursor:
+        response[NEXT_CURSOR_HEADER] = next_cursor
+    registry = ScaleRegistry.snapshot()
+    return [
+        {
+            "id": row["id"],
+            "score": row["score"],
+            "scale_type": getattr(registry.get(row["scale_code"]), "type", ""),
+            "level": row["level"],
+            "conclusion": row["conclusion"],
+            "created_at": row["created_at"].isoformat(),
+        }
+        for row in rows
+    ]
 
 
 @scales_router.post("/results", auth=jwt_auth, response=Dict[str, Any])
@@ -56,24 +64,21 @@ def create_scale_result(request, data: ScaleResultCreateSchema):
     """提交量表结果"""
     try:
         user_id = str(request.user.id)
-        ScaleRegistry.discover_scales()
         scale_obj = ScaleRegistry.get_scale(data.scale_code)
         if not scale_obj:
             logger.error("量表未注册: scale_code=%s", data.scale_code)
             return {"error": "量表未注册"}
 
-        analysis = ScaleRegistry.calculate(data.scale_code, data.selected_options)
-        from apps.scales.models import ScaleResult
-
-        result = ScaleResult.objects.create(
-            user_id=user_id,
-            scale_code=data.scale_code,
-            score=analysis.get("score", 0.0),
-            selected_options=data.selected_options,
-            conclusion=analysis.get("interpretation", ""),
-            started_at=data.started_at,
-            completed_at=data.completed_at,
-        )
+        with transaction.atomic():
+            result = ScaleResult.objects.create(
+                user_id=user_id,
+                scale_code=data.scale_code,
+                selected_options=data.selected_options,
+                started_at=data.started_at,
+                completed_at=data.completed_at,
+                **analysis_fields(scale_obj, data.selected_options),
+            )
+            ScaleItemResponse.objects.bulk_create(item_responses(result.id, data.selected_options))
         logger.info(
             "量表结果创建成功: id=%s, user_id=%s, scale_code=%s",
             result.id, user_id, data.scale_code,
@@ -89,86 +94,67 @@ def create_scale_result(request, data: ScaleResultCreateSchema):
         return {"error": "提交失败"}
 
 
+def _encoded_json(request, payload):
+    """返回预编码的 JSON；If-None-Match 命中 ETag 时返回 304"""
+    if payload.etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(payload.body, content_type="application/json; charset=utf-8")
+    response["ETag"] = payload.etag
+    response["Cache-Control"] = f"public, max-age={settings.SCALE_DEFINITION_CACHE_SECONDS}"
+    return response
+
+
 @scales_router.get("/list", response=List[Dict])
 def list_scale_types(request):
-    """获取所有可用量表类型及元信息（插件机制）"""
-    try:
-        ScaleRegistry.discover_scales()
-        types = []
-        for scale_cls in ScaleRegistry.all_scales():
-            types.append(scale_cls().get_meta())
-        return types
-    except Exception as e:
-        logger.error(f"获取量表类型失败: {str(e)}")
-        return []
+    """获取所有可用量表类型及元信息（插件机制，注册表加载时预编码）"""
+    return _encoded_json(request, ScaleRegistry.payload("list"))
+
+
+@scales_router.get("/score-cache", auth=jwt_auth, response=Dict[str, Any])
+def get_score_cache_info(request):
+    """计分缓存命中统计（仅管理员），统计为处理本请求的进程的数据，监控时按进程汇总"""
+    if getattr(request.auth, "role", None) != "admin":
+        raise HttpError(403, "需要管理员权限")
+    return ScaleRegistry.score_cache_info()
 
 
 @scales_router.get("/{scale_code}/questions", response=List[Dict])
 def get_scale_questions(request, scale_code: str):
-    """获取指定量表的题目结构（插件机制）"""
-    try:
-        ScaleRegistry.discover_scales()
-        questions = ScaleRegistry.get_questions(scale_code)
-        return questions
-    except Exception as e:
-        logger.error(f"获取量表题目失败: {str(e)}")
+    """获取指定量表的题目结构（插件机制，注册表加载时预编码）"""
+    payload = ScaleRegistry.payload("questions", scale_code)
+    if payload is None:
         return []
+    return _encoded_json(request, payload)
 
 
 @scales_router.get("/{scale_code}", response=Dict)
 def get_scale(request, scale_code: str):
-    """获取量表定义详情（无数据库依赖），业务优化：questions结构标准化，前端易用"""
-    try:
-        ScaleRegistry.discover_scales()
-        scale_cls = ScaleRegistry.get_scale(scale_code)
-        if not scale_cls:
-            return {"error": "量表不存在"}
-        # 标准化题目结构，便于前端渲染
-        questions = []
-        for q in getattr(scale_cls, "questions", []):
-            questions.append(
-                {
-                    "id": q.get("id", ""),
-                    "text": q.get("text", ""),
-                    "options": q.get("options", []),
-                    "type": q.get("type", "single"),
-                    "required": q.get("required", True),
-                    "order": q.get("order", 0),
-                }
-            )
-        return {
-            "code": getattr(scale_cls, "code", ""),
-            "name": getattr(scale_cls, "name", ""),
-            "version": getattr(scale_cls, "version", ""),
-            "description": getattr(scale_cls, "description", ""),
-            "type": getattr(scale_cls, "type", ""),
-            "questions": questions,
-            "status": getattr(scale_cls, "status", ""),
-        }
-    except Exception as e:
-        return {"error": f"获取量表定义失败: {str(e)}"}
+    """获取量表定义详情（无数据库依赖），questions 结构标准化，注册表加载时预编码"""
+    payload = ScaleRegistry.payload("detail", scale_code)
+    if payload is None:
+        return {"error": "量表不存在"}
+    return _encoded_json(request, payload)
 
 
 @scales_router.get("/results/{result_id}", response=ScaleResultResponseSchema, auth=jwt_auth)
 def get_scale_result(request, result_id: int):
     """获取单量表结果详情（仅本人）"""
     try:
-        from apps.scales.models import ScaleResult
-
         result = ScaleResult.objects.filter(id=result_id, user_id=str(request.user.id)).first()
         if not result:
             return {"error": "结果不存在"}
-        ScaleRegistry.discover_scales()
-        scale_obj = ScaleRegistry.get_scale(result.scale_code)
-        questions = getattr(scale_obj, "questions", []) if scale_obj else []
-        analysis = scale_obj.calculate(result.selected_options) if scale_obj else {}
+        scale_cls = ScaleRegistry.snapshot().get(result.scale_code)
+        questions = getattr(scale_cls, "questions", []) if scale_cls else []
+        analysis = result.analysis or {}
         return ScaleResultResponseSchema(
             id=result.id,
             scale_code=result.scale_code,
             questions=questions,
             selected_options=[int(x) for x in result.selected_options],
             score=result.score,
-            risk_level=analysis.get("level", ""),
+            risk_level=result.level,
+            scale_version=result.scale_version,
             conclusion=result.conclusion or analysis.get("interpretation", ""),
             duration_ms=int(
                 (result.completed_at - result.started_at).total_seconds() * 1000
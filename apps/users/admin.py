@@ -4,6 +4,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
 from django.contrib.auth.models import Group
+from apps.exports.admin import queue_export
 from .models import User
 
 
@@ -165,10 +166,8 @@ class UserAdmin(BaseUserAdmin):
     mark_as_untracked.short_description = "批量标记为未跟踪"
 
     def export_selected(self, request, queryset):
-        """导出选中的用户信息"""
-        # 这里可以添加导出功能
-        user_count = queryset.count()
-        self.message_user(request, f"已选择 {user_count} 个用户进行导出")
+        """导出选中的用户信息（XLSX格式），由后台任务生成文件"""
+        queue_export(self, request, "users", queryset.order_by("-date_joined"))
 
     export_selected.short_description = "导出选中的用户"
 
@@ -0,0 +1,57 @@
+"""
+用户信息 XLSX 导出（后台导出任务调用）
+"""
+from django.utils import timezone
+from apps.exports.xlsx import write_xlsx
+from .models import User
+
+EXPORT_HEADERS = [
+    '编号', '用户名', '姓名', '性别', '年龄', '学历', '省份', '城市', '区县', '手机号',
+    '分组', '角色', '是否跟踪', '信息已完善', '已完成初次认知评估',
+    '注册时间', '最后登录', '上次每日情绪测试时间',
+]
+COLUMN_WIDTHS = [8, 20, 12, 8, 8, 10, 10, 10, 10, 14, 12, 10, 10, 10, 12, 18, 18, 18]
+EXPORT_FIELDS = (
+    'username', 'real_name', 'gender', 'age', 'education', 'province', 'city', 'district',
+    'phone', 'group', 'role', 'is_tracked', 'is_profile_complete',
+    'has_completed_cognitive_assessment', 'date_joined', 'last_login', 'last_mood_tested_at',
+)
+GENDER_LABELS = dict(User.GENDER_CHOICES)
+ROLE_LABELS = dict(User.ROLE_CHOICES)
+DATETIME_FORMAT = '%Y年%m月%d日 %H:%M'
+
+
+def _format_datetime(value):
+    return timezone.localtime(value).strftime(DATETIME_FORMAT) if value else ''
+
+
+def write_users_xlsx(queryset, fileobj, chunk_size=2000, on_progress=None):
+    """将 queryset 中的用户写入 fileobj，返回写入的行数"""
+    def rows():
+        users = queryset.values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+        for index, user in enumerate(users, 1):
+            yield [
+                index,
+                user['username'],
+                user['real_name'] or '',
+                GENDER_LABELS.get(user['gender'], user['gender'] or ''),
+                user['age'] if user['age'] is not None else '',
+                user['education'] or '',
+                user['province'] or '',
+                user['city'] or '',
+                user['district'] or '',
+                user['phone'] or '',
+                user['group'] or '',
+                ROLE_LABELS.get(user['role'], user['role']),
+                1 if user['is_tracked'] else 0,
+                1 if user['is_profile_complete'] else 0,
+                1 if user['has_completed_cognitive_assessment'] else 0,
+                _format_datetime(user['date_joined']),
+                _format_datetime(user['last_login']),
+                _format_datetime(user['last_mood_tested_at']),
+            ]
+
+    return write_xlsx(
+        fileobj, '用户信息', EXPORT_HEADERS, COLUMN_WIDTHS, rows(),
+        on_progress=on_progress, progress_every=chunk_size,
+    )
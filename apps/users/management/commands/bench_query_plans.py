@@ -0,0 +1,205 @@
+"""
+按用户访问路径的查询计划与耗时基准
+生成 users × days 的历史数据（情绪记录、日记、报告、量表、认知测评、通知日志），
+逐个接口打印与视图一致的查询的执行计划，并统计多次执行的耗时
+数据在事务内生成，结束后整体回滚，不会残留在数据库中
+使用方式: python manage.py bench_query_plans [--users 10000] [--days 730] [--repeat 20]
+"""
+import random
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, time as dt_time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.cognitive_flow.models import CognitiveAssessmentRecord
+from apps.emotiontracker.models import EmotionDailyRollup, EmotionRecord
+from apps.emotiontracker.services import rebuild_rollups
+from apps.journals.models import MoodJournal
+from apps.notice.models import NotificationLog
+from apps.reports.models import HealthReport
+from apps.scales.models import ScaleResult
+from apps.users.models import User
+
+# 每位用户的数据密度：每 N 天一条
+JOURNAL_EVERY_DAYS = 3
+SCALE_EVERY_DAYS = 14
+REPORT_EVERY_DAYS = 30
+COGNITIVE_EVERY_DAYS = 90
+NOTIFICATION_EVERY_DAYS = 2
+FULL_SCAN_MARKERS = ("Seq Scan", "SCAN ")
+
+
+# 与各视图一致的查询：(名称, 是否按用户, 构造函数)
+def _access_patterns(today):
+    month_ago = today - timedelta(days=29)
+    return [
+        ("emotiontracker/list", True, lambda uid: EmotionRecord.objects.filter(user_id=uid)
+            .order_by("-created_at", "-id")[:21]),
+        ("emotiontracker/trend", True, lambda uid: EmotionDailyRollup.objects.filter(
+            user_id=uid, record_date__range=[today - timedelta(days=364), today])),
+        ("journals/", True, lambda uid: MoodJournal.objects.filter(user_id=uid)[:10]),
+        ("journals/statistics/daily", True, lambda uid: MoodJournal.objects.filter(
+            user_id=uid, local_date__range=[month_ago, today]).order_by()),
+        ("reports/", True, lambda uid: HealthReport.objects.filter(user_id=uid)[:10]),
+        ("reports/trends", True, lambda uid: HealthReport.objects.filter(
+            user_id=uid, local_date__range=[today - timedelta(days=90), today]).order_by("created_at")),
+        ("scales/results/history", True, lambda uid: ScaleResult.objects.filter(user_id=uid)
+            .order_by("-created_at")),
+        ("cognitive/history", True, lambda uid: CognitiveAssessmentRecord.objects.filter(user_id=uid)
+            .order_by("-created_at")[:200]),
+        ("提醒任务: 当日已填写用户", False, lambda uid: EmotionRecord.objects.filter(
+            record_date=today, period=EmotionRecord.PERIOD_MORNING).values_list("user_id", flat=True).order_by().distinct()),
+        ("后台: 失败通知日志", False, lambda uid: NotificationLog.objects.filter(
+            status="failed", created_at__gte=timezone.now() - timedelta(days=7)).order_by("created_at")[:100]),
+    ]
+
+
+@contextmanager
+def _explicit_timestamps(*fields):
+    """生成历史数据时临时关闭 auto_now_add，使 created_at 等保留传入的历史时间"""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = "生成按用户的历史数据，打印各接口查询的执行计划与耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000, help="生成的用户数（默认 10000）")
+        parser.add_argument("--days", type=int, default=730, help="每位用户的历史天数（默认 730，即 2 年）")
+        parser.add_argument("--repeat", type=int, default=20, help="每个查询的执行次数（默认 20）")
+        parser.add_argument("--seed", type=int, default=42, help="随机种子")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        today = timezone.localdate()
+
+        with transaction.atomic():
+            user_ids = self._seed(rng, max(1, options["users"]), max(1, options["days"]), today)
+            self._analyze()
+            sample = [rng.choice(user_ids) for _ in range(max(1, options["repeat"]))]
+            full_scans = []
+            for label, per_user, build in _access_patterns(today):
+                plan = self._explain(build(sample[0]))
+                result = self._measure(build, sample if per_user else sample[:1] * len(sample))
+                self.stdout.write(self.style.MIGRATE_HEADING(f"== {label}"))
+                self.stdout.write(
+                    f"平均 {result['mean_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, 返回 {result['rows']:.0f} 行"
+                )
+                self.stdout.write(plan)
+                if self._is_full_scan(plan):
+                    full_scans.append(label)
+            transaction.set_rollback(True)
+
+        if full_scans:
+            self.stdout.write(self.style.ERROR(f"存在全表扫描: {', '.join(full_scans)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("所有查询均命中索引"))
+
+    def _seed(self, rng, users, days, today):
+        self.stdout.write(self.style.NOTICE(f"生成 {users} 位用户 × {days} 天的历史数据..."))
+        user_ids = [uuid.uuid4() for _ in range(users)]
+        User.objects.bulk_create([
+            User(id=user_id, username=f"bench_{user_id.hex}", role="user") for user_id in user_ids
+        ], batch_size=2000)
+
+        buffers = {model: [] for model in (
+            EmotionRecord, MoodJournal, HealthReport, ScaleResult, CognitiveAssessmentRecord, NotificationLog,
+        )}
+
+        def flush(force=False):
+            for model, objs in buffers.items():
+                if objs and (force or len(objs) >= 5000):
+                    model.objects.bulk_create(objs, batch_size=5000)
+                    objs.clear()
+
+        timestamp_fields = [
+            EmotionRecord._meta.get_field("created_at"),
+            MoodJournal._meta.get_field("record_date"),
+            MoodJournal._meta.get_field("created_at"),
+            HealthReport._meta.get_field("created_at"),
+            ScaleResult._meta.get_field("created_at"),
+            CognitiveAssessmentRecord._meta.get_field("created_at"),
+            NotificationLog._meta.get_field("created_at"),
+        ]
+        with _explicit_timestamps(*timestamp_fields):
+            for user_id in user_ids:
+                for offset in range(days):
+                    day = today - timedelta(days=offset)
+                    morning = timezone.make_aware(datetime.combine(day, dt_time(9, rng.randint(0, 59))))
+                    evening = morning + timedelta(hours=12)
+                    for period, moment in ((EmotionRecord.PERIOD_MORNING, morning),
+                                           (EmotionRecord.PERIOD_EVENING, evening)):
+                        buffers[EmotionRecord].append(EmotionRecord(
+                            user_id=user_id, record_date=day, period=period, created_at=moment,
+                            depression=rng.randint(0, 40), anxiety=rng.randint(0, 10),
+                            energy=rng.randint(0, 3), sleep=rng.randint(0, 4),
+                        ))
+                    if offset % JOURNAL_EVERY_DAYS == 0:
+                        buffers[MoodJournal].append(MoodJournal(
+                            user_id=user_id, mainMood="平静", moodIntensity=rng.randint(1, 3),
+                            record_date=evening, created_at=evening,
+                        ))
+                    if offset % SCALE_EVERY_DAYS == 0:
+                        buffers[ScaleResult].append(ScaleResult(
+                            user_id=user_id, scale_code="GAD-7", score=rng.randint(0, 21),
+                            started_at=morning, completed_at=morning, created_at=morning,
+                        ))
+                    if offset % REPORT_EVERY_DAYS == 0:
+                        buffers[HealthReport].append(HealthReport(
+                            user_id=user_id, assessment_id=0, report_type="综合", overall_risk="低风险",
+                            summary="", professional_advice="", trend_analysis="", created_at=evening,
+                        ))
+                    if offset % COGNITIVE_EVERY_DAYS == 0:
+                        buffers[CognitiveAssessmentRecord].append(CognitiveAssessmentRecord(
+                            user_id=user_id, score_mmse=rng.randint(10, 30),
+                            started_at=morning, completed_at=morning, created_at=morning,
+                        ))
+                    if offset % NOTIFICATION_EVERY_DAYS == 0:
+                        buffers[NotificationLog].append(NotificationLog(
+                            user_id=user_id, template_id="bench", message_data={},
+                            status=rng.choice(["success", "success", "success", "failed"]),
+                            created_at=morning,
+                        ))
+                flush()
+            flush(force=True)
+        rebuild_rollups(EmotionRecord.objects.filter(user_id__in=user_ids))
+        return user_ids
+
+    def _analyze(self):
+        """刷新统计信息，保证执行计划反映真实数据分布"""
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def _explain(self, queryset):
+        if connection.vendor == "postgresql":
+            return queryset.explain(analyze=True)
+        return queryset.explain()
+
+    def _is_full_scan(self, plan):
+        for line in plan.splitlines():
+            if any(marker in line for marker in FULL_SCAN_MARKERS) and "USING" not in line:
+                return True
+        return False
+
+    def _measure(self, build, sample):
+        timings = []
+        rows = []
+        for user_id in sample:
+            queryset = build(user_id)
+            started = time.perf_counter()
+            rows.append(len(list(queryset)))
+            timings.append((time.perf_counter() - started) * 1000)
+        return {
+            "mean_ms": statistics.mean(timings),
+            "p95_ms": sorted(timings)[max(0, int(len(timings) * 0.95) - 1)],
+            "rows": statistics.mean(rows),
+        }
@@ -36,7 +36,7 @@ class WeChatAuthService:
         Raises:
             Exception: 微信API调用失败
         """
-        url = "https://api.weixin.qq.com/sns/jscode2session"
+        url = f"{settings.WECHAT_API_BASE_URL}/sns/jscode2session"
         params = {
             'appid': self.app_id,
             'secret': self.app_secret,
@@ -0,0 +1,33 @@
+"""
+通用模型字段
+"""
+from django.db import models
+from django.utils import timezone
+
+
+class LocalDateField(models.DateField):
+    """
+    由 source 时间字段按 TIME_ZONE（Asia/Shanghai）换算出的本地日期，写入时自动填充
+    用于替代 created_at__date / TruncDate 这类无法走索引的派生日期过滤
+    注意：须定义在 source 字段之后，保证 source 的 auto_now_add 已先于本字段赋值；
+    queryset.update() 修改 source 时不会触发同步
+    """
+
+    def __init__(self, *args, source='created_at', **kwargs):
+        self.source = source
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        kwargs.pop('editable', None)
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        moment = getattr(model_instance, self.source)
+        if moment is None:
+            return super().pre_save(model_instance, add)
+        value = timezone.localtime(moment).date()
+        setattr(model_instance, self.attname, value)
+        return value
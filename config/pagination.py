@@ -0,0 +1,61 @@
+"""
+游标（keyset）分页工具
+按 (时间字段, id) 倒序翻页，避免 OFFSET 深翻页随页码线性变慢；
+游标对客户端不透明（base64url 编码），只需原样回传
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Q
+from ninja import Field, Schema
+from ninja.errors import HttpError
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class CursorQuerySchema(Schema):
+    """游标分页查询参数"""
+    cursor: Optional[str] = Field(default=None, description="上一页响应头 X-Next-Cursor 的值，首页留空")
+    page_size: int = Field(default=settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE)
+
+
+def encode_cursor(timestamp: datetime, pk: int) -> str:
+    """将 (时间, id) 编码为不透明游标"""
+    raw = json.dumps([timestamp.isoformat(), pk], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """解析游标，格式非法时返回 400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise HttpError(400, "无效的分页游标")
+
+
+def keyset_page(queryset, cursor: Optional[str], page_size: int, time_field: str = "created_at"):
+    """
+    按 (time_field, id) 倒序取一页
+    queryset 可以是 .values() 结果（须包含 time_field 与 id），多取一行用于判断是否还有下一页
+    返回 (rows, next_cursor)，没有下一页时 next_cursor 为 None
+    """
+    queryset = queryset.order_by(f"-{time_field}", "-id")
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f"{time_field}__lt": timestamp}) | Q(**{time_field: timestamp, "id__lt": pk})
+        )
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    if isinstance(last, dict):
+        return rows, encode_cursor(last[time_field], last["id"])
+    return rows, encode_cursor(getattr(last, time_field), last.id)
@@ -86,6 +86,7 @@ INSTALLED_APPS = [
     "apps.emotiontracker",
     "apps.feedback",
     "apps.cognitive_flow",
+    "apps.exports",
 ]
 
 # 中间件
@@ -208,6 +209,37 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 WECHAT_MINI_PROGRAM_APP_ID = os.environ.get('WECHAT_MINI_PROGRAM_APP_ID', '')
 WECHAT_MINI_PROGRAM_APP_SECRET = os.environ.get('WECHAT_MINI_PROGRAM_APP_SECRET', '')
 WECHAT_SUBSCRIPTION_TEMPLATES = os.environ.get('WECHAT_SUBSCRIPTION_TEMPLATES', '')
+# 微信服务端接口地址（订阅消息与小程序登录共用），压测时可指向本地模拟服务（apps.notice.fake_wechat）
+WECHAT_API_BASE_URL = os.environ.get('WECHAT_API_BASE_URL', 'https://api.weixin.qq.com')
+WECHAT_HTTP_TIMEOUT = 5  # 单次请求超时（秒）
+# 订阅消息批量发送：单进程并发请求数与所有 worker 合计的每秒请求上限（按小程序接口频率限制配置，计数存于 Redis）
+WECHAT_SEND_CONCURRENCY = int(os.environ.get('WECHAT_SEND_CONCURRENCY', '16'))
+WECHAT_SEND_QPS = float(os.environ.get('WECHAT_SEND_QPS', '50'))
+# access_token：刷新锁过期时间（也是等待他人刷新的上限）、进程内副本与缓存的复核间隔、定时任务提前刷新的阈值（秒）
+WECHAT_TOKEN_LOCK_SECONDS = 10
+WECHAT_TOKEN_LOCAL_SECONDS = 60
+WECHAT_TOKEN_REFRESH_AHEAD = 1800
+# 情绪提醒按固定人数切分为分片任务，由多个 notice worker 并行发送
+REMINDER_SHARD_SIZE = int(os.environ.get('REMINDER_SHARD_SIZE', '500'))
+# 提醒批次租约（秒）：持有者超时未完成派发时，其他 beat/worker 实例可接管续跑
+REMINDER_RUN_LEASE_SECONDS = 900
+# 提醒发送打散：窗口（分钟，0 表示同一时刻全部派发）与 ETA 时间桶粒度（分钟）；
+# 偏移策略 history 按用户近 REMINDER_HISTORY_DAYS 天的平均开始作答时刻提前 REMINDER_HABIT_LEAD_MINUTES 分钟，
+# 结果不在窗口内（含提醒后立即作答的用户）、无历史或 hash 策略时按用户 UUID 均匀散列。窗口须小于 broker 的 visibility_timeout（Redis 默认 1 小时）
+REMINDER_SPREAD_MINUTES = int(os.environ.get('REMINDER_SPREAD_MINUTES', '30'))
+REMINDER_SPREAD_BUCKET_MINUTES = 5
+REMINDER_SPREAD_STRATEGY = os.environ.get('REMINDER_SPREAD_STRATEGY', 'history')
+REMINDER_HISTORY_DAYS = 28
+REMINDER_HABIT_LEAD_MINUTES = 10
+# 订阅消息发件箱：每批认领条数、单次排空时长上限、认领租约（秒）、最大尝试次数与退避（秒）
+# 排空在单进程的 notice worker（同时内嵌 beat）上执行，期间提醒的 ETA 分片与其他定时任务都在其后排队；
+# 单次排空上限须远小于 REMINDER_SPREAD_BUCKET_MINUTES，并短于每分钟一次的排空调度，未排完的由下一次继续
+NOTICE_OUTBOX_BATCH_SIZE = 200
+NOTICE_OUTBOX_DRAIN_SECONDS = 50
+NOTICE_OUTBOX_LEASE_SECONDS = 300
+NOTICE_OUTBOX_MAX_ATTEMPTS = 5
+NOTICE_OUTBOX_RETRY_BASE_SECONDS = 60
+NOTICE_OUTBOX_RETRY_MAX_SECONDS = 3600
 
 # =============================================================================
 # JWT 认证配置
@@ -369,6 +401,37 @@ API_VERSION = 'v1'
 DEFAULT_PAGE_SIZE = 20
 MAX_PAGE_SIZE = 100
 
+# 情绪记录离线补交（/emotiontracker/batch）
+EMOTION_BATCH_MAX_ITEMS = 50  # 单次提交的最大条数
+EMOTION_BATCH_MAX_AGE_DAYS = 7  # 允许补交的最长离线天数
+EMOTION_BATCH_CLOCK_SKEW_SECONDS = 300  # 容忍客户端时钟超前的秒数
+EMOTION_LIST_PAGE_SIZE = 500  # /emotiontracker/list 默认且最大每页条数，沿用分页前的 500 条上限
+
+# 后台导出任务（apps.exports），文件写入 MEDIA_ROOT/exports/
+EXPORT_CHUNK_SIZE = 2000  # 分块读取行数，同时作为进度上报间隔
+EXPORT_FILE_TTL_HOURS = 24  # 导出文件保留时长，过期由定时任务清理
+EXPORT_MAX_SELECTED_PKS = 1000  # 手动勾选导出时登记主键的上限，更大范围请用“全选所有”按筛选条件导出
+EXPORT_STALE_MINUTES = 30  # running 任务超过该时长未上报进度视为 worker 丢失，由清理任务标记为失败
+
+# YAML 量表编译缓存目录（按文件内容 sha256 命名），置空则每次启动重新解析
+SCALE_COMPILE_CACHE_DIR = os.environ.get('SCALE_COMPILE_CACHE_DIR', str(BASE_DIR / '.cache' / 'scales'))
+# 量表定义公开接口的 Cache-Control max-age（秒），过期后客户端凭 ETag 重新验证
+SCALE_DEFINITION_CACHE_SECONDS = 300
+# /scales/results/history 默认且最大每页条数；小程序不传 page_size、也不读取游标，需一次取回全部历史结果
+SCALE_HISTORY_PAGE_SIZE = 500
+# 量表计分结果的进程内 LRU 缓存容量（条），键为 (量表 code, 版本, 答案)
+SCALE_SCORE_CACHE_SIZE = 4096
+# 量表心理测量统计每批读取的答卷数
+PSYCHOMETRICS_CHUNK_SIZE = 5000
+
+# 健康报告摘要（/reports/summary）按用户缓存的秒数，报告增删改时主动失效
+REPORT_SUMMARY_CACHE_SECONDS = 600
+# 周期报告批量生成：统计周期天数、按用户 UUID 区间划分的分片数、每批处理的用户数
+# 分片由 batch 队列 worker 并行处理，实际并行度为 min(REPORT_SHARDS, CELERY_BATCH_CONCURRENCY)
+REPORT_PERIOD_DAYS = 7
+REPORT_SHARDS = 4
+REPORT_BATCH_USERS = 500
+
 # =============================================================================
 # Django Summernote 配置
 # =============================================================================
@@ -23,6 +23,9 @@ CACHES = {
 
 CELERY_TASK_ALWAYS_EAGER = True
 
+# 测试不写入量表编译缓存
+SCALE_COMPILE_CACHE_DIR = None
+
 # 显式提供签名密钥,规避 fail-fast 校验
 JWT_SIGNING_KEY = "test-only-signing-key-not-for-production"
 NINJA_JWT = {**NINJA_JWT, "SIGNING_KEY": JWT_SIGNING_KEY}  # noqa: F405
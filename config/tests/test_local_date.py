@@ -0,0 +1,82 @@
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.cognitive_flow.models import CognitiveAssessmentRecord
+from apps.journals.models import MoodJournal
+from apps.reports.models import HealthReport
+from apps.scales.models import ScaleResult
+from config.jwt_auth_adapter import create_tokens_for_user
+
+User = get_user_model()
+
+
+def _report(user_id):
+    return HealthReport.objects.create(
+        user_id=user_id, assessment_id=1, report_type="综合", overall_risk="低风险",
+        summary="", professional_advice="", trend_analysis="",
+    )
+
+
+class LocalDateFieldTests(TestCase):
+    def test_local_date_follows_source_in_shanghai_time(self):
+        report = _report(uuid.uuid4())
+        self.assertEqual(report.local_date, timezone.localdate())
+
+        # UTC 17:30 已是上海次日 01:30
+        report.created_at = datetime(2026, 3, 1, 17, 30, tzinfo=dt_timezone.utc)
+        report.save()
+        report.refresh_from_db()
+        self.assertEqual(report.local_date.isoformat(), "2026-03-02")
+
+    def test_health_trends_filter_on_local_date(self):
+        user = User.objects.create(username="openid_trend", role="user")
+        token = create_tokens_for_user(user)["access"]
+        _report(user.id)
+        stale = _report(user.id)
+        HealthReport.objects.filter(id=stale.id).update(
+            local_date=timezone.localdate() - timedelta(days=200)
+        )
+        resp = self.client.get(
+            "/api/reports/trends?days=90", secure=True,
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([item["date"] for item in resp.json()], [timezone.localdate().isoformat()])
+
+
+class LocalDateExplainTests(TestCase):
+    """记录改造前后的执行计划：派生日期过滤只能按 user 过滤，local_date 范围可进入复合索引"""
+
+    def _plans(self, model, user_field, source):
+        user_id = uuid.uuid4()
+        end = timezone.localdate()
+        start = end - timedelta(days=30)
+        before = model.objects.filter(**{
+            user_field: user_id, f"{source}__date__gte": start, f"{source}__date__lte": end,
+        }).explain()
+        after = model.objects.filter(**{
+            user_field: user_id, "local_date__range": [start, end],
+        }).explain()
+        return before, after
+
+    def test_local_date_range_uses_composite_index(self):
+        cases = [
+            (MoodJournal, "user_id", "record_date"),
+            (HealthReport, "user_id", "created_at"),
+            (ScaleResult, "user_id", "created_at"),
+            (CognitiveAssessmentRecord, "user_id", "created_at"),
+        ]
+        for model, user_field, source in cases:
+            with self.subTest(model=model.__name__):
+                before, after = self._plans(model, user_field, source)
+                index_name = next(
+                    index.name for index in model._meta.indexes
+                    if [field.lstrip("-") for field in index.fields][-1] == "local_date"
+                )
+                self.assertNotIn("local_date", before)
+                self.assertIn(index_name, after)
+                self.assertIn("local_date>", after.replace(" ", ""))
@@ -0,0 +1,22 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.emotiontracker.models import EmotionRecord
+from apps.users.models import User
+
+
+class QueryPlanBenchmarkTests(TestCase):
+    def test_every_access_pattern_hits_an_index(self):
+        out = StringIO()
+        call_command("bench_query_plans", users=3, days=40, repeat=2, stdout=out)
+        output = out.getvalue()
+        self.assertIn("emotiontracker/list", output)
+        self.assertIn("后台: 失败通知日志", output)
+        self.assertNotIn("存在全表扫描", output)
+        self.assertIn("所有查询均命中索引", output)
+        # 生成的数据随事务回滚
+        self.assertFalse(EmotionRecord.objects.exists())
+        self.assertFalse(User.objects.filter(username__startswith="bench_").exists())
+        self.assertTrue(EmotionRecord._meta.get_field("created_at").auto_now_add)
@@ -80,6 +80,17 @@ case "$CONTAINER_ROLE" in
         echo "// [🔄️ Starting Celery Worker + Beat] //"
         exec uv run celery -A apps.notice worker -B -l info -Q notice --concurrency 1 --pool solo --max-tasks-per-child 100 --scheduler django_celery_beat.schedulers:DatabaseScheduler
         ;;
+    "export-worker")
+        echo "// [📦 Starting Celery Export Worker] //"
+        # 独立消费 exports 队列，长时间导出不影响 notice 队列的提醒任务
+        exec uv run celery -A apps.notice worker -l info -Q exports -n exports@%h --concurrency 1 --pool solo --max-tasks-per-child 20
+        ;;
+    "batch-worker")
+        echo "// [🧮 Starting Celery Batch Worker] //"
+        # 消费 batch 队列（心理测量统计、周期报告分片），prefork 多进程并行处理报告分片；
+        # 并发数不宜超过 REPORT_SHARDS，也要为数据库连接留出余量
+        exec uv run celery -A apps.notice worker -l info -Q batch -n batch@%h --concurrency "${CELERY_BATCH_CONCURRENCY:-2}" --pool prefork --max-tasks-per-child 20
+        ;;
     "beat")
         echo "// [❤️ Starting Celery Beat] //"
         # 确保 beat 使用了正确的 app 名称和调度器